@@ -21,6 +21,8 @@ from telegram.ext import (
 import redis.asyncio as redis
 from motor.motor_asyncio import AsyncIOMotorClient
 
+from core.tracing import load_spans, latency_report   # ⏱️ تقرير زمن التنفيذ
+
 
 # ================================================================
 # الإعدادات العامة
@@ -45,6 +47,17 @@ db = mc[DB_NAME]
 pending_input = {}  # { user_id : {"mode": "...", "extra": "..."} }
 
 
+async def notify_client_update(client_id, event, **fields):
+    """
+    إبلاغ الخدمات (Fleet Executor / Brain roster) بتعديل بيانات العميل
+    fields = القيم الجديدة (balance_usdt / allocation / active) — Brain يطبّقها مباشرة
+    """
+    payload = {"client_id": str(client_id), "event": event}
+    if fields:
+        payload["fields"] = fields
+    await r.publish("HORUS_CLIENT_UPDATES", json.dumps(payload))
+
+
 # ================================================================
 # رسائل الواجهة
 # ================================================================
@@ -513,6 +526,8 @@ async def handle_set_balance(update: Update, context):
         {"$set": {"balance_usdt": balance}}
     )
 
+    await notify_client_update(cid, "balance", balance_usdt=balance)
+
     await update.message.reply_text(
         f"✅ تم تحديث رصيد العميل **{cid}** إلى {balance}$",
         parse_mode="Markdown",
@@ -554,6 +569,8 @@ async def handle_set_alloc(update: Update, context):
         {"$set": {"allocation": alloc}}
     )
 
+    await notify_client_update(cid, "allocation", allocation=alloc)
+
     await update.message.reply_text(
         f"📈 تم تعديل نسبة الدخول للعميل **{cid}** إلى {alloc}%",
         parse_mode="Markdown",
@@ -635,6 +652,8 @@ async def handle_toggle_client(update: Update, context):
         {"$set": {"active": new_state}}
     )
 
+    await notify_client_update(cid, "toggled", active=new_state)
+
     await update.message.reply_text(
         f"🔁 حالة العميل **{cid}** أصبحت: {'🟢 مفعل' if new_state else '🔴 متوقف'}",
         parse_mode="Markdown",
@@ -665,6 +684,8 @@ async def handle_delete_client(update: Update, context):
 
     await db.clients.delete_one({"client_id": cid})
 
+    await notify_client_update(cid, "deleted")
+
     await update.message.reply_text(
         f"🗑 تم حذف العميل **{cid}** بنجاح.",
         parse_mode="Markdown",
@@ -910,6 +931,7 @@ REPORTS_MENU = InlineKeyboardMarkup([
     [InlineKeyboardButton("🌊 تقرير موجات Smart Entry", callback_data="rep_waves")],
     [InlineKeyboardButton("🧮 ملخص الأرباح", callback_data="rep_profit")],
     [InlineKeyboardButton("📘 آخر 100 Log", callback_data="rep_logs")],
+    [InlineKeyboardButton("⏱️ زمن التنفيذ (Latency)", callback_data="rep_latency")],
     [InlineKeyboardButton("⬅️ رجوع", callback_data="back_main")]
 ])
 
@@ -1055,6 +1077,41 @@ async def report_logs(query):
     await query.edit_message_text(txt, parse_mode="Markdown", reply_markup=REPORTS_MENU)
 
 
+# -------------------------------------------------------------
+# ⏱️ زمن التنفيذ: fill الكابتن → رد البورصة
+# -------------------------------------------------------------
+
+def _fmt_pct(p):
+    return f"{p['p50']}/{p['p95']}/{p['p99']}" if p else "-"
+
+
+async def report_latency(query):
+    # ملفات الـ spans محلية (HORUS_TRACE_DIR) — القراءة خارج الـ event loop
+    spans = await asyncio.to_thread(load_spans)
+    rep = latency_report(spans)
+
+    if not rep["traces"]:
+        return await query.edit_message_text("❌ لا توجد بيانات Tracing.", reply_markup=REPORTS_MENU)
+
+    txt = f"⏱️ **زمن التنفيذ — آخر {rep['traces']} إشارة**\n(p50/p95/p99 ms)\n\n"
+
+    txt += "**المراحل** (انتظار ← معالجة):\n"
+    for stage, st in rep["stages"].items():
+        txt += f"• `{stage}`: {_fmt_pct(st['hop'])} ← {_fmt_pct(st['dur'])}\n"
+
+    if rep["exchanges"]:
+        txt += "\n**البورصات** (طلب HTTP / من fill الكابتن):\n"
+        for ex, st in rep["exchanges"].items():
+            txt += f"• {ex}: {_fmt_pct(st['dur'])} / {_fmt_pct(st['e2e'])}\n"
+
+    latest = rep["latest"]
+    txt += f"\n**آخر إشارة** `{latest['signal'] or latest['trace']}`:\n"
+    for stage, hop, dur, e2e in latest["stages"][:20]:
+        txt += f"• `{stage}`: +{hop if hop is not None else 0:.1f} / {dur:.1f} → {e2e:.1f}ms\n"
+
+    await query.edit_message_text(txt, parse_mode="Markdown", reply_markup=REPORTS_MENU)
+
+
 # -------------------------------------------------------------
 # 🎛 موجه التقارير
 # -------------------------------------------------------------
@@ -1082,3 +1139,6 @@ async def handle_report_buttons(update: Update, context):
 
     if key == "rep_logs":
         return await report_logs(query)
+
+    if key == "rep_latency":
+        return await report_latency(query)
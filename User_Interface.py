@@ -4,7 +4,10 @@
 # ============================================================
 
 import asyncio
+import json
 import logging
+import os
+import redis.asyncio as redis
 from aiogram import Bot, Dispatcher, types
 from aiogram.filters import Command
 from aiogram.utils.keyboard import InlineKeyboardMarkup, InlineKeyboardButton
@@ -19,6 +22,9 @@ log = logging.getLogger("Horus-UserBot")
 bot = Bot(USER_BOT_TOKEN)
 dp = Dispatcher()
 
+# Redis: لإبلاغ الخدمات بتعديل بيانات العميل
+r = redis.from_url(os.getenv("REDIS_URL", "redis://localhost:6379"), decode_responses=True)
+
 
 # ============================================================
 # HELPERS
@@ -40,6 +46,18 @@ async def get_or_create_client(session, tg_id):
     return user
 
 
+async def notify_client_update(client_id, event, **fields):
+    """
+    إبلاغ Fleet Executor (وباقي الخدمات) بأن بيانات العميل تغيّرت
+    حتى يتم حذف الـ client المخزّن في Gate
+    fields = القيم الجديدة (exchange / active) — يطبّقها Brain roster مباشرة
+    """
+    payload = {"client_id": str(client_id), "event": event}
+    if fields:
+        payload["fields"] = fields
+    await r.publish("HORUS_CLIENT_UPDATES", json.dumps(payload))
+
+
 def main_menu():
     return InlineKeyboardMarkup(
         inline_keyboard=[
@@ -146,6 +164,8 @@ async def cb_disable(cb: types.CallbackQuery):
         client.active = False
         await session.commit()
 
+    await notify_client_update(cb.from_user.id, "disabled", active=False)
+
     await cb.message.edit_text("❌ تم إيقاف الخدمة. يمكنك إعادة تفعيلها من خلال /start")
     await cb.answer()
 
@@ -181,6 +201,8 @@ async def handle_api_input(msg: types.Message):
 
         await session.commit()
 
+    await notify_client_update(msg.from_user.id, "keys", exchange=exchange.lower(), active=True)
+
     await msg.answer("✅ تم تسجيل مفاتيحك وتفعيل الخدمة.\n\nاكتب /start لعرض القائمة.")
 
 # ============================================================
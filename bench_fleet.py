@@ -0,0 +1,197 @@
+# ================================================================
+#  HORUS BENCH — FleetExecutor / SmartEntryEngine against the mock
+# ================================================================
+#  قياس throughput و p50 / p99 لمسار التنفيذ بدون لمس البورصات الحقيقية:
+#
+#       python bench_fleet.py --clients 300 --signals 20
+#       python bench_fleet.py --latency-ms 40 --error-rate 0.02 --timeout-rate 0.01
+#
+#  • يشغّل mock_exchange.py داخل نفس العملية (أو --mock host:port لسيرفر خارجي)
+#  • العملاء وهميون ومحمّلون مسبقاً في Gate.clients (بدون Treasury / DB)
+#  • SmartEntryEngine ينشر الموجات في sink داخلي (بدون Redis)
+# ================================================================
+
+import argparse
+import asyncio
+import os
+import time
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description="HORUS fleet benchmark (mock exchanges)")
+    p.add_argument("--mock", default=None, help="external mock host:port (default: in-process)")
+    p.add_argument("--port", type=int, default=8900)
+    p.add_argument("--clients", type=int, default=300, help="clients per exchange")
+    p.add_argument("--signals", type=int, default=20)
+    p.add_argument("--symbol", default="BTC/USDT")
+    p.add_argument("--usd", type=float, default=50)
+    p.add_argument("--latency-ms", type=float, default=20)
+    p.add_argument("--jitter-ms", type=float, default=5)
+    p.add_argument("--error-rate", type=float, default=0.0)
+    p.add_argument("--timeout-rate", type=float, default=0.0)
+    p.add_argument("--rate-limit", type=int, default=0)
+    p.add_argument("--seed", type=int, default=7)
+    return p.parse_args(argv)
+
+
+ARGS = parse_args()
+
+# لازم قبل استيراد Gate — العناوين تُقرأ عند الاستيراد (core/endpoints.py)
+os.environ["HORUS_MOCK_EXCHANGE"] = ARGS.mock or f"127.0.0.1:{ARGS.port}"
+
+from aiohttp import web  # noqa: E402
+
+from mock_exchange import MockExchange  # noqa: E402
+from core.fleet_executor import FleetExecutor  # noqa: E402
+from core.smart_entry_engine import SmartEntryEngine  # noqa: E402
+from gate.gate import Gate, OKXClient, BinanceClient, BybitClient  # noqa: E402
+
+
+EXCHANGES = ("okx", "binance", "bybit")
+
+
+# ================================================================
+#  HELPERS
+# ================================================================
+
+def percentile(values, q):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    k = min(len(values) - 1, max(0, round(q / 100 * (len(values) - 1))))
+    return values[k]
+
+
+def summary(name, latencies, orders, elapsed, errors=0):
+    ms = [x * 1000 for x in latencies]
+    print(
+        f"{name:<14} | runs={len(ms):<4} orders={orders:<6} errors={errors:<4} "
+        f"| {orders / elapsed:8.0f} orders/s "
+        f"| p50={percentile(ms, 50):7.1f}ms p90={percentile(ms, 90):7.1f}ms "
+        f"p99={percentile(ms, 99):7.1f}ms max={max(ms, default=0):7.1f}ms"
+    )
+
+
+class PublishSink:
+    """
+    بديل Bus.publish للـ SmartEntryEngine — يعدّ الموجات فقط
+    """
+
+    def __init__(self):
+        self.published = 0
+
+    async def publish(self, channel, data):
+        self.published += 1
+
+
+def seed_clients(n):
+    """
+    عملاء وهميون مباشرة في ClientCache (الـ mock لا يتحقق من التواقيع)
+    """
+    gate = Gate()
+    per_exchange = {ex: {} for ex in EXCHANGES}
+
+    for i in range(n):
+        # مفتاح مختلف لكل عميل (نفس وضع الإنتاج: حد أوامر لكل key)
+        uid = f"bench_{i}"
+        Gate.clients.put(uid, "okx", OKXClient(f"okx_{i}", "secret", "pass", gate))
+        Gate.clients.put(uid, "binance", BinanceClient(f"bin_{i}", "secret", gate))
+        Gate.clients.put(uid, "bybit", BybitClient(f"byb_{i}", "secret", gate))
+        for ex in EXCHANGES:
+            per_exchange[ex][uid] = ARGS.usd
+
+    return per_exchange
+
+
+# ================================================================
+#  BENCHMARKS
+# ================================================================
+
+async def bench_fleet(executor, per_exchange):
+    latencies, orders, errors = [], 0, 0
+
+    t0 = time.perf_counter()
+    for n in range(ARGS.signals):
+        packet = {
+            "type": "NORMAL",
+            "signal_id": f"bench_fleet_{time.time_ns()}_{n}",
+            "symbol": ARGS.symbol,
+            "action": "BUY",
+            "per_exchange": per_exchange,
+        }
+        s = time.perf_counter()
+        results = await executor.handle_normal(packet)
+        latencies.append(time.perf_counter() - s)
+
+        orders += len(results)
+        errors += sum(1 for r in results if r["status"] != "success")
+
+    summary("FleetExecutor", latencies, orders, time.perf_counter() - t0, errors)
+
+
+async def bench_smart_entry(per_exchange):
+    engine = SmartEntryEngine()
+    engine.bus = PublishSink()
+
+    demand = {ex: {"client_demands": clients} for ex, clients in per_exchange.items()}
+    latencies = []
+
+    t0 = time.perf_counter()
+    for n in range(ARGS.signals):
+        packet = {
+            "signal_id": f"bench_smart_{n}",
+            "symbol": ARGS.symbol,
+            "action": "BUY",
+            "demand": demand,
+        }
+        s = time.perf_counter()
+        await engine.process_signal(packet)
+        latencies.append(time.perf_counter() - s)
+
+    summary("SmartEntry", latencies, engine.bus.published, time.perf_counter() - t0)
+
+
+async def main():
+    runner = None
+    if ARGS.mock is None:
+        mock = MockExchange(
+            latency_ms=ARGS.latency_ms,
+            jitter_ms=ARGS.jitter_ms,
+            error_rate=ARGS.error_rate,
+            timeout_rate=ARGS.timeout_rate,
+            rate_limit=ARGS.rate_limit,
+            seed=ARGS.seed,
+        )
+        runner = web.AppRunner(mock.app())
+        await runner.setup()
+        await web.TCPSite(runner, "127.0.0.1", ARGS.port).start()
+
+    # startup بدون TickerStore (لا Redis) — الأسعار من REST ثم الـ cache المحلي
+    await Gate.sessions.start()
+    await Gate.clock.start(Gate.sessions)
+    await Gate.instruments.start(Gate.sessions)
+
+    try:
+        per_exchange = seed_clients(ARGS.clients)
+        print(f"\n🧪 {ARGS.clients} clients × {len(EXCHANGES)} exchanges | {ARGS.signals} signals "
+              f"| latency={ARGS.latency_ms}±{ARGS.jitter_ms}ms errors={ARGS.error_rate} "
+              f"timeouts={ARGS.timeout_rate} rate_limit={ARGS.rate_limit or 'off'}\n")
+
+        executor = FleetExecutor()
+        await bench_fleet(executor, per_exchange)
+        await bench_smart_entry(per_exchange)
+
+        print(f"\nlimiter: {Gate.limiter.stats()}")
+        print(f"scheduler: {executor.scheduler.stats()}")
+        if ARGS.mock is None:
+            # lot_rejects > 0 = تقريب الكمية لا يطابق LOT_SIZE
+            print(f"mock: {mock.stats}")
+        await executor.scheduler.close()
+    finally:
+        await Gate.shutdown()
+        if runner is not None:
+            await runner.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,102 @@
+# ================================================================
+#  HORUS BENCH — Brain signal build time vs. client count
+# ================================================================
+#  مقارنة:
+#       loop    ← حلقة Python القديمة (balance × allocation لكل عميل)
+#       numpy   ← ClientRoster.demand() (أعمدة + min notional)
+#       packet  ← numpy + json.dumps للـ packet (ما يدفعه Brain فعلياً قبل النشر)
+#
+#       python bench_roster.py --clients 1000 10000 100000
+# ================================================================
+
+import argparse
+import json
+import random
+import time
+
+from core.roster import ClientRoster, EXCHANGES
+from core.tracing import percentile
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description="HORUS roster benchmark")
+    p.add_argument("--clients", type=int, nargs="+", default=[100, 1000, 10000, 100000])
+    p.add_argument("--runs", type=int, default=20)
+    p.add_argument("--inactive", type=float, default=0.1, help="fraction of inactive clients")
+    p.add_argument("--min-notional", type=float, default=5.0)
+    p.add_argument("--seed", type=int, default=7)
+    return p.parse_args(argv)
+
+
+def make_clients(n, inactive, rnd):
+    return {
+        f"client_{i}": {
+            "exchange": rnd.choice(EXCHANGES),
+            "balance_usdt": rnd.uniform(10, 20000),
+            "allocation": rnd.choice((1, 5, 10, 20, 50)),
+            "active": rnd.random() >= inactive,
+        }
+        for i in range(n)
+    }
+
+
+def loop_demand(clients, floor):
+    """
+    نفس منطق BrainEngine.handle_signal قبل الـ roster
+    """
+    per_exchange = {ex: {} for ex in EXCHANGES}
+    total = 0
+    for client_id, info in clients.items():
+        if not info["active"]:
+            continue
+        usd = info["balance_usdt"] * (info["allocation"] / 100)
+        if usd <= 0 or usd < floor:
+            continue
+        per_exchange[info["exchange"]][client_id] = usd
+        total += usd
+    return {k: v for k, v in per_exchange.items() if v}, total
+
+
+def timed(fn, runs):
+    out = []
+    for _ in range(runs):
+        s = time.perf_counter()
+        fn()
+        out.append((time.perf_counter() - s) * 1000)
+    return out
+
+
+def main():
+    args = parse_args()
+    rnd = random.Random(args.seed)
+    floor = {ex: args.min_notional for ex in EXCHANGES}
+
+    print(f"\n🧪 signal build | runs={args.runs} inactive={args.inactive} min_notional={args.min_notional}\n")
+    print(f"{'clients':>8} | {'loop p50':>9} {'p99':>8} | {'numpy p50':>9} {'p99':>8} | "
+          f"{'packet p50':>10} {'p99':>8} | speedup")
+
+    for n in args.clients:
+        clients = make_clients(n, args.inactive, rnd)
+        roster = ClientRoster()
+        roster.replace(clients)
+
+        # نفس النتيجة قبل القياس
+        a, ta = loop_demand(clients, args.min_notional)
+        b, tb = roster.demand(floor)
+        assert {ex: set(v) for ex, v in a.items()} == {ex: set(v) for ex, v in b.items()}
+        assert abs(ta - tb) <= 1e-6 * max(1.0, ta)
+
+        loop = timed(lambda: loop_demand(clients, args.min_notional), args.runs)
+        vec = timed(lambda: roster.demand(floor), args.runs)
+        pkt = timed(lambda: json.dumps({"per_exchange": roster.demand(floor)[0]}), args.runs)
+
+        print(
+            f"{n:>8} | {percentile(loop, 50):8.2f}ms {percentile(loop, 99):7.2f}ms "
+            f"| {percentile(vec, 50):8.2f}ms {percentile(vec, 99):7.2f}ms "
+            f"| {percentile(pkt, 50):9.2f}ms {percentile(pkt, 99):7.2f}ms "
+            f"| {percentile(loop, 50) / max(percentile(vec, 50), 1e-9):5.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
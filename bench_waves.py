@@ -0,0 +1,105 @@
+# ================================================================
+#  HORUS BENCH — Wave planner: optimized vs. bucketed (expected cost)
+# ================================================================
+#  كتب اصطناعية (عمق يزيد مع البعد عن أفضل سعر) × أحجام طلب
+#  بمضاعفات سيولة 1%، ولكل حالة:
+#       waves / spacing / executed USD / max slippage per wave /
+#       expected cost USD / cost per executed USD (bps)
+#  نفس نموذج التكلفة للطريقتين: impact من المنحنى مع تعافي الكتاب
+#  (HORUS_BOOK_HALFLIFE) + drift أثناء التباعد
+#
+#  الطريقتان تنفذان أحجاماً مختلفة (reduction) → المقارنة العادلة:
+#       cost / executed USD  +  optimized بنفس الحجم المنفّذ للـ bucketed
+#
+#       python bench_waves.py
+#       python bench_waves.py --multiples 0.2 1 3 6 --max-slippage 0.003
+# ================================================================
+
+import argparse
+import time
+
+import numpy as np
+
+from core.liquidity import LiquidityCurve
+from core.wave_planner import plan_waves, MAX_SLIPPAGE, MAX_WAVES, BOOK_HALFLIFE
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description="HORUS wave planner benchmark")
+    p.add_argument("--price", type=float, default=60000)
+    p.add_argument("--levels", type=int, default=400)
+    p.add_argument("--tick-bps", type=float, default=0.5, help="level spacing in bps")
+    p.add_argument("--level-usd", type=float, default=20000, help="notional at the best level")
+    p.add_argument("--growth", type=float, default=0.01, help="depth growth per level")
+    p.add_argument("--multiples", type=float, nargs="+", default=[0.2, 0.5, 1, 1.5, 2, 3, 5])
+    p.add_argument("--max-slippage", type=float, default=MAX_SLIPPAGE)
+    p.add_argument("--max-waves", type=int, default=MAX_WAVES)
+    p.add_argument("--halflife", type=float, default=BOOK_HALFLIFE, help="book recovery half-life (s)")
+    p.add_argument("--seed", type=int, default=7)
+    return p.parse_args(argv)
+
+
+def synthetic_asks(args, rng):
+    i = np.arange(args.levels)
+    price = args.price * (1 + i * args.tick_bps / 10000)
+    usd = args.level_usd * (1 + args.growth * i) * rng.uniform(0.5, 1.5, args.levels)
+    return np.column_stack([price, usd / price])
+
+
+def per_usd(plan, demand):
+    """
+    تكلفة متوقعة لكل USD منفّذ (bps)
+    """
+    executed = demand * plan["reduction"]
+    return plan["expected_cost"] / executed * 10000 if executed else 0.0
+
+
+def row(name, plan, demand):
+    executed = demand * plan["reduction"]
+    worst = max(plan["expected_slippage"], default=0.0) * 100
+    return (f"{name:<15} waves={plan['waves']:<2} spacing={plan['spacing']:4.1f}s "
+            f"executed={executed:12,.0f} USD ({plan['reduction'] * 100:5.1f}%) "
+            f"max slip/wave={worst:6.3f}% cost={plan['expected_cost']:10.2f} USD "
+            f"→ {per_usd(plan, demand):6.2f} bps / executed USD")
+
+
+def main():
+    args = parse_args()
+    rng = np.random.default_rng(args.seed)
+    curve = LiquidityCurve(synthetic_asks(args, rng), "asks")
+    liq1 = curve.depth(0.01)
+
+    print(f"\n🧪 book: {args.levels} levels | liq 1% = {liq1:,.0f} USD | "
+          f"max slippage/wave = {args.max_slippage * 100:.2f}% | max waves = {args.max_waves} "
+          f"| recovery half-life = {args.halflife:.1f}s\n")
+
+    kw = {"max_slippage": args.max_slippage, "max_waves": args.max_waves, "halflife": args.halflife}
+    for m in args.multiples:
+        demand = liq1 * m
+        opt = plan_waves(curve, demand, "optimized", **kw)
+        old = plan_waves(curve, demand, "bucketed", halflife=args.halflife)
+
+        # نفس الحجم المنفّذ للـ bucketed → الفرق من التخطيط فقط وليس من الحجم
+        same = demand * old["reduction"]
+        opt_same = plan_waves(curve, same, "optimized", **kw)
+
+        print(f"demand = {m:>4}× liq1 ({demand:,.0f} USD)")
+        print("   " + row("bucketed", old, demand))
+        print("   " + row("optimized", opt, demand))
+        print("   " + row("optimized@same", opt_same, same))
+        if old["reduction"] and opt_same["reduction"]:
+            base = per_usd(old, demand)
+            diff = per_usd(opt_same, same) - base
+            print(f"   Δ cost / executed USD at equal size: {diff:+.2f} bps"
+                  + (f" ({diff / base * 100:+.1f}%)" if base else ""))
+
+    # زمن التخطيط نفسه (مسار process_signal)
+    runs = 1000
+    s = time.perf_counter()
+    for _ in range(runs):
+        plan_waves(curve, liq1 * 2, "optimized", **kw)
+    print(f"\nplanning time: {(time.perf_counter() - s) / runs * 1e6:.1f} µs / plan")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+# ================================================================
+#  HORUS BOOK CACHE — Single-flight + short TTL for REST order books
+# ================================================================
+#  عدة إشارات RISKY لنفس العملة في نفس اللحظة → كل واحدة كانت تطلب
+#  3 snapshots REST مستقلة (+ polling الـ WaveScheduler لو لا يوجد stream)
+#
+#  get(exchange, symbol, depth, fetch):
+#       • نتيجة أحدث من ttl          → hit   (بدون شبكة)
+#       • طلب جارٍ لنفس المفتاح       → shared (ننتظر نفس الـ future)
+#       • غير ذلك                    → miss  (طلب واحد فقط)
+#
+#  المفتاح = (exchange, symbol, depth)
+#  None / exception لا يُخزَّن — الطلب التالي يحاول من جديد
+#
+#  العدادات (hits / shared / misses / errors) → HORUS_SMART_ENTRY_METRICS
+# ================================================================
+
+import asyncio
+import json
+import logging
+import os
+import time
+
+log = logging.getLogger("BookCache")
+
+BOOK_CACHE_TTL = float(os.getenv("HORUS_BOOK_CACHE_TTL", "0.5"))   # ثواني
+
+METRICS_KEY = "HORUS_SMART_ENTRY_METRICS"
+
+
+def _retrieve(task):
+    # لا "exception was never retrieved" لو ألغي كل المنتظرين
+    if not task.cancelled():
+        task.exception()
+
+
+class BookCache:
+
+    def __init__(self, ttl=BOOK_CACHE_TTL, size=1000):
+        self.ttl = ttl
+        self.size = size
+        self.cache = {}       # key → (monotonic ts, snapshot)
+        self.inflight = {}    # key → asyncio.Task (طلب REST جارٍ)
+        self.counters = {"hits": 0, "shared": 0, "misses": 0, "errors": 0}
+
+    async def get(self, exchange, symbol, depth, fetch):
+        """
+        fetch = async () → snapshot | None — يُستدعى فقط عند miss
+        """
+        key = (exchange, symbol, depth)
+
+        entry = self.cache.get(key)
+        if entry is not None and time.monotonic() - entry[0] < self.ttl:
+            self.counters["hits"] += 1
+            return entry[1]
+
+        task = self.inflight.get(key)
+        if task is not None:
+            self.counters["shared"] += 1
+        else:
+            self.counters["misses"] += 1
+            task = asyncio.create_task(self._fetch(key, fetch))
+            task.add_done_callback(_retrieve)
+            self.inflight[key] = task
+
+        # shield: إلغاء أحد المنتظرين (أو صاحب الطلب) لا يلغي الطلب على الباقين
+        return await asyncio.shield(task)
+
+    async def _fetch(self, key, fetch):
+        try:
+            snapshot = await fetch()
+        except Exception as e:
+            self.counters["errors"] += 1
+            log.warning(f"⚠️ Book snapshot failed {key}: {e}")
+            raise
+        finally:
+            self.inflight.pop(key, None)
+
+        if snapshot is not None:
+            self._store(key, snapshot)
+        return snapshot
+
+    def _store(self, key, snapshot):
+        self.cache.pop(key, None)
+        self.cache[key] = (time.monotonic(), snapshot)
+        if len(self.cache) > self.size:
+            # الأقدم أولاً (dict بترتيب الإدخال — نعيد الإدخال عند التحديث)
+            self.cache.pop(next(iter(self.cache)))
+
+    def stats(self):
+        total = self.counters["hits"] + self.counters["shared"] + self.counters["misses"]
+        saved = self.counters["hits"] + self.counters["shared"]
+        return {
+            **self.counters,
+            "hit_rate": round(saved / total, 3) if total else 0.0,
+            "cached": len(self.cache),
+            "inflight": len(self.inflight),
+        }
+
+    async def publish_metrics(self, r, every=10):
+        """
+        كتابة العدادات دورياً في Redis (للكونسول / المراقبة) — field = book_cache
+        """
+        while True:
+            await asyncio.sleep(every)
+            try:
+                await r.hset(METRICS_KEY, mapping={"book_cache": json.dumps(self.stats())})
+            except Exception as e:
+                log.error(f"❌ Book cache metrics failed: {e}")
@@ -18,13 +18,17 @@
 # ================================================================
 
 import asyncio
-import json
 import logging
 from datetime import datetime
 import redis.asyncio as redis
 
-from core.treasury import Treasury     # للحصول على عملاء النظام ومفاتيحهم
-from settings.settings_manager import SettingsManager  # لأخذ allocation
+from core.roster import ClientRoster   # العملاء + allocation في الذاكرة (HORUS_CLIENT_UPDATES)
+from gate.instruments import InstrumentRegistry   # min notional (cache الـ Gate على القرص)
+from core.dispatcher import KeyedDispatcher   # معالجة متوازية للإشارات
+from core.bus import Bus   # pub/sub أو Redis Streams
+from core.log_writer import LogWriter   # signals / system_logs (كتابة مجمّعة)
+from core.tracing import Tracer   # latency spans (trace من Eye)
+from core.dedup import DedupCache   # إشارة مكررة → تُتجاهل قبل أي حساب
 # يمكن لاحقاً إضافة دوال حساب Equity لو تحب
 
 log = logging.getLogger("Brain")
@@ -35,11 +39,34 @@ class BrainEngine:
     def __init__(self):
         self.redis_url = "redis://localhost:6379"
         self.r = None
+        self.bus = None
+        self.logs = LogWriter()
+        self.tracer = Tracer("brain")
+        self.dedup = DedupCache("brain")
+        self.roster = ClientRoster()
+        self.instruments = InstrumentRegistry()
     
     async def connect(self):
         self.r = await redis.from_url(self.redis_url, decode_responses=True)
+        self.bus = Bus(self.r)
+        self.dedup.r = self.r
         log.info("🧠 Brain Connected to Redis")
 
+    def min_notional(self, asset):
+        """
+        { exchange: أقل قيمة أمر USD } — عميل أقل من الحد لا يدخل الـ packet
+        """
+        out = {}
+        for ex, sym in (
+            ("okx", asset.replace("/", "-")),
+            ("binance", asset.replace("/", "")),
+            ("bybit", asset.replace("/", "")),
+        ):
+            info = self.instruments.get(ex, sym.upper())
+            if info:
+                out[ex] = info["min_notional"]
+        return out
+
     # ============================================================
     # RECEIVE SIGNAL FROM CAPTAIN or UI
     # ============================================================
@@ -54,45 +81,27 @@ class BrainEngine:
         }
         """
 
+        span = self.tracer.begin(signal.get("trace"), "brain", signal=signal["signal_id"])
+
         asset = signal["asset"]
         action = signal["action"]
         risk = signal.get("risk", "NORMAL").upper()
 
         log.info(f"\n🧠 BRAIN RECEIVED SIGNAL:\n{signal}")
 
-        # step 1 — احصل على كل العملاء النشطين
-        clients = Treasury.get_all_clients()
+        # العملة تدخل قائمة المراقبة في Market Data (tickers عبر WebSocket)
+        await self.r.sadd("HORUS_ACTIVE_SYMBOLS", asset.upper())
 
-        if not clients:
+        # step 1+2 — توزيع العملاء حسب البورصة (عمليات NumPy على الـ roster)
+        # usd = balance × allocation% — العملاء النشطون فوق min notional فقط
+        per_exchange, total_demand = self.roster.demand(self.min_notional(asset))
+
+        if not per_exchange:
             log.warning("⚠️ No clients registered. Aborting signal.")
             return
 
-        # step 2 — نوزع العملاء حسب البورصة
-        per_exchange = {
-            "okx": {},
-            "binance": {},
-            "bybit": {}
-        }
-
-        total_demand = 0
-
-        for client_id, info in clients.items():
-            ex = info["exchange"].lower()
-            allocation = SettingsManager.get_allocation(client_id)  # نسبة الدخول
-            balance = info.get("balance_usdt", 0)
-
-            usd_to_use = balance * (allocation / 100)
-            if usd_to_use <= 0:
-                continue
-
-            per_exchange[ex][client_id] = usd_to_use
-            total_demand += usd_to_use
-
         log.info(f"💰 Total Expected Demand = {total_demand}")
 
-        # clean empty exchanges
-        per_exchange = {k: v for k, v in per_exchange.items() if v}
-
         # ============================================================
         # CASE 1: Normal signal — direct fleet execution
         # ============================================================
@@ -107,7 +116,10 @@ class BrainEngine:
                 "timestamp": datetime.utcnow().timestamp()
             }
 
-            await self.r.publish("NEXUS_FLEET_COMMAND", json.dumps(packet))
+            packet["trace"] = span.context()
+            await self.bus.publish("NEXUS_FLEET_COMMAND", packet)
+            self.tracer.end(span, risk="NORMAL")
+            self.logs.signal(signal["signal_id"], asset, action, "NORMAL", signal.get("source"))
             log.info("📤 NORMAL Signal Dispatched to Fleet Executor")
             return
 
@@ -131,7 +143,9 @@ class BrainEngine:
                 "timestamp": datetime.utcnow().timestamp()
             }
 
-            await self.r.publish("HORUS_SMART_ENTRY", json.dumps(packet))
+            packet["trace"] = span.context()
+            await self.bus.publish("HORUS_SMART_ENTRY", packet)
+            self.tracer.end(span, risk="RISKY")
             log.info("⚡ RISKY Signal Sent to Smart Entry Engine")
             return
 
@@ -145,22 +159,47 @@ class BrainEngine:
 async def run_brain():
     brain = BrainEngine()
     await brain.connect()
+    await brain.roster.start(brain.r)
+    if not brain.instruments.load_disk():
+        log.warning("⚠️ No instruments cache on disk — min notional filter disabled")
+    await brain.logs.start()
+    await brain.tracer.start()
+    logging.getLogger().addHandler(brain.logs.handler("Brain"))
+
+    async def handle(msg):
+        sid = msg.data.get("signal_id")
+        if sid and not await brain.dedup.first(sid):
+            log.info(f"♻️ Duplicate signal ignored | {sid}")
+            await msg.ack()
+            return
+        try:
+            await brain.handle_signal(msg.data)
+        except Exception:
+            if sid:
+                await brain.dedup.forget(sid)   # إعادة التسليم تعيد المحاولة
+            raise
+        await msg.ack()   # streams: ack فقط بعد إرسال الـ packet
 
-    # Brain listens for new captain signals
-    subscriber = brain.r.pubsub()
-    await subscriber.subscribe("HORUS_CAPTAIN_SIGNALS")
+    # إشارات العملات المختلفة بالتوازي — نفس العملة بالترتيب
+    dispatcher = KeyedDispatcher(handle, "Brain")
+    metrics = asyncio.create_task(brain.bus.publish_metrics(["HORUS_CAPTAIN_SIGNALS"]))
 
     log.info("🧠 Brain Engine ONLINE — Listening for signals...")
 
-    async for message in subscriber.listen():
-        if message["type"] != "message":
-            continue
-
-        try:
-            signal = json.loads(message["data"])
-            await brain.handle_signal(signal)
-        except Exception as e:
-            log.error(f"❌ Brain failed processing signal: {e}")
+    try:
+        # Brain listens for new captain signals
+        async for msg in brain.bus.consume(["HORUS_CAPTAIN_SIGNALS"], "brain"):
+            try:
+                signal = msg.data
+                await dispatcher.submit(signal.get("asset", signal.get("signal_id")), msg)
+            except Exception as e:
+                log.error(f"❌ Brain failed processing signal: {e}")
+    finally:
+        metrics.cancel()
+        await dispatcher.close()
+        await brain.roster.stop()
+        await brain.tracer.stop()
+        await brain.logs.stop()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,245 @@
+# ================================================================
+#  HORUS BUS — Pub/Sub or Redis Streams (consumer groups)
+# ================================================================
+#  القنوات بين الخدمات:
+#       HORUS_CAPTAIN_SIGNALS   Eye   → Brain
+#       HORUS_SMART_ENTRY       Brain → SmartEntry
+#       NEXUS_FLEET_COMMAND     Brain / SmartEntry → FleetExecutor
+#
+#  HORUS_BUS=pubsub   (افتراضي) — نفس السلوك القديم
+#  HORUS_BUS=streams  — Redis Streams:
+#       • XADD بدل PUBLISH (الرسائل تبقى لو الخدمة متوقفة)
+#       • consumer group لكل خدمة → عدة workers يتقاسمون الحمل
+#       • XACK بعد المعالجة فقط — رسالة بدون ack تعود بعد reclaim_idle
+#       • بعد MAX_DELIVERIES محاولة → HORUS_BUS_DLQ:<stream> + ack
+#       • lag / pending لكل group في Redis hash: HORUS_BUS_METRICS
+#
+#  HORUS_CLIENT_UPDATES يبقى pub/sub (broadcast لكل النسخ)
+# ================================================================
+
+import asyncio
+import json
+import logging
+import os
+import socket
+import time
+
+log = logging.getLogger("Bus")
+
+BUS_MODE = os.getenv("HORUS_BUS", "pubsub").lower()
+BUS_MAXLEN = int(os.getenv("HORUS_BUS_MAXLEN", "100000"))
+
+METRICS_KEY = "HORUS_BUS_METRICS"
+DLQ_PREFIX = "HORUS_BUS_DLQ:"
+MAX_DELIVERIES = 5
+
+CONSUMER_NAME = os.getenv("HORUS_CONSUMER") or f"{socket.gethostname()}:{os.getpid()}"
+
+
+class Message:
+
+    def __init__(self, bus, channel, data, msg_id=None, group=None):
+        self.bus = bus
+        self.channel = channel
+        self.data = data
+        self.id = msg_id
+        self.group = group
+
+    async def ack(self):
+        if self.id is not None:
+            self.release()
+            await self.bus.r.xack(self.channel, self.group, self.id)
+
+    def release(self):
+        """
+        انتهت المعالجة محلياً (نجاح أو فشل) — بدون ack تصبح قابلة للـ reclaim
+        """
+        if self.id is not None:
+            self.bus.inflight.discard((self.channel, self.id))
+
+
+class Bus:
+
+    def __init__(self, r, mode=BUS_MODE, maxlen=BUS_MAXLEN,
+                 block_ms=1000, batch=100, reclaim_idle_ms=30000, reclaim_every=10):
+        self.r = r
+        self.mode = mode
+        self.maxlen = maxlen
+        self.block_ms = block_ms
+        self.batch = batch
+        self.reclaim_idle_ms = reclaim_idle_ms
+        self.reclaim_every = reclaim_every
+        self.inflight = set()     # (stream, msg_id) سُلّمت للمعالج ولم تنتهِ بعد
+
+    @property
+    def streams(self):
+        return self.mode == "streams"
+
+    # ------------------------------------------------------------
+    # PUBLISH
+    # ------------------------------------------------------------
+
+    async def publish(self, channel, payload):
+        data = json.dumps(payload)
+        if self.streams:
+            await self.r.xadd(channel, {"data": data}, maxlen=self.maxlen, approximate=True)
+        else:
+            await self.r.publish(channel, data)
+
+    # ------------------------------------------------------------
+    # CONSUME
+    # ------------------------------------------------------------
+
+    async def consume(self, channels, group, consumer=CONSUMER_NAME):
+        """
+        async generator → Message
+        على المستدعي استدعاء msg.ack() بعد نجاح المعالجة (streams فقط)
+        """
+        if not self.streams:
+            sub = self.r.pubsub()
+            await sub.subscribe(*channels)
+            async for m in sub.listen():
+                if m["type"] != "message":
+                    continue
+                data = self._decode(m["channel"], m["data"])
+                if data is not None:
+                    yield Message(self, m["channel"], data)
+            return
+
+        for ch in channels:
+            await self._ensure_group(ch, group)
+
+        log.info(f"📬 Streams consumer {consumer} | group={group} | {list(channels)}")
+
+        # أولاً: رسائلنا المعلّقة من تشغيل سابق (نفس اسم الـ consumer) ثم الجديد
+        #   cursor يتقدم لآخر id مقروء — ">" فقط عندما يعود الـ backlog فارغاً
+        cursor = {ch: "0" for ch in channels}
+        last_reclaim = time.monotonic()
+
+        while True:
+            if time.monotonic() - last_reclaim >= self.reclaim_every:
+                last_reclaim = time.monotonic()
+                for msg in await self._reclaim(channels, group, consumer):
+                    yield msg
+
+            backlog = any(c != ">" for c in cursor.values())
+            res = await self.r.xreadgroup(
+                group, consumer, cursor, count=self.batch,
+                block=None if backlog else self.block_ms
+            )
+
+            for stream, entries in res or []:
+                if cursor[stream] != ">":
+                    # انتهى الـ backlog الخاص بنا / أو نكمل بعد آخر id
+                    cursor[stream] = entries[-1][0] if entries else ">"
+                for msg_id, fields in entries:
+                    msg = await self._message(stream, msg_id, fields, group)
+                    if msg is not None:
+                        yield msg
+
+    def _decode(self, channel, raw):
+        try:
+            return json.loads(raw)
+        except (TypeError, ValueError):
+            log.error(f"❌ Bad payload on {channel}: {raw!r}")
+            return None
+
+    async def _message(self, stream, msg_id, fields, group):
+        if not fields:
+            # حُذفت بالـ MAXLEN وهي معلّقة
+            await self.r.xack(stream, group, msg_id)
+            return None
+
+        data = self._decode(stream, fields.get("data"))
+        if data is None:
+            await self.r.xack(stream, group, msg_id)
+            return None
+        self.inflight.add((stream, msg_id))
+        return Message(self, stream, data, msg_id, group)
+
+    async def _ensure_group(self, stream, group):
+        try:
+            await self.r.xgroup_create(stream, group, id="$", mkstream=True)
+            log.info(f"📬 Created consumer group {group} on {stream}")
+        except Exception as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    async def drop_group(self, stream, group):
+        """
+        حذف consumer group (مستهلك لن يعود) — معلّقاته لا تُنقل لأحد
+        """
+        if not self.streams:
+            return
+        if await self.r.xgroup_destroy(stream, group):
+            log.info(f"🧹 Dropped consumer group {group} on {stream}")
+
+    async def _reclaim(self, channels, group, consumer):
+        """
+        رسائل معلّقة عند consumer آخر (مات / علق) أكثر من reclaim_idle_ms → نأخذها
+        رسائلنا التي ما زالت قيد المعالجة محلياً (معالج بطيء) لا تُلمس
+        """
+        out = []
+        for stream in channels:
+            pending = await self.r.xpending_range(
+                stream, group, min="-", max="+", count=self.batch, idle=self.reclaim_idle_ms
+            )
+            pending = [p for p in pending if (stream, p["message_id"]) not in self.inflight]
+            if not pending:
+                continue
+
+            dead = [p["message_id"] for p in pending if p["times_delivered"] >= MAX_DELIVERIES]
+            retry = [p["message_id"] for p in pending if p["times_delivered"] < MAX_DELIVERIES]
+
+            if dead:
+                for msg_id, fields in await self.r.xrange(stream, min=dead[0], max=dead[-1]):
+                    if msg_id in dead:
+                        await self.r.xadd(DLQ_PREFIX + stream, dict(fields, origin=msg_id), maxlen=self.maxlen)
+                await self.r.xack(stream, group, *dead)
+                log.error(f"☠️ {len(dead)} messages on {stream} exceeded {MAX_DELIVERIES} deliveries → DLQ")
+
+            if retry:
+                claimed = await self.r.xclaim(stream, group, consumer, self.reclaim_idle_ms, retry)
+                log.warning(f"♻️ Reclaimed {len(claimed)} pending messages on {stream}")
+                for msg_id, fields in claimed:
+                    msg = await self._message(stream, msg_id, fields, group)
+                    if msg is not None:
+                        out.append(msg)
+        return out
+
+    # ------------------------------------------------------------
+    # METRICS
+    # ------------------------------------------------------------
+
+    async def lag(self, channels):
+        """
+        {"stream:group": {"pending": n, "lag": n, "consumers": n}}
+        """
+        out = {}
+        for stream in channels:
+            try:
+                groups = await self.r.xinfo_groups(stream)
+            except Exception:
+                continue
+            for g in groups:
+                out[f"{stream}:{g['name']}"] = {
+                    "pending": g.get("pending", 0),
+                    "lag": g.get("lag"),           # Redis ≥ 7
+                    "consumers": g.get("consumers", 0),
+                }
+        return out
+
+    async def publish_metrics(self, channels, every=10):
+        if not self.streams:
+            return
+        while True:
+            await asyncio.sleep(every)
+            try:
+                stats = await self.lag(channels)
+                if stats:
+                    await self.r.hset(METRICS_KEY, mapping={k: json.dumps(v) for k, v in stats.items()})
+                    backlog = {k: v["lag"] for k, v in stats.items() if v["lag"]}
+                    if backlog:
+                        log.warning(f"📈 Consumer lag: {backlog}")
+            except Exception as e:
+                log.error(f"❌ Bus metrics failed: {e}")
@@ -0,0 +1,135 @@
+# ================================================================
+#  HORUS CLOCK — Exchange clock-offset synchronization
+# ================================================================
+#  كل طلب موقّع يحمل timestamp، وأي فرق بين ساعة السيرفر وساعة البورصة
+#  يسبب رفض الأمر (timestamp outside recvWindow) وضياع محاولة كاملة.
+#
+#  • مزامنة دورية مع server-time لكل بورصة
+#  • offset = server - منتصف الـ RTT  (أفضل عينة = أقل RTT)
+#  • تنعيم EWMA + تحذير عند drift كبير
+#  • sync(force=True) بعد رفض timestamp من البورصة: الـ offset = أفضل عينة
+#    مباشرة (بدون EWMA — alpha=0.3 يحتاج عدة دورات، والأوامر تُرفض بينها)
+#  • كل الموقّعين في gate.py و okx_sign في eye.py يأخذون الوقت من هنا
+# ================================================================
+
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime, timezone
+
+import aiohttp
+
+from core.endpoints import endpoint
+
+log = logging.getLogger("Clock")
+
+# نافذة قبول الـ timestamp (ms) — صغيرة لأن الساعة متزامنة مع البورصة
+# (Binance recvWindow / Bybit X-BAPI-RECV-WINDOW — مشتركة بين REST و WS)
+RECV_WINDOW = int(os.getenv("HORUS_RECV_WINDOW", "2000"))
+
+SERVER_TIME = {
+    "okx": (endpoint("okx") + "/api/v5/public/time", lambda js: int(js["data"][0]["ts"])),
+    "binance": (endpoint("binance") + "/api/v3/time", lambda js: int(js["serverTime"])),
+    "bybit": (endpoint("bybit") + "/v5/market/time", lambda js: int(js["time"])),
+}
+
+
+class ExchangeClock:
+
+    def __init__(self, interval=30, samples=3, alpha=0.3, drift_warn_ms=250):
+        self.interval = interval
+        self.samples = samples
+        self.alpha = alpha
+        self.drift_warn_ms = drift_warn_ms
+        self.offsets = {}     # ms — ساعة البورصة - ساعتنا
+        self.rtts = {}        # ms — أفضل RTT في آخر مزامنة
+        self._task = None
+
+    # ------------------------------------------------------------
+    # TIME
+    # ------------------------------------------------------------
+
+    def now_ms(self, exchange):
+        return int(time.time() * 1000 + self.offsets.get(exchange, 0))
+
+    def now(self, exchange):
+        return self.now_ms(exchange) / 1000
+
+    def iso(self, exchange):
+        """
+        صيغة OKX REST: 2020-12-08T09:08:57.715Z
+        """
+        dt = datetime.fromtimestamp(self.now(exchange), tz=timezone.utc)
+        return dt.strftime("%Y-%m-%dT%H:%M:%S.") + f"{dt.microsecond // 1000:03d}Z"
+
+    # ------------------------------------------------------------
+    # SYNC
+    # ------------------------------------------------------------
+
+    async def _sample(self, session, exchange):
+        url, parse = SERVER_TIME[exchange]
+
+        t0 = time.time() * 1000
+        async with session.get(url) as r:
+            js = await r.json(content_type=None)
+        t1 = time.time() * 1000
+
+        return parse(js) - (t0 + t1) / 2, t1 - t0
+
+    async def sync(self, exchange, session=None, force=False):
+        """
+        force: الساعة ثبت خطؤها (كود وقت من البورصة) → نقفز لأفضل عينة
+        """
+        own = session is None
+        if own:
+            session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=5))
+
+        try:
+            samples = [await self._sample(session, exchange) for _ in range(self.samples)]
+        finally:
+            if own:
+                await session.close()
+
+        offset, rtt = min(samples, key=lambda s: s[1])
+        self.rtts[exchange] = rtt
+
+        if exchange not in self.offsets or force:
+            if force and exchange in self.offsets:
+                log.warning(
+                    f"⏱️ {exchange} forced resync {self.offsets[exchange]:+.0f}ms → "
+                    f"{offset:+.0f}ms (rtt {rtt:.0f}ms)"
+                )
+            self.offsets[exchange] = offset
+        else:
+            drift = offset - self.offsets[exchange]
+            if abs(drift) > self.drift_warn_ms:
+                log.warning(f"⏱️ {exchange} clock drift {drift:.0f}ms (rtt {rtt:.0f}ms)")
+            self.offsets[exchange] += self.alpha * drift
+
+        return self.offsets[exchange]
+
+    async def sync_all(self, sessions=None, exchanges=tuple(SERVER_TIME)):
+        for ex in exchanges:
+            try:
+                await self.sync(ex, sessions.get(ex) if sessions else None)
+            except Exception as e:
+                log.error(f"❌ {ex} clock sync failed: {e}")
+
+    async def start(self, sessions=None, exchanges=tuple(SERVER_TIME)):
+        await self.sync_all(sessions, exchanges)
+        log.info("⏱️ Clock offsets (ms): " + " | ".join(
+            f"{ex}={off:+.0f}" for ex, off in self.offsets.items()
+        ))
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop(sessions, exchanges))
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _loop(self, sessions, exchanges):
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.sync_all(sessions, exchanges)
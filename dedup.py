@@ -0,0 +1,77 @@
+# ================================================================
+#  HORUS DEDUP — Signal idempotency (in-process LRU + Redis SET NX)
+# ================================================================
+#  نفس الإشارة ممكن توصل أكثر من مرة:
+#       • Eye يرسل signal لكل order update (partial fills → نفس captain_{ordId})
+#       • Streams يعيد تسليم رسالة بدون ack (reclaim)
+#       • Brain ينشر مرتين بعد إعادة تشغيل
+#
+#  first(key) → True أول مرة فقط:
+#       1) LRU داخل العملية        — O(1) بدون شبكة (أغلب التكرارات)
+#       2) Redis SET NX EX ttl      — مشترك بين كل نسخ نفس الخدمة
+#
+#  namespace لكل مستهلك: brain / fleet:<shard>
+#  (كل shard يحتاج نفس الـ packet — لا يمنع أحدهم الآخر)
+#
+#  فشل المعالجة → forget(key) ليُعاد التنفيذ عند إعادة التسليم
+#  Redis غير متاح → نكمل بالـ LRU فقط (client order id يحمي البورصة)
+# ================================================================
+
+import logging
+import os
+from collections import OrderedDict
+
+log = logging.getLogger("Dedup")
+
+DEDUP_TTL = int(os.getenv("HORUS_DEDUP_TTL", "86400"))
+DEDUP_LRU_SIZE = int(os.getenv("HORUS_DEDUP_LRU", "50000"))
+
+KEY_PREFIX = "HORUS_SEEN:"
+
+
+class DedupCache:
+
+    def __init__(self, namespace, r=None, ttl=DEDUP_TTL, size=DEDUP_LRU_SIZE):
+        self.namespace = namespace
+        self.r = r
+        self.ttl = ttl
+        self.size = size
+        self.seen = OrderedDict()
+        self.duplicates = 0
+
+    def _key(self, key):
+        return f"{KEY_PREFIX}{self.namespace}:{key}"
+
+    def _remember(self, key):
+        self.seen[key] = True
+        if len(self.seen) > self.size:
+            self.seen.popitem(last=False)
+
+    async def first(self, key):
+        """
+        True = أول مرة (نفّذ) / False = مكرر (تجاهل)
+        """
+        if key in self.seen:
+            self.seen.move_to_end(key)
+            self.duplicates += 1
+            return False
+
+        fresh = True
+        if self.r is not None:
+            try:
+                fresh = bool(await self.r.set(self._key(key), 1, nx=True, ex=self.ttl))
+            except Exception as e:
+                log.error(f"❌ Dedup Redis check failed ({self.namespace}) — LRU only: {e}")
+
+        self._remember(key)
+        if not fresh:
+            self.duplicates += 1
+        return fresh
+
+    async def forget(self, key):
+        self.seen.pop(key, None)
+        if self.r is not None:
+            try:
+                await self.r.delete(self._key(key))
+            except Exception as e:
+                log.error(f"❌ Dedup release failed ({self.namespace}) [{key}]: {e}")
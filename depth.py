@@ -0,0 +1,419 @@
+# ================================================================
+#  HORUS DEPTH — Streaming L2 order books (snapshot + diff)
+# ================================================================
+#  بدل 3 طلبات REST (40 مستوى) لكل إشارة RISKY، SmartEntryEngine يحمل
+#  نسخة حيّة من الـ order book لكل عملة مراقبة:
+#
+#       • OKX      → books (400 مستوى)   snapshot + update
+#                    فحص: prevSeqId == آخر seqId
+#       • Binance  → <symbol>@depth@100ms + REST snapshot (limit=1000)
+#                    فحص: U ≤ lastUpdateId+1 ≤ u ثم U == u السابق + 1
+#       • Bybit    → orderbook.200.<symbol>   snapshot + delta
+#                    فحص: u == u السابق + 1
+#
+#  فجوة في التسلسل → الكتاب يُعلَّم غير متزامن + resync
+#  (OKX / Bybit: إعادة الاشتراك، Binance: snapshot جديد مع تخزين الـ diffs)
+#
+#  القراءة: levels(exchange, symbol, side) → [(price, qty), ...] من الذاكرة
+#  None = الكتاب غير جاهز / قديم → المستدعي يرجع لـ REST
+#
+#  العملات المراقبة: HORUS_WATCH_SYMBOLS + HORUS_ACTIVE_SYMBOLS (مثل MarketData)
+#  + أي عملة تطلبها watch() (أول إشارة لعملة جديدة تذهب لـ REST)
+#
+#  الاتصالات مجموعات عملات (group → اتصال لكل بورصة):
+#       عملات جديدة → مجموعة جديدة فقط — الاتصالات القائمة وكتبها لا تُلمس
+#       عملة حُذفت  → إعادة تشغيل مجموعتها فقط (بالعملات الباقية)
+# ================================================================
+
+import asyncio
+import json
+import logging
+import os
+import time
+from bisect import bisect_left, insort
+
+import aiohttp
+import websockets
+
+from core.endpoints import endpoint
+from core.market_data import native_symbol, ACTIVE_SYMBOLS_KEY
+
+log = logging.getLogger("Depth")
+
+BOOK_MAX_AGE = float(os.getenv("HORUS_BOOK_MAX_AGE", "30"))
+WATCH_SYMBOLS = [s.strip() for s in os.getenv("HORUS_WATCH_SYMBOLS", "").split(",") if s.strip()]
+
+OKX_PUBLIC_WS = endpoint("okx", "ws_public")
+BINANCE_WS = endpoint("binance", "ws_public")
+BYBIT_SPOT_WS = endpoint("bybit", "ws_public")
+
+BINANCE_SNAPSHOT_LIMIT = 1000
+BYBIT_DEPTH = 200
+
+EXCHANGES = ("okx", "binance", "bybit")
+
+
+# ================================================================
+# L2 BOOK
+# ================================================================
+
+class L2Book:
+    """
+    price → qty لكل جانب + فهرس أسعار مرتب (bisect)
+        asks تصاعدي، bids مخزنة بالسالب (أفضل سعر أولاً في الحالتين)
+    levels() محفوظة حتى التحديث التالي (version)
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.bids, self.asks = {}, {}
+        self._bid_px, self._ask_px = [], []
+        self.seq = None
+        self.ts = 0.0
+        self.synced = False
+        self.pending = []          # Binance: diffs قبل وصول الـ snapshot
+        self._cache = {}
+
+    def reset(self, bids, asks, seq):
+        self.bids = {float(l[0]): float(l[1]) for l in bids if float(l[1])}
+        self.asks = {float(l[0]): float(l[1]) for l in asks if float(l[1])}
+        self._bid_px = sorted(-p for p in self.bids)
+        self._ask_px = sorted(self.asks)
+        self.seq = seq
+        self.synced = True
+        self._touch()
+
+    def update(self, bids, asks, seq):
+        for l in bids:
+            self._level(self.bids, self._bid_px, float(l[0]), float(l[1]), -1)
+        for l in asks:
+            self._level(self.asks, self._ask_px, float(l[0]), float(l[1]), 1)
+        self.seq = seq
+        self._touch()
+
+    def _level(self, levels, index, price, qty, sign):
+        key = sign * price
+        if qty == 0:
+            if levels.pop(price, None) is not None:
+                del index[bisect_left(index, key)]
+        else:
+            if price not in levels:
+                insort(index, key)
+            levels[price] = qty
+
+    def _touch(self):
+        self.ts = time.time()
+        self._cache = {}
+
+    def levels(self, side, depth=None):
+        cached = self._cache.get((side, depth))
+        if cached is not None:
+            return cached
+        if side == "asks":
+            out = [(p, self.asks[p]) for p in self._ask_px[:depth]]
+        else:
+            out = [(-k, self.bids[-k]) for k in self._bid_px[:depth]]
+        self._cache[(side, depth)] = out
+        return out
+
+
+# ================================================================
+# DEPTH STREAMS
+# ================================================================
+
+class DepthStreams:
+
+    def __init__(self, symbols=WATCH_SYMBOLS, max_age=BOOK_MAX_AGE, refresh_every=10):
+        self.symbols = {s.upper() for s in symbols}
+        self.max_age = max_age
+        self.refresh_every = refresh_every
+        self.books = {}            # (exchange, "BTC/USDT") → L2Book
+        self.resyncs = {ex: 0 for ex in EXCHANGES}
+        self.r = None
+        self.session = None
+        self._wanted = set()
+        self._groups = {}          # frozenset(symbols) → [task لكل بورصة]
+        self._supervisor = None
+
+    # ------------------------------------------------------------
+    # READ (hot path)
+    # ------------------------------------------------------------
+
+    def book(self, exchange, symbol):
+        b = self.books.get((exchange, symbol.upper()))
+        if b is None or not b.synced or time.time() - b.ts > self.max_age:
+            return None
+        return b
+
+    def levels(self, exchange, symbol, side="asks", depth=None):
+        b = self.book(exchange, symbol)
+        return None if b is None else b.levels(side, depth)
+
+    def watch(self, symbol):
+        """
+        عملة جديدة → الاشتراك في الدورة التالية للـ supervisor
+        """
+        self._wanted.add(symbol.upper())
+
+    # ------------------------------------------------------------
+    # LIFECYCLE
+    # ------------------------------------------------------------
+
+    async def start(self, r=None):
+        self.r = r
+        self.session = aiohttp.ClientSession()
+        if self._supervisor is None:
+            self._supervisor = asyncio.create_task(self._supervise())
+
+    async def stop(self):
+        if self._supervisor is not None:
+            self._supervisor.cancel()
+            self._supervisor = None
+        for tasks in self._groups.values():
+            for t in tasks:
+                t.cancel()
+        self._groups = {}
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def _watched(self):
+        symbols = self.symbols | self._wanted
+        if self.r is not None:
+            try:
+                symbols |= {s.upper() for s in await self.r.smembers(ACTIVE_SYMBOLS_KEY)}
+            except Exception as e:
+                log.error(f"❌ Active symbols read failed: {e}")
+        return symbols
+
+    async def _supervise(self):
+        while True:
+            symbols = await self._watched()
+            watching = set().union(*self._groups) if self._groups else set()
+
+            removed = watching - symbols
+            added = symbols - watching
+
+            # مجموعات فيها عملة محذوفة → إعادة تشغيلها بالباقي فقط
+            for group in [g for g in self._groups if g & removed]:
+                for t in self._groups.pop(group):
+                    t.cancel()
+                if group - removed:
+                    self._start_group(group - removed)
+            for key in [k for k in self.books if k[1] in removed]:
+                del self.books[key]
+
+            if added:
+                self._start_group(added)
+
+            if added or removed:
+                log.info(
+                    f"📚 Depth streams | +{sorted(added)} -{sorted(removed)} "
+                    f"| {len(self._groups)} group(s), {len(symbols)} symbols"
+                )
+
+            await asyncio.sleep(self.refresh_every)
+
+    def _start_group(self, symbols):
+        ordered = sorted(symbols)
+        self._groups[frozenset(symbols)] = [
+            asyncio.create_task(self._keep_alive("okx", self.stream_okx, ordered)),
+            asyncio.create_task(self._keep_alive("binance", self.stream_binance, ordered)),
+            asyncio.create_task(self._keep_alive("bybit", self.stream_bybit, ordered)),
+        ]
+
+    async def _keep_alive(self, name, stream, symbols):
+        while True:
+            try:
+                await stream(symbols)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log.error(f"❌ {name} depth stream error: {e}")
+            finally:
+                # الاتصال انقطع → كتب هذه المجموعة على هذه البورصة لم تعد موثوقة
+                for s in symbols:
+                    b = self.books.get((name, s))
+                    if b is not None:
+                        b.clear()
+            log.info(f"🔄 {name}: depth reconnecting in 3 seconds...")
+            await asyncio.sleep(3)
+
+    def _book(self, exchange, symbol):
+        key = (exchange, symbol)
+        if key not in self.books:
+            self.books[key] = L2Book()
+        return self.books[key]
+
+    def _gap(self, exchange, symbol, detail):
+        self.resyncs[exchange] += 1
+        self.books[(exchange, symbol)].clear()
+        log.warning(f"⚠️ {exchange} {symbol} book gap ({detail}) → resync")
+
+    # ------------------------------------------------------------
+    # OKX
+    # ------------------------------------------------------------
+
+    async def stream_okx(self, symbols):
+        natives = {native_symbol("okx", s): s for s in symbols}
+
+        async with websockets.connect(OKX_PUBLIC_WS, ping_interval=20) as ws:
+            await ws.send(json.dumps({
+                "op": "subscribe",
+                "args": [{"channel": "books", "instId": inst} for inst in natives]
+            }))
+            log.info(f"📚 OKX books subscribed | {len(natives)} symbols")
+
+            async for msg in ws:
+                data = json.loads(msg)
+                arg = data.get("arg", {})
+                if arg.get("channel") != "books" or "data" not in data:
+                    continue
+
+                symbol = natives.get(arg.get("instId"))
+                if symbol is None:
+                    continue
+                book = self._book("okx", symbol)
+
+                for d in data["data"]:
+                    if data.get("action") == "snapshot":
+                        book.reset(d["bids"], d["asks"], d.get("seqId"))
+                        continue
+
+                    if not book.synced:
+                        continue
+                    if d.get("prevSeqId") != book.seq:
+                        self._gap("okx", symbol, f"prevSeqId {d.get('prevSeqId')} != {book.seq}")
+                        sub = [{"channel": "books", "instId": arg["instId"]}]
+                        await ws.send(json.dumps({"op": "unsubscribe", "args": sub}))
+                        await ws.send(json.dumps({"op": "subscribe", "args": sub}))
+                        break
+                    book.update(d["bids"], d["asks"], d.get("seqId"))
+
+    # ------------------------------------------------------------
+    # BINANCE
+    # ------------------------------------------------------------
+
+    async def _binance_snapshot(self, symbol):
+        book = self._book("binance", symbol)
+        url = f"{endpoint('binance')}/api/v3/depth?symbol={native_symbol('binance', symbol)}&limit={BINANCE_SNAPSHOT_LIMIT}"
+
+        async with self.session.get(url) as r:
+            js = await r.json(content_type=None)
+
+        last = js["lastUpdateId"]
+        book.reset(js["bids"], js["asks"], last)
+
+        # الـ diffs المخزنة أثناء انتظار الـ snapshot
+        pending, book.pending = book.pending, []
+        pending = [e for e in pending if e["u"] > last]
+        if pending and not pending[0]["U"] <= last + 1 <= pending[0]["u"]:
+            self._gap("binance", symbol, f"snapshot {last} / first diff {pending[0]['U']}")
+            return False
+        for e in pending:
+            self._binance_apply(symbol, book, e)
+        return True
+
+    def _binance_apply(self, symbol, book, e):
+        if e["u"] <= book.seq:
+            return True
+        if e["U"] != book.seq + 1 and not (e["U"] <= book.seq + 1 <= e["u"]):
+            self._gap("binance", symbol, f"U {e['U']} != {book.seq + 1}")
+            return False
+        book.update(e["b"], e["a"], e["u"])
+        return True
+
+    async def _binance_resync(self, symbol):
+        for _ in range(3):
+            try:
+                if await self._binance_snapshot(symbol):
+                    return
+            except Exception as e:
+                log.error(f"❌ Binance snapshot {symbol} failed: {e}")
+            await asyncio.sleep(1)
+
+    async def stream_binance(self, symbols):
+        natives = {native_symbol("binance", s): s for s in symbols}
+        streams = "/".join(f"{n.lower()}@depth@100ms" for n in natives)
+        resyncing = {}
+
+        async with websockets.connect(f"{BINANCE_WS}?streams={streams}", ping_interval=20) as ws:
+            log.info(f"📚 Binance depth subscribed | {len(natives)} symbols")
+
+            try:
+                async for msg in ws:
+                    e = json.loads(msg).get("data")
+                    if not e or e.get("e") != "depthUpdate":
+                        continue
+
+                    symbol = natives.get(e["s"])
+                    if symbol is None:
+                        continue
+                    book = self._book("binance", symbol)
+
+                    if book.synced and self._binance_apply(symbol, book, e):
+                        continue
+
+                    # غير متزامن → نخزن الـ diff ونطلب snapshot (مرة واحدة لكل عملة)
+                    book.pending.append(e)
+                    task = resyncing.get(symbol)
+                    if task is None or task.done():
+                        resyncing[symbol] = asyncio.create_task(self._binance_resync(symbol))
+            finally:
+                for task in resyncing.values():
+                    task.cancel()
+
+    # ------------------------------------------------------------
+    # BYBIT
+    # ------------------------------------------------------------
+
+    async def stream_bybit(self, symbols):
+        natives = {native_symbol("bybit", s): s for s in symbols}
+        topics = [f"orderbook.{BYBIT_DEPTH}.{n}" for n in natives]
+
+        async with websockets.connect(BYBIT_SPOT_WS, ping_interval=20) as ws:
+            # Bybit spot: حد أقصى 10 args لكل رسالة subscribe
+            for i in range(0, len(topics), 10):
+                await ws.send(json.dumps({"op": "subscribe", "args": topics[i:i + 10]}))
+            log.info(f"📚 Bybit books subscribed | {len(natives)} symbols")
+
+            async for msg in ws:
+                data = json.loads(msg)
+                topic = data.get("topic", "")
+                d = data.get("data")
+                if not topic.startswith("orderbook.") or not d:
+                    continue
+
+                symbol = natives.get(d.get("s"))
+                if symbol is None:
+                    continue
+                book = self._book("bybit", symbol)
+
+                # u == 1 = إعادة تشغيل خدمة Bybit → snapshot كامل
+                if data.get("type") == "snapshot" or d.get("u") == 1:
+                    book.reset(d.get("b", []), d.get("a", []), d.get("u"))
+                    continue
+
+                if not book.synced:
+                    continue
+                if d.get("u") != book.seq + 1:
+                    self._gap("bybit", symbol, f"u {d.get('u')} != {book.seq + 1}")
+                    await ws.send(json.dumps({"op": "unsubscribe", "args": [topic]}))
+                    await ws.send(json.dumps({"op": "subscribe", "args": [topic]}))
+                    continue
+                book.update(d.get("b", []), d.get("a", []), d.get("u"))
+
+    # ------------------------------------------------------------
+
+    def stats(self):
+        now = time.time()
+        return {
+            "books": {
+                f"{ex}:{s}": {"synced": b.synced, "age": round(now - b.ts, 2) if b.ts else None,
+                              "bids": len(b.bids), "asks": len(b.asks)}
+                for (ex, s), b in self.books.items()
+            },
+            "resyncs": dict(self.resyncs),
+        }
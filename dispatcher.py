@@ -0,0 +1,88 @@
+# ================================================================
+#  HORUS DISPATCHER — Keyed concurrent packet processing
+# ================================================================
+#  مشترك بين حلقات Redis في:
+#       • FleetExecutor.listen
+#       • run_brain
+#       • run_engine (SmartEntry)
+#
+#  • packets بمفاتيح مختلفة (عملة / إشارة) تُعالج بالتوازي
+#  • packets بنفس المفتاح تبقى بالترتيب (كل واحدة تنتظر السابقة)
+#  • حد أقصى للـ packets قيد المعالجة — عند الامتلاء submit ينتظر،
+#    فتتوقف حلقة القراءة من Redis (backpressure) بدل تراكم المهام
+# ================================================================
+
+import asyncio
+import logging
+import os
+
+log = logging.getLogger("Dispatcher")
+
+DISPATCH_MAX_IN_FLIGHT = int(os.getenv("HORUS_DISPATCH_MAX_IN_FLIGHT", "64"))
+
+
+class KeyedDispatcher:
+
+    def __init__(self, handler, name="dispatcher", max_in_flight=DISPATCH_MAX_IN_FLIGHT):
+        self.handler = handler            # async handler(packet)
+        self.name = name
+        self.max_in_flight = max_in_flight
+        self._slots = asyncio.Semaphore(max_in_flight)
+        self._tails = {}                  # key → آخر task لهذا المفتاح
+        self.in_flight = 0
+        self._paused = False
+
+    async def submit(self, key, packet):
+        """
+        ينتظر (لا يرفض) لو وصلنا لحد max_in_flight
+        """
+        if self._slots.locked() and not self._paused:
+            self._paused = True
+            log.warning(f"⏸️ {self.name}: {self.in_flight} packets in flight — pausing reads")
+
+        await self._slots.acquire()
+        self.in_flight += 1
+
+        prev = self._tails.get(key)
+        task = asyncio.create_task(self._run(key, packet, prev))
+        self._tails[key] = task
+        return task
+
+    async def _run(self, key, packet, prev):
+        try:
+            if prev is not None:
+                # الترتيب فقط — فشل السابق لا يوقف التالي
+                await asyncio.wait({prev})
+            await self.handler(packet)
+
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            log.error(f"❌ {self.name} failed processing [{key}]: {e}", exc_info=True)
+
+        finally:
+            # streams: رسالة بدون ack تعود متاحة للـ reclaim
+            release = getattr(packet, "release", None)
+            if release is not None:
+                release()
+            self.in_flight -= 1
+            self._slots.release()
+            if self._paused and self.in_flight < self.max_in_flight // 2:
+                self._paused = False
+                log.info(f"▶️ {self.name}: backlog drained — reading again")
+            if self._tails.get(key) is asyncio.current_task():
+                del self._tails[key]
+
+    # ------------------------------------------------------------
+
+    def stats(self):
+        return {"in_flight": self.in_flight, "keys": len(self._tails), "max_in_flight": self.max_in_flight}
+
+    async def drain(self):
+        while self._tails:
+            await asyncio.wait(set(self._tails.values()))
+
+    async def close(self):
+        for task in self._tails.values():
+            task.cancel()
+        self._tails.clear()
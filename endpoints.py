@@ -0,0 +1,46 @@
+# ================================================================
+#  HORUS ENDPOINTS — Exchange base URLs (real / mock)
+# ================================================================
+#  كل عناوين البورصات (REST + WebSocket) في مكان واحد.
+#
+#  HORUS_MOCK_EXCHANGE="127.0.0.1:8900"
+#       → كل الخدمات (Gate / Eye / SmartEntry / MarketData) تتصل بـ
+#         mock_exchange.py بدل البورصات الحقيقية (benchmarks محلية)
+#
+#  الـ mock يخدم البورصات الثلاث على منفذ واحد مع prefix:
+#       http://host/okx/api/v5/...      ws://host/okx/ws/private
+# ================================================================
+
+import os
+
+MOCK_EXCHANGE = os.getenv("HORUS_MOCK_EXCHANGE", "").strip()
+
+REAL = {
+    "okx": {
+        "rest": "https://www.okx.com",
+        "ws_public": "wss://ws.okx.com:8443/ws/v5/public",
+        "ws_private": "wss://ws.okx.com:8443/ws/v5/private",   # orders channel + order entry
+    },
+    "binance": {
+        "rest": "https://api.binance.com",
+        "ws_public": "wss://stream.binance.com:9443/stream",
+        "ws_private": "wss://ws-api.binance.com:443/ws-api/v3",
+    },
+    "bybit": {
+        "rest": "https://api.bybit.com",
+        "ws_public": "wss://stream.bybit.com/v5/public/spot",
+        "ws_private": "wss://stream.bybit.com/v5/trade",
+    },
+}
+
+
+def endpoint(exchange, kind="rest"):
+    """
+    kind = rest | ws_public | ws_private
+    """
+    if not MOCK_EXCHANGE:
+        return REAL[exchange][kind]
+
+    if kind == "rest":
+        return f"http://{MOCK_EXCHANGE}/{exchange}"
+    return f"ws://{MOCK_EXCHANGE}/{exchange}/ws/{kind[3:]}"
@@ -6,25 +6,37 @@
 #
 #   • الحساب ينفّذ صفقة → OKX ترسل Fill event فوراً
 #   • Eye يستقبلها خلال أقل من 100ms
-#   • Eye يبني Signal جاهز
+#   • Eye يجمع الـ partial fills لنفس ordId (FillAggregator)
+#   • Eye يبني Signal واحد (الكمية المنفذة + VWAP)
 #   • يرسلها إلى Brain عبر HORUS_CAPTAIN_SIGNALS
 #
+#   HORUS_FILL_WINDOW  (ثواني، افتراضي 0.3) — نافذة التجميع من أول fill
+#   state == "filled" → الإرسال فوراً بدون انتظار النافذة
+#
 # ================================================================
 
 import asyncio
 import json
+import os
 import time
 import hmac
 import base64
 import logging
+from collections import OrderedDict
 import redis.asyncio as redis
 import websockets
 
 from core.treasury import Treasury
+from gate.clock import ExchangeClock   # وقت OKX الفعلي للتوقيع
+from core.endpoints import endpoint
+from core.bus import Bus   # pub/sub أو Redis Streams
+from core.tracing import Tracer   # بداية الـ trace (fill → exchange ack)
 
 log = logging.getLogger("EyeWS")
 
-OKX_WS_URL = "wss://ws.okx.com:8443/ws/v5/private"
+OKX_WS_URL = endpoint("okx", "ws_private")
+
+FILL_WINDOW = float(os.getenv("HORUS_FILL_WINDOW", "0.3"))
 
 
 # ------------------ SIGNATURE FUNCTION ------------------
@@ -36,6 +48,105 @@ def okx_sign(ts, method, path, body, secret):
     ).decode()
 
 
+# ================================================================
+# PARTIAL FILL AGGREGATION
+# ================================================================
+
+class FillAggregator:
+    """
+    fills لنفس ordId → إشارة واحدة:
+        • أول fill يبدأ نافذة window ثانية
+        • state == "filled" يغلق النافذة فوراً
+        • fills تصل بعد الإرسال (أمر ما زال يتنفذ) تُعد فقط — الإشارة خرجت
+    """
+
+    def __init__(self, emit, tracer, window=FILL_WINDOW, remember=10000):
+        self.emit = emit              # async emit(fill) ← fill مجمّع
+        self.tracer = tracer
+        self.window = window
+        self.remember = remember
+        self.pending = {}             # ordId → fill مجمّع
+        self.emitted = OrderedDict()  # ordId → عدد الـ fills المتأخرة
+        self.tasks = set()            # flush من مؤقت النافذة (مرجع حتى تنتهي)
+        self.raw = 0
+        self.signals = 0
+
+    async def add(self, order):
+        self.raw += 1
+        oid = order["ordId"]
+
+        if oid in self.emitted:
+            self.emitted[oid] += 1
+            log.info(f"🧩 Late fill for emitted order {oid} — coalesced ({self.emitted[oid]})")
+            return
+
+        agg = self.pending.get(oid)
+        if agg is None:
+            agg = self.pending[oid] = {
+                "ordId": oid,
+                "instId": order["instId"],
+                "side": order["side"],
+                "qty": 0.0,
+                "notional": 0.0,
+                "events": 0,
+                "span": self.tracer.begin(None, "eye"),
+                "timer": None,
+            }
+            if self.window > 0:
+                agg["timer"] = asyncio.get_running_loop().call_later(
+                    self.window, self._flush_later, oid
+                )
+
+        sz = float(order["fillSz"])
+        agg["qty"] += sz
+        agg["notional"] += sz * float(order["fillPx"])
+        agg["events"] += 1
+
+        # قيم OKX التراكمية (تشمل fills قبل الاشتراك / بعد إعادة الاتصال)
+        if order.get("accFillSz"):
+            agg["acc"] = float(order["accFillSz"])
+        if order.get("avgPx"):
+            agg["avg"] = float(order["avgPx"])
+
+        if order.get("state") == "filled" or self.window <= 0:
+            await self.flush(oid)
+
+    def _flush_later(self, oid):
+        task = asyncio.create_task(self.flush(oid))
+        self.tasks.add(task)
+        task.add_done_callback(self._flushed)
+
+    def _flushed(self, task):
+        self.tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            log.error(f"❌ Fill window flush failed: {task.exception()}")
+
+    async def flush(self, oid):
+        agg = self.pending.pop(oid, None)
+        if agg is None:
+            return
+        if agg["timer"] is not None:
+            agg["timer"].cancel()
+
+        agg["size"] = agg.get("acc") or agg["qty"]
+        agg["vwap"] = agg.get("avg") or agg["notional"] / agg["qty"]
+
+        self.emitted[oid] = 0
+        if len(self.emitted) > self.remember:
+            self.emitted.popitem(last=False)
+
+        self.signals += 1
+        try:
+            await self.emit(agg)
+        except Exception as e:
+            log.error(f"❌ Failed to publish captain signal for {oid}: {e}")
+
+    async def close(self):
+        for oid in list(self.pending):
+            await self.flush(oid)
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+
+
 # ================================================================
 # CAPTAIN EYE CLASS
 # ================================================================
@@ -46,10 +157,15 @@ class CaptainEyeWS:
         self.captain_id = captain_id
         self.redis_url = "redis://localhost:6379"
         self.r = None
+        self.bus = None
         self.ws = None
+        self.clock = ExchangeClock()
+        self.tracer = Tracer("eye")
+        self.fills = FillAggregator(self.publish_signal, self.tracer)
 
     async def connect_redis(self):
         self.r = await redis.from_url(self.redis_url, decode_responses=True)
+        self.bus = Bus(self.r)
         log.info("👁️ EyeWS connected to Redis")
 
     # ------------------------------------------------------------
@@ -69,7 +185,7 @@ class CaptainEyeWS:
 
         # auth message
 
-        ts = str(time.time())
+        ts = str(self.clock.now("okx"))
         sign = okx_sign(ts, "GET", "/users/self/verify", "", secret)
 
         auth_msg = {
@@ -117,37 +233,10 @@ class CaptainEyeWS:
                     continue
 
                 for order in data["data"]:
-                    if order.get("fillSz") is None:
-                        continue  # مش صفقة
-
-                    # استخراج بيانات الصفقة
-                    inst = order["instId"]           # BTC-USDT
-                    side = order["side"].upper()     # buy/sell
-                    fill_price = float(order["fillPx"])
-
-                    symbol = inst.replace("-", "/")  # BTC/USDT
-
-                    # ----------------------------
-                    # BUILD SIGNAL
-                    # ----------------------------
-
-                    signal = {
-                        "signal_id": f"captain_{order['ordId']}",
-                        "source": "CAPTAIN_EYE",
-                        "symbol": symbol,
-                        "action": "BUY" if side == "BUY" else "SELL",
-                        "risk": "NORMAL",
-                        "price": fill_price,
-                        "timestamp": time.time()
-                    }
+                    if not float(order.get("fillSz") or 0):
+                        continue  # مش صفقة (تحديث حالة بدون تنفيذ)
 
-                    # ----------------------------
-                    # SEND TO BRAIN
-                    # ----------------------------
-
-                    await self.r.publish("HORUS_CAPTAIN_SIGNALS", json.dumps(signal))
-
-                    log.info(f"📤 REAL-TIME CAPTAIN SIGNAL → {signal}")
+                    await self.fills.add(order)
 
             except Exception as e:
                 log.error(f"❌ WS Error: {e}")
@@ -155,14 +244,61 @@ class CaptainEyeWS:
                 await asyncio.sleep(3)
                 await self.connect_okx()
 
+    # ------------------------------------------------------------
+    # BUILD + SEND SIGNAL (fill مجمّع)
+    # ------------------------------------------------------------
+
+    async def publish_signal(self, fill):
+        # استخراج بيانات الصفقة
+        inst = fill["instId"]              # BTC-USDT
+        side = fill["side"].upper()        # buy/sell
+
+        symbol = inst.replace("-", "/")    # BTC/USDT
+
+        # ----------------------------
+        # BUILD SIGNAL
+        # ----------------------------
+
+        signal = {
+            "signal_id": f"captain_{fill['ordId']}",
+            "source": "CAPTAIN_EYE",
+            "symbol": symbol,
+            "action": "BUY" if side == "BUY" else "SELL",
+            "risk": "NORMAL",
+            "price": fill["vwap"],          # VWAP الكابتن
+            "size": fill["size"],           # الكمية المنفذة
+            "fills": fill["events"],        # عدد الـ fill events المجمّعة
+            "timestamp": time.time()
+        }
+
+        # ----------------------------
+        # SEND TO BRAIN
+        # ----------------------------
+
+        span = fill["span"]
+        signal["trace"] = span.context()
+        await self.bus.publish("HORUS_CAPTAIN_SIGNALS", signal)
+        self.tracer.end(span, signal=signal["signal_id"], fills=fill["events"])
+
+        log.info(
+            f"📤 REAL-TIME CAPTAIN SIGNAL → {signal} | coalesced {fill['events']} fills "
+            f"| total {self.fills.raw} fills → {self.fills.signals} signals"
+        )
+
     # ------------------------------------------------------------
     # RUNNER
     # ------------------------------------------------------------
 
     async def run(self):
         await self.connect_redis()
+        await self.clock.start(exchanges=("okx",))
+        await self.tracer.start()
         await self.connect_okx()
-        await self.listen()
+        try:
+            await self.listen()
+        finally:
+            await self.fills.close()
+            await self.tracer.stop()
 
 
 # ================================================================
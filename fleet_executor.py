@@ -9,12 +9,24 @@
 #
 # ويختار الجندي الصحيح لكل عميل، ثم ينفّذ عن طريق Gate.
 #
+# Sharding: عدة نسخ من هذا الملف تعمل معاً (core/sharding.py) —
+# كل نسخة تنفّذ فقط عملاءها (rendezvous hash عبر Redis membership).
+#
+# التنفيذ يمر عبر FleetScheduler:
+#    • طابور + عدد workers محدود لكل بورصة (لا 10k socket في نفس اللحظة)
+#    • أولوية: CLOSE ثم SELL ثم BUY
+#    • مقاييس عمق الطابور في Redis hash: HORUS_FLEET_METRICS
+#
 # ================================================================
 
 import asyncio
+import itertools
 import json
 import logging
+import os
+import time
 from datetime import datetime
+from functools import lru_cache
 import redis.asyncio as redis
 
 # Soldiers
@@ -25,13 +37,42 @@ from soldiers.soldier_bybit import SoldierBybit
 # Treasury: لمعرفة عملاء النظام
 from core.treasury import Treasury
 
+# Gate: لتجهيز وإغلاق الجلسات المشتركة مع البورصات
+from gate.gate import Gate
+from gate.order_policy import client_order_id
+
+# معالجة متوازية للـ packets (بالترتيب لنفس العملة)
+from core.dispatcher import KeyedDispatcher
+
+# تقسيم العملاء بين نسخ الـ executor
+from core.sharding import ShardMembership, SHARD_ID_FIXED
+
+# NEXUS_FLEET_COMMAND عبر pub/sub أو Redis Streams
+from core.bus import Bus
+
+# execution_logs / wave_logs / system_logs (كتابة مجمّعة في الخلفية)
+from core.log_writer import LogWriter
+
+# signal_id / wave id مكرر → يُتجاهل قبل وضع أي أمر
+from core.dedup import DedupCache
+
+# latency spans: fleet (packet) + gate (لكل دفعة / بورصة)
+from core.tracing import Tracer
+
 log = logging.getLogger("FleetExecutor")
 
 
 # ================================================================
 # CHOOSE SOLDIER BASED ON EXCHANGE
 # ================================================================
+# الجندي خفيف (المفاتيح داخل Gate.clients) — جندي واحد لكل (user_id, exchange)
+# يُنشأ مرة ويُعاد استخدامه في كل الأوامر التالية لنفس العميل على نفس البورصة
+# بدل إنشاء SoldierX + Gate لكل أمر (LRU حتى SOLDIER_CACHE_SIZE).
+
+SOLDIER_CACHE_SIZE = 20000
 
+
+@lru_cache(maxsize=SOLDIER_CACHE_SIZE)
 def get_soldier(user_id, exchange):
     exchange = exchange.lower()
     if exchange == "okx":
@@ -43,6 +84,172 @@ def get_soldier(user_id, exchange):
     raise Exception(f"Unknown exchange: {exchange}")
 
 
+def fill_price(data):
+    """
+    متوسط سعر التنفيذ لو موجود في رد البورصة (Binance fills / avgPx / avgPrice)
+    """
+    if not isinstance(data, dict):
+        return None
+    fills = data.get("fills")
+    if fills:
+        qty = sum(float(f["qty"]) for f in fills)
+        return sum(float(f["price"]) * float(f["qty"]) for f in fills) / qty if qty else None
+    for item in (data.get("data") or [data.get("result") or data]):
+        for k in ("avgPx", "avgPrice"):
+            if isinstance(item, dict) and item.get(k):
+                return float(item[k])
+    return None
+
+
+# ================================================================
+# SCHEDULER (bounded + prioritized per exchange)
+# ================================================================
+
+# أقصى عدد أوامر متزامنة لكل بورصة
+FLEET_CONCURRENCY = int(os.getenv("HORUS_FLEET_CONCURRENCY", "200"))
+
+# حجم الدفعة التي يأخذها worker واحد (= أكبر batch endpoint: OKX 20)
+FLEET_CHUNK = int(os.getenv("HORUS_FLEET_CHUNK", "20"))
+
+PRIORITY = {"CLOSE": 0, "SELL": 1, "BUY": 2}
+
+METRICS_KEY = "HORUS_FLEET_METRICS"
+
+# أحداث HORUS_CLIENT_UPDATES التي لا تمس مفاتيح العميل
+ROSTER_ONLY_EVENTS = ("balance", "allocation")
+
+
+class FleetScheduler:
+    """
+    طابور أولوية لكل بورصة + workers ثابتة العدد:
+        • كل worker يأخذ دفعة أوامر (chunk) ويرسلها عبر Gate.submit_batch
+        • in-flight لكل بورصة ≤ workers × chunk = FLEET_CONCURRENCY
+        • CLOSE / SELL تتخطى BUY المنتظرة في الطابور
+    """
+
+    def __init__(self, gate, concurrency=FLEET_CONCURRENCY, chunk=FLEET_CHUNK, tracer=None):
+        self.gate = gate
+        self.tracer = tracer
+        self.chunk = max(1, chunk)
+        self.workers = max(1, concurrency // self.chunk)
+        self.queues = {}
+        self._tasks = {}
+        self._seq = itertools.count()
+
+        # metrics
+        self.depth = {}          # exchange → {action: أوامر في الطابور}
+        self.in_flight = {}      # exchange → أوامر قيد الإرسال
+        self.max_depth = {}
+        self.wait = {}           # exchange → EWMA زمن الانتظار في الطابور (ms)
+
+    # ------------------------------------------------------------
+
+    def _queue(self, exchange):
+        if exchange not in self.queues:
+            self.queues[exchange] = asyncio.PriorityQueue()
+            self.depth[exchange] = {a: 0 for a in PRIORITY}
+            self.in_flight[exchange] = 0
+            self.max_depth[exchange] = 0
+            self.wait[exchange] = 0.0
+            self._tasks[exchange] = [
+                asyncio.create_task(self._worker(exchange)) for _ in range(self.workers)
+            ]
+            log.info(f"🧵 {exchange}: {self.workers} workers × {self.chunk} orders")
+        return self.queues[exchange]
+
+    async def submit(self, orders, trace=None):
+        """
+        يعيد نتيجة لكل أمر بنفس الترتيب (مثل Gate.submit_batch)
+        trace = trace context → span "gate" لكل دفعة (hop = الانتظار في الطابور)
+        """
+        by_exchange = {}
+        for i, o in enumerate(orders):
+            by_exchange.setdefault(o["exchange"], []).append(i)
+
+        loop = asyncio.get_running_loop()
+        jobs = []
+
+        for ex, idxs in by_exchange.items():
+            q = self._queue(ex)
+            for k in range(0, len(idxs), self.chunk):
+                chunk = idxs[k:k + self.chunk]
+                fut = loop.create_future()
+                action = orders[chunk[0]]["action"]
+                q.put_nowait((
+                    PRIORITY.get(action, len(PRIORITY)), next(self._seq),
+                    ([orders[i] for i in chunk], action, fut, time.perf_counter(), trace)
+                ))
+                self._count(ex, action, len(chunk))
+                jobs.append((chunk, fut))
+
+        results = [None] * len(orders)
+        for chunk, fut in jobs:
+            for i, res in zip(chunk, await fut):
+                results[i] = res
+        return results
+
+    async def _worker(self, exchange):
+        q = self.queues[exchange]
+        while True:
+            _, _, (batch, action, fut, queued_at, trace) = await q.get()
+
+            self._count(exchange, action, -len(batch))
+            waited = (time.perf_counter() - queued_at) * 1000
+            self.wait[exchange] += 0.2 * (waited - self.wait[exchange])
+
+            if fut.cancelled():
+                continue
+
+            span = self.tracer.begin(trace, "gate", exchange=exchange) if trace and self.tracer else None
+
+            self.in_flight[exchange] += len(batch)
+            try:
+                fut.set_result(await self.gate.submit_batch(batch))
+            except Exception as e:
+                if not fut.done():
+                    fut.set_result([e] * len(batch))
+            finally:
+                self.in_flight[exchange] -= len(batch)
+                if span is not None:
+                    self.tracer.end(span, orders=len(batch))
+
+    def _count(self, exchange, action, n):
+        depth = self.depth[exchange]
+        depth[action] = depth.get(action, 0) + n
+        self.max_depth[exchange] = max(self.max_depth[exchange], sum(depth.values()))
+
+    # ------------------------------------------------------------
+
+    def stats(self):
+        return {
+            ex: {
+                "queued": dict(self.depth[ex]),
+                "in_flight": self.in_flight[ex],
+                "max_depth": self.max_depth[ex],
+                "wait_ms": round(self.wait[ex], 1),
+                "workers": self.workers,
+            }
+            for ex in self.queues
+        }
+
+    async def publish_metrics(self, r, shard_id, every=5):
+        """
+        كتابة المقاييس دورياً في Redis (للكونسول / المراقبة) — field = shard:exchange
+        """
+        while True:
+            await asyncio.sleep(every)
+            stats = self.stats()
+            if stats:
+                await r.hset(METRICS_KEY, mapping={f"{shard_id}:{ex}": json.dumps(st) for ex, st in stats.items()})
+
+    async def close(self):
+        for tasks in self._tasks.values():
+            for t in tasks:
+                t.cancel()
+        self._tasks.clear()
+        self.queues.clear()
+
+
 # ================================================================
 # CLASS EXECUTOR
 # ================================================================
@@ -52,9 +259,24 @@ class FleetExecutor:
     def __init__(self):
         self.redis_url = "redis://localhost:6379"
         self.r = None
+        self.bus = None
+        self.gate = Gate()
+        self.shards = ShardMembership(on_retired=self.drop_shard_groups)
+        # ملف spans لكل shard (عدة نسخ على نفس الجهاز لا تكتب في نفس الملف)
+        self.tracer = Tracer("fleet_" + self.shards.shard_id.replace(":", "_").replace("/", "_"))
+        self.scheduler = FleetScheduler(self.gate, tracer=self.tracer)
+        self.dispatcher = KeyedDispatcher(self.handle_message, "FleetExecutor")
+        self.logs = LogWriter()
+        # namespace لكل shard — كل shard ينفّذ حصته من نفس الـ packet
+        self.dedup = DedupCache(f"fleet:{self.shards.shard_id}")
 
     async def connect(self):
         self.r = await redis.from_url(self.redis_url, decode_responses=True)
+        self.bus = Bus(self.r)
+        if self.bus.streams and not SHARD_ID_FIXED:
+            # group = fleet:<shard> — id متغير (hostname:pid) = group جديد من "$" كل restart
+            raise RuntimeError("HORUS_BUS=streams requires a stable HORUS_SHARD_ID")
+        self.dedup.r = self.r
         log.info("⚡ Fleet Executor connected to Redis")
 
     # ------------------------------------------------------------
@@ -77,29 +299,30 @@ class FleetExecutor:
         }
         """
 
+        span = self.tracer.begin(packet.get("trace"), "fleet", signal=packet["signal_id"])
+
         symbol = packet["symbol"]
         action = packet["action"].upper()
         per_exchange = packet["per_exchange"]
 
         log.info(f"\n⚡ NORMAL EXECUTION STARTED | {symbol} | {action}")
 
-        tasks = []
+        if action not in ("BUY", "SELL", "CLOSE"):
+            log.error(f"❌ Unknown action: {action}")
+            return []
+
+        soldiers = []
 
         for ex, clients in per_exchange.items():
             for user_id, usd in clients.items():
+                if self.shards.mine(user_id, ex):
+                    soldiers.append((get_soldier(user_id, ex), usd))
 
-                soldier = get_soldier(user_id, ex)
-
-                if action == "BUY":
-                    tasks.append(soldier.buy(symbol, usd))
-                elif action == "SELL":
-                    tasks.append(soldier.sell(symbol, usd))
-                elif action == "CLOSE":
-                    tasks.append(soldier.close(symbol))
-
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        results = await self.execute(soldiers, symbol, action, packet["signal_id"], trace=span.context())
+        self.tracer.end(span, orders=len(results))
 
         log.info(f"✅ NORMAL EXECUTION DONE | {len(results)} orders processed")
+        return results
 
     # ------------------------------------------------------------
     # SMART WAVE EXECUTION FLOW
@@ -118,6 +341,8 @@ class FleetExecutor:
         }
         """
 
+        span = self.tracer.begin(packet.get("trace"), "fleet", signal=packet["signal_id"])
+
         symbol = packet["symbol"]
         ex = packet["exchange"]
         action = packet["action"].upper()
@@ -125,22 +350,71 @@ class FleetExecutor:
 
         log.info(f"\n🌊 EXECUTING WAVE {packet['wave']} | {ex} | {symbol}")
 
-        tasks = []
-
-        for user_id, usd in client_amounts.items():
-            if usd <= 0:
-                continue  # skip zero allocations
+        if action not in ("BUY", "SELL"):
+            log.error(f"❌ Unknown wave action: {action}")
+            return []
+
+        soldiers = [
+            (get_soldier(user_id, ex), usd)
+            for user_id, usd in client_amounts.items()
+            if usd > 0  # skip zero allocations
+            and self.shards.mine(user_id, ex)
+        ]
+
+        # signal_id للموجة فريد أصلاً (parent_waveN_exchange)
+        results = await self.execute(
+            soldiers, symbol, action, packet["signal_id"], packet["wave"], trace=span.context()
+        )
+        self.tracer.end(span, orders=len(results), wave=packet["wave"])
+
+        ok = sum(1 for r in results if r["status"] == "success")
+        self.logs.wave(
+            ex, symbol, packet["wave"],
+            "done" if ok == len(results) else ("failed" if not ok else "partial"),
+            f"{ok}/{len(results)} orders ok"
+        )
 
-            soldier = get_soldier(user_id, ex)
-
-            if action == "BUY":
-                tasks.append(soldier.buy(symbol, usd))
-            elif action == "SELL":
-                tasks.append(soldier.sell(symbol, usd))
+        log.info(f"🌊 WAVE DONE | {len(results)} orders processed")
+        return results
 
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+    # ------------------------------------------------------------
+    # BATCH SUBMIT (FleetScheduler → Gate.submit_batch per credentials)
+    # ------------------------------------------------------------
 
-        log.info(f"🌊 WAVE DONE | {len(results)} orders processed")
+    async def execute(self, soldiers, symbol, action, signal_id, wave=0, trace=None):
+        """
+        soldiers = [(soldier, usd), ...]
+        كل أمر يحمل client order id = hash(signal_id, wave, client)
+        يعيد نتيجة لكل جندي بنفس صيغة SoldierBase:
+            {"status": "success", "data": ...} أو {"status": "error", "error": ...}
+        """
+        listed = [(soldier, usd) for soldier, usd in soldiers if soldier.listed(symbol)]
+        if len(listed) < len(soldiers):
+            log.warning(f"⏭️ {len(soldiers) - len(listed)} clients skipped | {symbol} not listed on their exchange")
+        soldiers = listed
+
+        orders = [
+            soldier.order(action, symbol, usd, client_order_id(signal_id, soldier.user_id, wave))
+            for soldier, usd in soldiers
+        ]
+
+        raw = await self.scheduler.submit(orders, trace)
+
+        reports = [
+            soldier.report(order, res)
+            for (soldier, _), order, res in zip(soldiers, orders, raw)
+        ]
+
+        for order, rep in zip(orders, reports):
+            ok = rep["status"] == "success"
+            self.logs.execution(
+                order["user_id"], order["symbol"], order["exchange"], order["usd"],
+                "executed" if ok else "failed",
+                price=fill_price(rep.get("data")) if ok else None,
+                reason=None if ok else rep.get("error")
+            )
+
+        return reports
 
     # ------------------------------------------------------------
     # MAIN LISTENER LOOP
@@ -148,31 +422,104 @@ class FleetExecutor:
 
     async def run(self):
         await self.connect()
+        await Gate.startup()
+        await self.shards.start(self.r)
+        await self.logs.start()
+        await self.tracer.start()
+        logging.getLogger().addHandler(self.logs.handler("FleetExecutor"))
+        metrics = asyncio.create_task(self.scheduler.publish_metrics(self.r, self.shards.shard_id))
+
+        try:
+            await self.listen()
+        finally:
+            metrics.cancel()
+            await self.shards.stop()
+            await self.dispatcher.close()
+            await self.scheduler.close()
+            await Gate.shutdown()
+            await self.tracer.stop()
+            await self.logs.stop()
+            log.info("🔌 Gate sessions closed")
 
-        sub = self.r.pubsub()
-        await sub.subscribe("NEXUS_FLEET_COMMAND")
+    # ------------------------------------------------------------
+    # CLIENT UPDATES (keys changed / disabled / deleted)
+    # ------------------------------------------------------------
 
-        log.info("⚡ Fleet Executor ONLINE — Listening for execution packets...")
+    def handle_client_update(self, event):
+        """
+        event = { "client_id": "u1", "event": "keys" }
+        """
+        if event.get("event") in ROSTER_ONLY_EVENTS:
+            return   # رصيد / allocation — تخص Brain فقط، المفاتيح لم تتغير
+        Gate.invalidate(event["client_id"])
+        log.info(f"🔑 Client cache invalidated | {event['client_id']} | {event.get('event')}")
+
+    async def drop_shard_groups(self, shard_ids):
+        for sid in shard_ids:
+            try:
+                await self.bus.drop_group("NEXUS_FLEET_COMMAND", f"fleet:{sid}")
+            except Exception as e:
+                log.error(f"❌ Drop group fleet:{sid} failed: {e}")
+
+    async def listen_client_updates(self):
+        sub = self.r.pubsub()
+        await sub.subscribe("HORUS_CLIENT_UPDATES")
 
         async for msg in sub.listen():
             if msg["type"] != "message":
                 continue
-
             try:
-                packet = json.loads(msg["data"])
-                typ = packet["type"]
+                self.handle_client_update(json.loads(msg["data"]))
+            except Exception as e:
+                log.error(f"❌ Client update error: {e}")
 
-                if typ == "NORMAL":
-                    await self.handle_normal(packet)
+    async def listen(self):
+        updates = asyncio.create_task(self.listen_client_updates())
+        metrics = asyncio.create_task(self.bus.publish_metrics(["NEXUS_FLEET_COMMAND"]))
 
-                elif typ == "SMART_WAVE":
-                    await self.handle_wave(packet)
+        # كل shard له group خاص (كل shard يحتاج كل packet ثم ينفّذ حصته فقط)
+        # ← HORUS_SHARD_ID ثابت (إلزامي مع streams) = لا ضياع رسائل أثناء إعادة التشغيل
+        shard = self.shards.shard_id
 
-                else:
-                    log.error(f"❌ Unknown packet type: {typ}")
+        log.info("⚡ Fleet Executor ONLINE — Listening for execution packets...")
 
-            except Exception as e:
-                log.error(f"❌ FLEET ERROR: {e}", exc_info=True)
+        try:
+            async for msg in self.bus.consume(["NEXUS_FLEET_COMMAND"], f"fleet:{shard}", shard):
+                try:
+                    # نفس العملة بالترتيب (BUY قبل SELL) — العملات المختلفة بالتوازي
+                    await self.dispatcher.submit(msg.data["symbol"], msg)
+
+                except Exception as e:
+                    log.error(f"❌ FLEET ERROR: {e}", exc_info=True)
+        finally:
+            updates.cancel()
+            metrics.cancel()
+
+    async def handle_message(self, msg):
+        sid = msg.data.get("signal_id")
+        if sid and not await self.dedup.first(sid):
+            log.info(f"♻️ Duplicate packet ignored | {sid}")
+            await msg.ack()
+            return
+        try:
+            await self.handle_packet(msg.data)
+        except Exception:
+            if sid:
+                await self.dedup.forget(sid)
+            raise
+        await msg.ack()   # streams: ack بعد التنفيذ (الإعادة آمنة بفضل client order id)
+
+    async def handle_packet(self, packet):
+        typ = packet["type"]
+
+        if typ == "NORMAL":
+            await self.handle_normal(packet)
+
+        elif typ == "SMART_WAVE":
+            await self.handle_wave(packet)
+
+        else:
+            log.error(f"❌ Unknown packet type: {typ}")
 
 
 # ================================================================
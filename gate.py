@@ -6,6 +6,13 @@
 #  • العقل Brain / SmartEntryEngine لا يقومان بأي تنفيذ مباشر
 #  • يدعم: OKX - Binance - Bybit
 #  • يتطلب: Treasurer للحصول على API Keys
+#  • كل الطلبات تمر عبر جلسات aiohttp مشتركة (SessionPool) يملكها Gate
+#  • الأسعار من TickerStore (market_data.py) — REST فقط لو السعر قديم
+#  • كل طلب يمر عبر RateLimiter (ينتظر في الطابور بدل 429)
+#  • الكميات تُقرّب وتُفحص محلياً عبر InstrumentRegistry قبل الإرسال
+#  • الأوامر عبر WebSocket (WSTransport) للبورصات المفعّلة — REST كـ fallback
+#  • كل التواقيع تستخدم وقت البورصة (ExchangeClock) وليس الساعة المحلية
+#  • كل أمر يحمل client order id ثابت → retries و hedging بدون تنفيذ مزدوج
 # ================================================================
 
 import aiohttp
@@ -15,31 +22,414 @@ import hmac
 import hashlib
 import base64
 import json
+import logging
+import os
+from collections import OrderedDict
+from urllib.parse import urlsplit
 
 from core.treasury import Treasury   # لجلب مفاتيح العملاء
+from core.endpoints import endpoint   # عناوين البورصات (حقيقية / mock)
+from core.market_data import TickerStore   # أسعار WebSocket المشتركة
+from gate.rate_limiter import RateLimiter  # حدود البورصات (weights + AIMD)
+from gate.instruments import InstrumentRegistry  # lot size / min notional
+from gate.ws_transport import WSTransport, WSUnavailable  # أوامر عبر WebSocket
+from gate.clock import ExchangeClock, RECV_WINDOW  # مزامنة الوقت مع البورصات
+from gate.order_policy import RetryPolicy  # retries / hedging
 
+log = logging.getLogger("Gate")
+
+# أقصى عمر (ثواني) للسعر المخزّن قبل الرجوع لـ REST
+TICKER_MAX_AGE = float(os.getenv("HORUS_TICKER_MAX_AGE", "2.0"))
 
 # ================================================================
 #  UTIL
 # ================================================================
 
-async def _http_post(session, url, headers, payload):
-    async with session.post(url, headers=headers, data=json.dumps(payload)) as r:
-        return await r.json()
+async def _http_request(session, method, url, headers=None, payload=None):
+    """
+    يعيد (status, headers, json) — الـ headers يحتاجها RateLimiter
+    """
+    data = json.dumps(payload) if payload is not None else None
+    async with session.request(method, url, headers=headers, data=data) as r:
+        return r.status, r.headers, await r.json(content_type=None)
+
+
+def order_count(body):
+    """
+    عدد الأوامر في الطلب: OKX batch = list / Bybit batch = {"request": [...]}
+    """
+    if isinstance(body, list):
+        return len(body)
+    if isinstance(body, dict) and isinstance(body.get("request"), list):
+        return len(body["request"])
+    return 1
+
+
+class OrderRejected(Exception):
+    """
+    أمر مرفوض محلياً (عملة غير مدرجة / أقل من الحد الأدنى) — لم يُرسل للبورصة
+    """
+
+
+# ================================================================
+#  SESSION POOL
+# ================================================================
+
+EXCHANGES = ("okx", "binance", "bybit")
+
+
+class SessionPool:
+    """
+    جلسات aiohttp مشتركة وطويلة العمر — جلسة واحدة لكل بورصة.
+        • keep-alive: الاتصال يبقى مفتوحاً بين الأوامر (لا DNS + TCP + TLS لكل أمر)
+        • حد أقصى للاتصالات لكل host
+        • DNS cache
+    """
+
+    def __init__(self, limit_per_host=100, dns_ttl=300, keepalive=30, timeout=10):
+        self.limit_per_host = limit_per_host
+        self.dns_ttl = dns_ttl
+        self.keepalive = keepalive
+        self.timeout = timeout
+        self._sessions = {}
+
+    def get(self, exchange):
+        """
+        يعيد جلسة البورصة (وينشئها عند أول استخدام أو بعد الإغلاق)
+        """
+        session = self._sessions.get(exchange)
+        if session is None or session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=0,
+                limit_per_host=self.limit_per_host,
+                ttl_dns_cache=self.dns_ttl,
+                keepalive_timeout=self.keepalive,
+                enable_cleanup_closed=True
+            )
+            session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout)
+            )
+            self._sessions[exchange] = session
+        return session
+
+    async def start(self, exchanges=EXCHANGES):
+        for ex in exchanges:
+            self.get(ex)
+
+    async def close(self):
+        for session in self._sessions.values():
+            if not session.closed:
+                await session.close()
+        self._sessions.clear()
+
+
+# ================================================================
+#  CLIENT CACHE
+# ================================================================
+
+class ClientCache:
+    """
+    LRU cache لعملاء البورصات الجاهزين (مرتبطين بالمفاتيح)
+        key = (user_id, exchange)
+    بعد التسخين: لا Treasury.get_keys ولا إنشاء كائنات في مسار التنفيذ.
+    """
+
+    def __init__(self, maxsize=20000):
+        self.maxsize = maxsize
+        self._items = OrderedDict()
+
+    def get(self, user_id, exchange):
+        key = (str(user_id), exchange)
+        client = self._items.get(key)
+        if client is not None:
+            self._items.move_to_end(key)
+        return client
+
+    def put(self, user_id, exchange, client):
+        key = (str(user_id), exchange)
+        self._items[key] = client
+        self._items.move_to_end(key)
+        while len(self._items) > self.maxsize:
+            self._items.popitem(last=False)
+
+    def invalidate(self, user_id):
+        """
+        حذف كل عملاء المستخدم (عند تغيير المفاتيح / الإيقاف / الحذف)
+        """
+        for ex in EXCHANGES:
+            self._items.pop((str(user_id), ex), None)
+
+    def clear(self):
+        self._items.clear()
+
+    def __len__(self):
+        return len(self._items)
+
+
+# ================================================================
+#  BASE CLIENT
+# ================================================================
+
+class ExchangeClient:
+    """
+    الأب المشترك لعملاء البورصات — يوفر الجلسة المشتركة من Gate
+    """
+    EXCHANGE = None
+    BATCH_SIZE = 1   # 1 = البورصة لا تدعم batch endpoint (أوامر منفردة)
+
+    def __init__(self, gate):
+        self.gate = gate
+
+    @property
+    def session(self):
+        return self.gate.sessions.get(self.EXCHANGE)
+
+    async def _send(self, method, url, headers=None, payload=None, signed=True, session=None):
+        """
+        كل طلبات البورصة تمر من هنا:
+            RateLimiter.acquire → HTTP → RateLimiter.release
+        لو رُفض الطلب بسبب الحد (429) يعاد إرساله بعد الانتظار
+        (الطلب المرفوض بـ 429 لم يُنفّذ — إعادة الإرسال آمنة)
+        """
+        limiter = self.gate.limiter
+        path = urlsplit(url).path.removeprefix(urlsplit(self.BASE).path)   # mock: /okx/api/... → /api/...
+        key = self.key if signed else None
+
+        for attempt in range(limiter.max_requeue + 1):
+            await limiter.acquire(self.EXCHANGE, key, path)
+
+            status, resp_headers, data = None, None, None
+            t0 = time.perf_counter()
+            try:
+                status, resp_headers, data = await _http_request(
+                    session or self.session, method, url, headers, payload
+                )
+            finally:
+                throttled = await limiter.release(
+                    self.EXCHANGE, key, status, resp_headers, data,
+                    time.perf_counter() - t0
+                )
+
+            if not throttled:
+                return data
+
+            log.warning(f"⏳ {self.EXCHANGE} {path} throttled — requeue {attempt + 1}")
+
+        return data
+
+    async def price(self, symbol):
+        """
+        آخر سعر من TickerStore — طلب REST فقط لو السعر أقدم من TICKER_MAX_AGE
+        """
+        tick = await self.gate.tickers.get(self.EXCHANGE, symbol)
+        if tick and tick.get("last"):
+            return tick["last"]
+
+        price = await self._fetch_price(symbol)
+        self.gate.tickers.put_local(self.EXCHANGE, symbol, last=price)
+        return price
+
+    async def _fetch_price(self, symbol):
+        raise NotImplementedError
+
+    async def _place(self, body, rest):
+        """
+        إرسال أمر عبر WebSocket لو مفعّل لهذه البورصة (اتصال دافئ = RTT واحد)
+        rest = fallback عبر REST — فقط لو الطلب لم يُرسل عبر WS
+        (توكنات الأوامر تُعاد — REST يحجز حصته بنفسه في _send)
+        """
+        ws = self.gate.ws
+        if ws.enabled(self.EXCHANGE):
+            count = order_count(body)
+            await self.gate.limiter.acquire_order(self.EXCHANGE, self.key, count)
+            try:
+                return await ws.place(self, body)
+            except WSUnavailable as e:
+                self.gate.limiter.refund_order(self.EXCHANGE, self.key, count)
+                log.warning(f"⚠️ {e} — REST fallback")
+
+        return await rest()
+
+    # ------------------------------------------------------------
+    # IDEMPOTENT SUBMIT (retries + hedging)
+    # ------------------------------------------------------------
+
+    async def _submit_order(self, body, rest, symbol=None, cid=None, idempotent=None):
+        """
+        إرسال أمر مع سياسة الإعادة:
+            • retry    → إعادة الإرسال (الأمر لم يُنفّذ)
+            • unknown  → نبحث بالـ client id: موجود → حالته / غير موجود → إعادة
+                         (Binance / OKX لا ترفض id أمر نُفّذ — الإعادة العمياء = تنفيذ مزدوج)
+                         batch بدون cid واحد → إعادة فقط على PERMANENT_CID
+                         (غير ذلك يبحث batch_orders عن كل أمر — _resolve_unknown)
+            • duplicate → الأمر نُفّذ في محاولة سابقة → نجلب حالته
+        rest(session=None) يبني ويوقّع الطلب من جديد في كل محاولة
+        idempotent: كل أوامر الطلب تحمل client id (افتراضياً = وجود cid)
+        """
+        policy = self.gate.retry
+        idempotent = bool(cid) if idempotent is None else idempotent
+        permanent = policy.permanent_cid(self.EXCHANGE)
+        hedge = idempotent and permanent and policy.hedge_delay
+        send = (lambda: self._hedged(rest)) if hedge else rest
+        res = None
+
+        for attempt in range(policy.max_attempts):
+            sent = time.monotonic()
+            try:
+                res = await self._place(body, send)
+            except Exception as e:
+                res = e
+
+            kind = policy.classify(self.EXCHANGE, res)
+
+            if kind == "duplicate" and cid:
+                log.info(f"♻️ {self.EXCHANGE} {cid} already placed — fetching order")
+                return await self.fetch_order(symbol, cid)
+
+            if kind == "unknown" and cid:
+                state, found = await self._lookup(symbol, cid, sent)
+                if state == "found":
+                    log.info(f"♻️ {self.EXCHANGE} {cid} placed despite {res!r} — fetched order")
+                    return found
+                if state != "missing":
+                    log.error(f"❌ {self.EXCHANGE} {cid} state unknown after {res!r} — not resending")
+                    break
+
+            last = attempt == policy.max_attempts - 1
+            if kind == "retry" or (kind == "unknown" and idempotent and (cid or permanent)):
+                if not last:
+                    if policy.clock_error(self.EXCHANGE, res):
+                        try:
+                            await self.gate.clock.sync(self.EXCHANGE, self.session, force=True)
+                        except Exception as e:
+                            # endpoint الوقت فشل — نعيد بالـ offset الحالي
+                            log.error(f"❌ {self.EXCHANGE} clock resync failed: {e}")
+                    log.warning(f"🔁 {self.EXCHANGE} order retry {attempt + 1} | {cid} | {res}")
+                    await policy.backoff(attempt)
+                    continue
+
+            break
+
+        if isinstance(res, BaseException):
+            raise res
+        return res
+
+    async def _lookup(self, symbol, cid, sent=None):
+        """
+        هل وصل الأمر للبورصة؟ → ("found" | "missing" | "unknown", رد fetch_order)
+        ننتظر أولاً RECV_WINDOW من لحظة الإرسال: بعدها الطلب المتأخر في الشبكة
+        ترفضه البورصة (timestamp قديم) — "missing" يعني أنه لن يُنفّذ لاحقاً
+        """
+        sent = time.monotonic() if sent is None else sent
+        await asyncio.sleep(max(0.0, sent + RECV_WINDOW / 1000 - time.monotonic()))
+
+        try:
+            res = await self.fetch_order(symbol, cid)
+        except Exception as e:
+            res = e
+        return self.gate.retry.lookup(self.EXCHANGE, res), res
+
+    async def _resolve_unknown(self, orders, error):
+        """
+        batch انتهى بحالة unknown: نبحث عن كل أمر بالـ client id
+        موجود → حالته / غير ذلك → الخطأ الأصلي (لا إعادة لأمر قد يكون نُفّذ)
+        """
+        async def one(o):
+            if not o.get("client_order_id"):
+                return error
+            state, res = await self._lookup(o["symbol"], o["client_order_id"])
+            return res if state == "found" else error
+
+        log.warning(f"🔎 {self.EXCHANGE} batch state unknown ({error!r}) — looking up {len(orders)} order(s)")
+        return list(await asyncio.gather(*(one(o) for o in orders)))
+
+    async def _hedged(self, rest):
+        """
+        لو لم يصل رد خلال hedge_delay نرسل نفس الأمر (نفس client id) عبر اتصال ثانٍ.
+        أول رد غير مكرر يفوز — الثاني سترفضه البورصة كـ duplicate
+        (لذلك فقط على PERMANENT_CID — انظر _submit_order)
+        """
+        policy = self.gate.retry
+        primary = asyncio.create_task(rest())
+
+        done, _ = await asyncio.wait({primary}, timeout=policy.hedge_delay)
+        if done:
+            return primary.result()
+
+        hedge = asyncio.create_task(rest(self.gate.hedge_sessions.get(self.EXCHANGE)))
+        pending = {primary, hedge}
+        fallback = None
+
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for t in done:
+                if t.exception() is not None:
+                    fallback = fallback or t.exception()
+                    continue
+                res = t.result()
+                if policy.classify(self.EXCHANGE, res) == "duplicate":
+                    fallback = res
+                    continue
+                for p in pending:
+                    p.cancel()
+                return res
+
+        if isinstance(fallback, BaseException):
+            raise fallback
+        return fallback
+
+    async def fetch_order(self, symbol, cid):
+        raise NotImplementedError
+
+    async def _resolve_duplicates(self, orders, results):
+        """
+        batch: الأوامر التي ردّت duplicate نُفّذت في محاولة سابقة → نجلب حالتها
+        """
+        policy = self.gate.retry
+        dups = [
+            i for i, res in enumerate(results)
+            if orders[i].get("client_order_id")
+            and not isinstance(res, BaseException)
+            and policy.classify(self.EXCHANGE, res) == "duplicate"
+        ]
+        fetched = await asyncio.gather(
+            *(self.fetch_order(orders[i]["symbol"], orders[i]["client_order_id"]) for i in dups),
+            return_exceptions=True
+        )
+        for i, res in zip(dups, fetched):
+            results[i] = res
+        return results
+
+    def _quantity(self, symbol, usd, price):
+        """
+        USD → كمية مقرّبة حسب lot size البورصة
+        (OrderRejected لو أقل من الحد الأدنى — بدون طلب شبكة)
+        """
+        return self._round(symbol, usd / price)
 
-async def _http_get(session, url, headers=None):
-    async with session.get(url, headers=headers) as r:
-        return await r.json()
+    def _round(self, symbol, qty):
+        instruments = self.gate.instruments
+        qty = instruments.round_qty(self.EXCHANGE, symbol, qty)
+
+        reason = instruments.reject_reason(self.EXCHANGE, symbol, qty=qty)
+        if reason:
+            raise OrderRejected(reason)
+
+        return qty
 
 
 # ================================================================
 #  OKX CLIENT
 # ================================================================
 
-class OKXClient:
-    BASE = "https://www.okx.com"
+class OKXClient(ExchangeClient):
+    EXCHANGE = "okx"
+    BASE = endpoint("okx")
+    BATCH_SIZE = 20
 
-    def __init__(self, api_key, secret_key, passphrase):
+    def __init__(self, api_key, secret_key, passphrase, gate):
+        super().__init__(gate)
         self.key = api_key
         self.secret = secret_key
         self.passphrase = passphrase
@@ -47,284 +437,356 @@ class OKXClient:
     # --------------------- SIGNATURE -----------------------------
 
     def _sign(self, method, path, body=""):
-        ts = str(time.time())
+        ts = self.gate.clock.iso(self.EXCHANGE)
         msg = f"{ts}{method}{path}{body}"
         sign = base64.b64encode(
             hmac.new(self.secret.encode(), msg.encode(), hashlib.sha256).digest()
         ).decode()
         return ts, sign
 
-    # --------------------- MARKET BUY -----------------------------
+    def _headers(self, method, path, body_str=""):
+        ts, sign = self._sign(method, path, body_str)
+        return {
+            "OK-ACCESS-KEY": self.key,
+            "OK-ACCESS-SIGN": sign,
+            "OK-ACCESS-TIMESTAMP": ts,
+            "OK-ACCESS-PASSPHRASE": self.passphrase,
+            "Content-Type": "application/json"
+        }
 
-    async def market_buy(self, symbol, usd):
-        """
-        شراء Market بقيمة USD
-        """
-        path = "/api/v5/trade/order"
-        url = self.BASE + path
+    async def _post(self, path, body, session=None):
+        headers = self._headers("POST", path, json.dumps(body))
+        return await self._send("POST", self.BASE + path, headers, body, session=session)
 
+    def _order_body(self, symbol, side, usd, cid=None):
         body = {
             "instId": symbol,
             "tdMode": "cash",
-            "side": "buy",
+            "side": side,
             "ordType": "market",
             "sz": str(usd)   # OKX تسمح بـ sz كقيمة بالدولار
         }
-        body_str = json.dumps(body)
-
-        ts, sign = self._sign("POST", path, body_str)
+        if cid:
+            body["clOrdId"] = cid
+        return body
 
-        headers = {
-            "OK-ACCESS-KEY": self.key,
-            "OK-ACCESS-SIGN": sign,
-            "OK-ACCESS-TIMESTAMP": ts,
-            "OK-ACCESS-PASSPHRASE": self.passphrase,
-            "Content-Type": "application/json"
-        }
+    # --------------------- MARKET BUY -----------------------------
 
-        async with aiohttp.ClientSession() as session:
-            return await _http_post(session, url, headers, body)
+    async def market_buy(self, symbol, usd, cid=None):
+        """
+        شراء Market بقيمة USD
+        """
+        return await self._order(self._order_body(symbol, "buy", usd, cid), cid)
 
     # --------------------- MARKET SELL -----------------------------
 
-    async def market_sell(self, symbol, usd):
-        path = "/api/v5/trade/order"
-        url = self.BASE + path
+    async def market_sell(self, symbol, usd, cid=None):
+        return await self._order(self._order_body(symbol, "sell", usd, cid), cid)
 
-        body = {
-            "instId": symbol,
-            "tdMode": "cash",
-            "side": "sell",
-            "ordType": "market",
-            "sz": str(usd)
-        }
-        body_str = json.dumps(body)
+    async def _order(self, body, cid=None):
+        return await self._submit_order(
+            body,
+            lambda session=None: self._post("/api/v5/trade/order", body, session),
+            body["instId"], cid
+        )
 
-        ts, sign = self._sign("POST", path, body_str)
+    async def fetch_order(self, symbol, cid):
+        path = f"/api/v5/trade/order?instId={symbol}&clOrdId={cid}"
+        return await self._send("GET", self.BASE + path, self._headers("GET", path))
 
-        headers = {
-            "OK-ACCESS-KEY": self.key,
-            "OK-ACCESS-SIGN": sign,
-            "OK-ACCESS-TIMESTAMP": ts,
-            "OK-ACCESS-PASSPHRASE": self.passphrase,
-            "Content-Type": "application/json"
-        }
+    # --------------------- BATCH -----------------------------
 
-        async with aiohttp.ClientSession() as session:
-            return await _http_post(session, url, headers, body)
+    async def batch_orders(self, orders):
+        """
+        حتى 20 أمر في طلب واحد (/api/v5/trade/batch-orders)
+        orders = [{"symbol", "action", "usd"}, ...]
+        يعيد رداً لكل أمر بنفس شكل رد الأمر المفرد وبنفس الترتيب
+        """
+        body = [
+            self._order_body(o["symbol"], o["action"].lower(), o["usd"], o.get("client_order_id"))
+            for o in orders
+        ]
+        try:
+            res = await self._submit_order(
+                body,
+                lambda session=None: self._post("/api/v5/trade/batch-orders", body, session),
+                idempotent=all(o.get("client_order_id") for o in orders)
+            )
+        except Exception as e:
+            if self.gate.retry.classify(self.EXCHANGE, e) != "unknown":
+                raise
+            return await self._resolve_unknown(orders, e)
+
+        data = res.get("data") or []
+        if len(data) != len(orders):
+            # فشل الطلب كاملاً (auth / rate limit ...) — نفس الرد لكل أمر
+            return [res] * len(orders)
+
+        results = [
+            {"code": d.get("sCode"), "msg": d.get("sMsg"), "data": [d]}
+            for d in data
+        ]
+        return await self._resolve_duplicates(orders, results)
 
     # --------------------- CLOSE -----------------------------
 
-    async def close_position(self, symbol):
+    async def close_position(self, symbol, cid=None):
         """
         إغلاق أي مراكز مفتوحة على العملة
         (Spot = بيع كامل balance)
         """
         # step 1 – get balance
-        async with aiohttp.ClientSession() as session:
-            bal = await _http_get(
-                session,
-                f"{self.BASE}/api/v5/account/balance?ccy={symbol.split('-')[0]}"
-            )
+        bal = await self._send(
+            "GET",
+            f"{self.BASE}/api/v5/account/balance?ccy={symbol.split('-')[0]}"
+        )
 
         amount = bal.get("data", [{}])[0].get("details", [{}])[0].get("cashBal", "0")
         if float(amount) <= 0:
             return {"msg": "nothing_to_close"}
 
         # execute full sell
-        return await self.market_sell(symbol, amount)
+        return await self.market_sell(symbol, amount, cid)
 
 
 # ================================================================
 #  BINANCE CLIENT
 # ================================================================
 
-class BinanceClient:
-    BASE = "https://api.binance.com"
+class BinanceClient(ExchangeClient):
+    EXCHANGE = "binance"
+    BASE = endpoint("binance")
 
-    def __init__(self, api_key, secret_key):
+    def __init__(self, api_key, secret_key, gate):
+        super().__init__(gate)
         self.key = api_key
         self.secret = secret_key
 
     def _sign(self, query):
         return hmac.new(self.secret.encode(), query.encode(), hashlib.sha256).hexdigest()
 
-    async def market_buy(self, symbol, usd):
+    async def _fetch_price(self, symbol):
+        tick = await self._send("GET", f"{self.BASE}/api/v3/ticker/price?symbol={symbol}", signed=False)
+        return float(tick["price"])
+
+    def _signed(self, params):
         """
-        شراء بقيمة USD (نحسب الكمية باستخدام السعر الحالي)
+        إضافة recvWindow + timestamp (وقت البورصة) + signature — عند كل إرسال
         """
-        # step 1 – fetch price
-        async with aiohttp.ClientSession() as session:
-            tick = await _http_get(session, f"{self.BASE}/api/v3/ticker/price?symbol={symbol}")
-            price = float(tick["price"])
+        params = dict(params, recvWindow=RECV_WINDOW, timestamp=self.gate.clock.now_ms(self.EXCHANGE))
+        params["signature"] = self._sign("&".join(f"{k}={v}" for k, v in params.items()))
+        return params
 
-        qty = round(usd / price, 6)
-
-        ts = int(time.time() * 1000)
-        query = f"symbol={symbol}&side=BUY&type=MARKET&quantity={qty}&timestamp={ts}"
-        signature = self._sign(query)
-
-        async with aiohttp.ClientSession() as session:
-            return await _http_post(
-                session,
+    def _order_body(self, symbol, side, qty, cid=None):
+        body = {
+            "symbol": symbol,
+            "side": side,
+            "type": "MARKET",
+            "quantity": qty
+        }
+        if cid:
+            body["newClientOrderId"] = cid
+        return body
+
+    async def _order(self, body, cid=None):
+        return await self._submit_order(
+            body,
+            lambda session=None: self._send(
+                "POST",
                 f"{self.BASE}/api/v3/order",
                 {
                     "X-MBX-APIKEY": self.key
                 },
-                {
-                    "symbol": symbol,
-                    "side": "BUY",
-                    "type": "MARKET",
-                    "quantity": qty,
-                    "timestamp": ts,
-                    "signature": signature
-                }
-            )
+                self._signed(body),
+                session=session
+            ),
+            body["symbol"], cid
+        )
+
+    async def fetch_order(self, symbol, cid):
+        params = self._signed({"symbol": symbol, "origClientOrderId": cid})
+        query = "&".join(f"{k}={v}" for k, v in params.items())
+        return await self._send("GET", f"{self.BASE}/api/v3/order?{query}", {"X-MBX-APIKEY": self.key})
+
+    async def market_buy(self, symbol, usd, cid=None):
+        """
+        شراء بقيمة USD (نحسب الكمية باستخدام السعر الحالي)
+        """
+        # step 1 – price (cached ticker, REST fallback)
+        price = await self.price(symbol)
 
-    async def market_sell(self, symbol, usd):
-        async with aiohttp.ClientSession() as session:
-            tick = await _http_get(session, f"{self.BASE}/api/v3/ticker/price?symbol={symbol}")
-            price = float(tick["price"])
+        qty = self._quantity(symbol, usd, price)
 
-        qty = round(usd / price, 6)
+        return await self._order(self._order_body(symbol, "BUY", qty, cid), cid)
 
-        ts = int(time.time() * 1000)
-        query = f"symbol={symbol}&side=SELL&type=MARKET&quantity={qty}&timestamp={ts}"
-        signature = self._sign(query)
+    async def market_sell(self, symbol, usd, cid=None):
+        price = await self.price(symbol)
 
-        async with aiohttp.ClientSession() as session:
-            return await _http_post(
-                session,
-                f"{self.BASE}/api/v3/order",
-                {
-                    "X-MBX-APIKEY": self.key
-                },
-                {
-                    "symbol": symbol,
-                    "side": "SELL",
-                    "type": "MARKET",
-                    "quantity": qty,
-                    "timestamp": ts,
-                    "signature": signature
-                }
-            )
+        qty = self._quantity(symbol, usd, price)
 
-    async def close_position(self, symbol):
+        return await self._order(self._order_body(symbol, "SELL", qty, cid), cid)
+
+    async def close_position(self, symbol, cid=None):
         # get total coin balance
-        async with aiohttp.ClientSession() as session:
-            acc = await _http_get(session, f"{self.BASE}/api/v3/account")
+        acc = await self._send("GET", f"{self.BASE}/api/v3/account")
         for x in acc["balances"]:
             if x["asset"] == symbol.replace("USDT", ""):
-                bal = float(x["free"])
+                bal = self._round(symbol, float(x["free"]))
                 break
         else:
             return {"msg": "nothing_to_close"}
 
-        ts = int(time.time() * 1000)
-        query = f"symbol={symbol}&side=SELL&type=MARKET&quantity={bal}&timestamp={ts}"
-        signature = self._sign(query)
-
-        async with aiohttp.ClientSession() as session:
-            return await _http_post(
-                session,
-                f"{self.BASE}/api/v3/order",
-                {
-                    "X-MBX-APIKEY": self.key
-                },
-                {
-                    "symbol": symbol,
-                    "side": "SELL",
-                    "type": "MARKET",
-                    "quantity": bal,
-                    "timestamp": ts,
-                    "signature": signature
-                }
-            )
+        return await self._order(self._order_body(symbol, "SELL", bal, cid), cid)
 
 
 # ================================================================
 #  BYBIT CLIENT (SPOT)
 # ================================================================
 
-class BybitClient:
-    BASE = "https://api.bybit.com"
+class BybitClient(ExchangeClient):
+    EXCHANGE = "bybit"
+    BASE = endpoint("bybit")
+    BATCH_SIZE = 10
 
-    def __init__(self, api_key, secret_key):
+    def __init__(self, api_key, secret_key, gate):
+        super().__init__(gate)
         self.key = api_key
         self.secret = secret_key
 
     def _sign(self, payload):
         return hmac.new(self.secret.encode(), payload.encode(), hashlib.sha256).hexdigest()
 
-    async def market_buy(self, symbol, usd):
-        # fetch price
-        async with aiohttp.ClientSession() as s:
-            tick = await _http_get(s, f"{self.BASE}/v5/market/tickers?category=spot&symbol={symbol}")
-            price = float(tick["result"]["list"][0]["lastPrice"])
+    async def _fetch_price(self, symbol):
+        tick = await self._send("GET", f"{self.BASE}/v5/market/tickers?category=spot&symbol={symbol}", signed=False)
+        return float(tick["result"]["list"][0]["lastPrice"])
+
+    def _headers(self, payload):
+        """
+        توقيع Bybit v5: timestamp + api_key + recv_window + (body | query)
+        """
+        ts = str(self.gate.clock.now_ms(self.EXCHANGE))
+        return {
+            "X-BAPI-API-KEY": self.key,
+            "X-BAPI-SIGN": self._sign(f"{ts}{self.key}{RECV_WINDOW}{payload}"),
+            "X-BAPI-TIMESTAMP": ts,
+            "X-BAPI-RECV-WINDOW": str(RECV_WINDOW),
+            "Content-Type": "application/json"
+        }
 
-        qty = usd / price
+    async def _post(self, path, body, session=None):
+        return await self._send("POST", self.BASE + path, self._headers(json.dumps(body)), body, session=session)
 
-        ts = int(time.time() * 1000)
+    def _order_body(self, symbol, side, qty, cid=None):
         body = {
             "category": "spot",
             "symbol": symbol,
-            "side": "Buy",
+            "side": side,
             "orderType": "Market",
             "qty": str(qty),
-            "timestamp": ts
+            "marketUnit": "baseCoin"   # الكمية بالعملة الأساسية (الافتراضي لـ Market Buy هو USDT)
         }
-        sign = self._sign(json.dumps(body))
-
-        async with aiohttp.ClientSession() as s:
-            return await _http_post(
-                s,
-                f"{self.BASE}/v5/order/create",
-                {"X-BAPI-API-KEY": self.key, "X-BAPI-SIGN": sign},
-                body
-            )
+        if cid:
+            body["orderLinkId"] = cid
+        return body
 
-    async def market_sell(self, symbol, usd):
-        # fetch price
-        async with aiohttp.ClientSession() as s:
-            tick = await _http_get(s, f"{self.BASE}/v5/market/tickers?category=spot&symbol={symbol}")
-            price = float(tick["result"]["list"][0]["lastPrice"])
+    async def _order(self, body, cid=None):
+        return await self._submit_order(
+            body,
+            lambda session=None: self._post("/v5/order/create", body, session),
+            body["symbol"], cid
+        )
 
-        qty = usd / price
+    async def fetch_order(self, symbol, cid):
+        query = f"category=spot&symbol={symbol}&orderLinkId={cid}"
+        return await self._send("GET", f"{self.BASE}/v5/order/realtime?{query}", self._headers(query))
 
-        ts = int(time.time() * 1000)
-        body = {
+    async def market_buy(self, symbol, usd, cid=None):
+        # price (cached ticker, REST fallback)
+        price = await self.price(symbol)
+
+        qty = self._quantity(symbol, usd, price)
+
+        return await self._order(self._order_body(symbol, "Buy", qty, cid), cid)
+
+    async def market_sell(self, symbol, usd, cid=None):
+        # price (cached ticker, REST fallback)
+        price = await self.price(symbol)
+
+        qty = self._quantity(symbol, usd, price)
+
+        return await self._order(self._order_body(symbol, "Sell", qty, cid), cid)
+
+    async def batch_orders(self, orders):
+        """
+        حتى 10 أوامر spot في طلب واحد (/v5/order/create-batch)
+        يعيد رداً لكل أمر بنفس شكل رد الأمر المفرد وبنفس الترتيب
+        """
+        results = [None] * len(orders)
+        request, slots = [], []
+
+        for i, o in enumerate(orders):
+            price = await self.price(o["symbol"])
+            try:
+                qty = self._quantity(o["symbol"], o["usd"], price)
+            except OrderRejected as e:
+                results[i] = e
+                continue
+
+            body = self._order_body(o["symbol"], o["action"].capitalize(), qty, o.get("client_order_id"))
+            body.pop("category")
+            request.append(body)
+            slots.append(i)
+
+        if not request:
+            return results
+
+        payload = {
             "category": "spot",
-            "symbol": symbol,
-            "side": "Sell",
-            "orderType": "Market",
-            "qty": str(qty),
-            "timestamp": ts
+            "request": request
         }
-        sign = self._sign(json.dumps(body))
-
-        async with aiohttp.ClientSession() as s:
-            return await _http_post(
-                s,
-                f"{self.BASE}/v5/order/create",
-                {"X-BAPI-API-KEY": self.key, "X-BAPI-SIGN": sign},
-                body
+        try:
+            res = await self._submit_order(
+                payload,
+                lambda session=None: self._post("/v5/order/create-batch", payload, session),
+                idempotent=all(orders[i].get("client_order_id") for i in slots)
             )
-
-    async def close_position(self, symbol):
+        except Exception as e:
+            if self.gate.retry.classify(self.EXCHANGE, e) != "unknown":
+                raise
+            resolved = await self._resolve_unknown([orders[i] for i in slots], e)
+            for i, r in zip(slots, resolved):
+                results[i] = r
+            return results
+
+        items = (res.get("result") or {}).get("list") or []
+        codes = (res.get("retExtInfo") or {}).get("list") or []
+        if len(items) != len(request) or len(codes) != len(request):
+            items = codes = None
+
+        for k, i in enumerate(slots):
+            results[i] = res if items is None else {
+                "retCode": codes[k].get("code"),
+                "retMsg": codes[k].get("msg"),
+                "result": items[k]
+            }
+
+        return await self._resolve_duplicates(orders, results)
+
+    async def close_position(self, symbol, cid=None):
         # spot only: find balance and sell all
         asset = symbol.replace("USDT", "")
 
-        async with aiohttp.ClientSession() as s:
-            bal = await _http_get(s, f"{self.BASE}/v5/asset/transfer/query-asset-info?accountType=SPOT")
+        bal = await self._send("GET", f"{self.BASE}/v5/asset/transfer/query-asset-info?accountType=SPOT")
 
         for coin in bal["result"]["spot"]:
             if coin["coin"] == asset:
-                amt = float(coin["free"])
+                qty = self._round(symbol, float(coin["free"]))
                 break
         else:
             return {"msg": "nothing_to_close"}
 
-        return await self.market_sell(symbol, amt)
+        # الرصيد بالعملة نفسها — بيع الكمية مباشرة (بدون تحويل USD)
+        return await self._order(self._order_body(symbol, "Sell", qty, cid), cid)
 
 
 # ================================================================
@@ -332,38 +794,180 @@ class BybitClient:
 # ================================================================
 
 class Gate:
+    """
+    Gate ينشأ لكل جندي، لكن البنية التحتية (الجلسات + العملاء + الأسعار + حدود الطلبات + الساعة + بيانات العملات + اتصالات WS + سياسة الإعادة) مشتركة على مستوى الكلاس
+    """
+
+    sessions = SessionPool()
+    clients = ClientCache()
+    tickers = TickerStore(max_age=TICKER_MAX_AGE)
+    limiter = RateLimiter()
+    clock = ExchangeClock()
+    instruments = InstrumentRegistry()
+    ws = WSTransport()
+    retry = RetryPolicy.from_env()
+    hedge_sessions = SessionPool()   # اتصالات منفصلة لطلبات الـ hedge
+
+    # -------------------- LIFECYCLE -------------------------
+
+    @classmethod
+    async def startup(cls):
+        """
+        تجهيز الجلسات مسبقاً قبل أول إشارة
+        """
+        await cls.sessions.start()
+        await cls.clock.start(cls.sessions)
+        await cls.tickers.connect()
+        await cls.instruments.start(cls.sessions)
+
+    @classmethod
+    async def shutdown(cls):
+        await cls.clock.stop()
+        await cls.instruments.stop()
+        await cls.ws.close()
+        await cls.sessions.close()
+        await cls.hedge_sessions.close()
+        await cls.tickers.close()
+        cls.clients.clear()
+
+    @classmethod
+    def invalidate(cls, user_id):
+        """
+        تُستدعى عند وصول حدث تعديل العميل (HORUS_CLIENT_UPDATES)
+        """
+        cls.clients.invalidate(user_id)
+
+    # -------------------- CLIENT -------------------------
 
     async def _get_client(self, user_id, exchange_type):
         """
         استدعاء مفاتيح العميل من Treasury ثم اختيار الـ client الصحيح
+        (مرة واحدة فقط — بعدها من ClientCache)
         """
+        client = self.clients.get(user_id, exchange_type)
+        if client is not None:
+            return client
+
+        client = self._build_client(user_id, exchange_type)
+        self.clients.put(user_id, exchange_type, client)
+        self.ws.warm([client])
+        return client
+
+    def _build_client(self, user_id, exchange_type):
         keys = Treasury.get_keys(user_id, exchange_type)
 
         if exchange_type == "okx":
-            return OKXClient(keys["api_key"], keys["secret"], keys["passphrase"])
+            return OKXClient(keys["api_key"], keys["secret"], keys["passphrase"], self)
 
         if exchange_type == "binance":
-            return BinanceClient(keys["api_key"], keys["secret"])
+            return BinanceClient(keys["api_key"], keys["secret"], self)
 
         if exchange_type == "bybit":
-            return BybitClient(keys["api_key"], keys["secret"])
+            return BybitClient(keys["api_key"], keys["secret"], self)
 
         raise Exception(f"Unknown exchange type: {exchange_type}")
 
+    # -------------------- VALIDATION -------------------------
+
+    def _validate(self, exchange, symbol, usd=None):
+        """
+        فحص محلي قبل أي طلب شبكة (العملة مدرجة + min notional)
+        """
+        reason = self.instruments.reject_reason(exchange, symbol, usd=usd)
+        if reason:
+            raise OrderRejected(reason)
+
     # -------------------- BUY -------------------------
 
-    async def market_buy(self, user_id, symbol, usd, exchange="okx"):
+    async def market_buy(self, user_id, symbol, usd, exchange="okx", client_order_id=None):
+        self._validate(exchange, symbol, usd)
         client = await self._get_client(user_id, exchange)
-        return await client.market_buy(symbol, usd)
+        return await client.market_buy(symbol, usd, client_order_id)
 
     # -------------------- SELL -------------------------
 
-    async def market_sell(self, user_id, symbol, usd, exchange="okx"):
+    async def market_sell(self, user_id, symbol, usd, exchange="okx", client_order_id=None):
+        self._validate(exchange, symbol, usd)
         client = await self._get_client(user_id, exchange)
-        return await client.market_sell(symbol, usd)
+        return await client.market_sell(symbol, usd, client_order_id)
 
     # -------------------- CLOSE POSITION ----------------
 
-    async def close_position(self, user_id, symbol, exchange="okx"):
+    async def close_position(self, user_id, symbol, exchange="okx", client_order_id=None):
+        self._validate(exchange, symbol)
         client = await self._get_client(user_id, exchange)
-        return await client.close_position(symbol)
+        return await client.close_position(symbol, client_order_id)
+
+    # -------------------- BATCH SUBMIT ----------------
+
+    async def submit_batch(self, orders):
+        """
+        تنفيذ مجموعة أوامر (Fan-out كامل لإشارة واحدة):
+            orders = [
+                {"user_id": "u1", "exchange": "okx", "symbol": "BTC-USDT",
+                 "action": "BUY", "usd": 100, "client_order_id": "h..."},
+                ...
+            ]
+
+        • الأوامر تحت نفس المفاتيح (نفس الحساب / sub-accounts بنفس الـ key)
+          تُجمع في batch endpoint لو البورصة تدعمه
+        • CLOSE والبورصات بدون batch → أوامر منفردة
+        • client_order_id (اختياري) يجعل إعادة الإرسال آمنة (بدون تنفيذ مزدوج)
+        • يعيد قائمة بنفس ترتيب orders: رد البورصة لكل أمر أو Exception
+        """
+        results = [None] * len(orders)
+        groups = {}
+
+        for i, o in enumerate(orders):
+            try:
+                usd = o["usd"] if o["action"] in ("BUY", "SELL") else None
+                self._validate(o["exchange"], o["symbol"], usd)
+                client = await self._get_client(o["user_id"], o["exchange"])
+            except Exception as e:
+                results[i] = e
+                continue
+
+            group = groups.setdefault((o["exchange"], client.key), (client, []))
+            group[1].append(i)
+
+        jobs = []
+
+        for client, idxs in groups.values():
+            batchable = [i for i in idxs if orders[i]["action"] in ("BUY", "SELL")]
+            singles = [i for i in idxs if orders[i]["action"] not in ("BUY", "SELL")]
+
+            if client.BATCH_SIZE > 1 and len(batchable) > 1:
+                for k in range(0, len(batchable), client.BATCH_SIZE):
+                    chunk = batchable[k:k + client.BATCH_SIZE]
+                    jobs.append((chunk, True, client.batch_orders([orders[i] for i in chunk])))
+            else:
+                singles = batchable + singles
+
+            for i in singles:
+                jobs.append(([i], False, self._submit_one(orders[i])))
+
+        done = await asyncio.gather(*(job for _, _, job in jobs), return_exceptions=True)
+
+        # demultiplex: كل رد يرجع لمكان أمره الأصلي
+        for (idxs, is_batch, _), res in zip(jobs, done):
+            if not is_batch or isinstance(res, BaseException):
+                res = [res] * len(idxs)
+            for i, r in zip(idxs, res):
+                results[i] = r
+
+        return results
+
+    async def _submit_one(self, order):
+        action = order["action"]
+        cid = order.get("client_order_id")
+
+        if action == "BUY":
+            return await self.market_buy(order["user_id"], order["symbol"], order["usd"], order["exchange"], cid)
+
+        if action == "SELL":
+            return await self.market_sell(order["user_id"], order["symbol"], order["usd"], order["exchange"], cid)
+
+        if action == "CLOSE":
+            return await self.close_position(order["user_id"], order["symbol"], order["exchange"], cid)
+
+        raise Exception(f"Unknown action: {action}")
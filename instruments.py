@@ -0,0 +1,234 @@
+# ================================================================
+#  HORUS INSTRUMENTS — Lot size / Tick size / Min notional
+# ================================================================
+#  سجل بيانات العملات لكل بورصة:
+#       • OKX      → /api/v5/public/instruments?instType=SPOT
+#       • Binance  → /api/v3/exchangeInfo
+#       • Bybit    → /v5/market/instruments-info?category=spot
+#
+#  • يُحمّل عند تشغيل Gate (من الـ cache على القرص لو حديث)
+#  • يتحدّث دورياً في الخلفية
+#  • Gate يستخدمه لتقريب الكمية ورفض الأوامر محلياً قبل أي طلب شبكة
+#
+#  كل سجل:
+#     {"step": "0.00001", "min_qty": 0.00001, "tick": "0.01", "min_notional": 5.0}
+# ================================================================
+
+import asyncio
+import json
+import logging
+import os
+import time
+from decimal import Decimal, ROUND_DOWN
+
+from core.endpoints import endpoint, MOCK_EXCHANGE
+
+log = logging.getLogger("Instruments")
+
+# cache منفصل للـ mock حتى لا تختلط بياناته ببيانات البورصات الحقيقية
+CACHE_PATH = os.getenv(
+    "HORUS_INSTRUMENTS_CACHE",
+    "instruments_cache.mock.json" if MOCK_EXCHANGE else "instruments_cache.json"
+)
+REFRESH_EVERY = 3600
+
+URLS = {
+    "okx": endpoint("okx") + "/api/v5/public/instruments?instType=SPOT",
+    "binance": endpoint("binance") + "/api/v3/exchangeInfo",
+    "bybit": endpoint("bybit") + "/v5/market/instruments-info?category=spot",
+}
+
+
+# ================================================================
+#  PARSERS
+# ================================================================
+
+def parse_okx(js):
+    out = {}
+    for i in js.get("data", []):
+        if i.get("state") != "live":
+            continue
+        out[i["instId"]] = {
+            "step": i["lotSz"],
+            "min_qty": float(i["minSz"]),
+            "tick": i["tickSz"],
+            "min_notional": 0.0,
+        }
+    return out
+
+
+def parse_binance(js):
+    out = {}
+    for s in js.get("symbols", []):
+        if s.get("status") != "TRADING":
+            continue
+        f = {x["filterType"]: x for x in s.get("filters", [])}
+        lot = f.get("LOT_SIZE", {})
+        notional = f.get("NOTIONAL") or f.get("MIN_NOTIONAL") or {}
+        out[s["symbol"]] = {
+            "step": lot.get("stepSize", "0.000001"),
+            "min_qty": float(lot.get("minQty", 0)),
+            "tick": f.get("PRICE_FILTER", {}).get("tickSize", "0.01"),
+            "min_notional": float(notional.get("minNotional", 0)),
+        }
+    return out
+
+
+def parse_bybit(js):
+    out = {}
+    for s in js.get("result", {}).get("list", []):
+        if s.get("status") != "Trading":
+            continue
+        lot = s.get("lotSizeFilter", {})
+        out[s["symbol"]] = {
+            "step": lot.get("basePrecision", "0.000001"),
+            "min_qty": float(lot.get("minOrderQty", 0)),
+            "tick": s.get("priceFilter", {}).get("tickSize", "0.01"),
+            "min_notional": float(lot.get("minOrderAmt", 0)),
+        }
+    return out
+
+
+PARSERS = {
+    "okx": parse_okx,
+    "binance": parse_binance,
+    "bybit": parse_bybit,
+}
+
+
+# ================================================================
+#  ROUNDING
+# ================================================================
+
+def floor_to_step(qty, step):
+    """
+    أكبر مضاعف لـ step ≤ qty — string بدون أصفار زائدة
+    Binance يرسل step مبطّن ("0.00001000" / "1.00000000") → normalize أولاً؛
+    quantize وحده يطابق عدد المنازل العشرية فقط ولا يضمن المضاعف
+    """
+    step = Decimal(str(step)).normalize()
+    if step <= 0:
+        return format(Decimal(str(qty)).normalize(), "f")
+    q = (Decimal(str(qty)) / step).to_integral_value(rounding=ROUND_DOWN) * step
+    return format(q.normalize(), "f") if q else "0"
+
+
+# ================================================================
+#  REGISTRY
+# ================================================================
+
+class InstrumentRegistry:
+
+    def __init__(self, path=CACHE_PATH, refresh_every=REFRESH_EVERY):
+        self.path = path
+        self.refresh_every = refresh_every
+        self.data = {}          # { exchange: { symbol: {...} } }
+        self.updated = 0
+        self._task = None
+
+    # ------------------------------------------------------------
+    # LOAD / REFRESH
+    # ------------------------------------------------------------
+
+    def load_disk(self):
+        if not os.path.exists(self.path):
+            return False
+
+        with open(self.path) as f:
+            cached = json.load(f)
+
+        self.data = cached["data"]
+        self.updated = cached["updated"]
+        return True
+
+    def save_disk(self):
+        with open(self.path, "w") as f:
+            json.dump({"updated": self.updated, "data": self.data}, f)
+
+    async def fetch(self, sessions):
+        """
+        جلب بيانات البورصات الثلاث — البورصة التي تفشل تحتفظ ببياناتها القديمة
+        """
+        async def one(ex):
+            async with sessions.get(ex).get(URLS[ex]) as r:
+                return ex, PARSERS[ex](await r.json(content_type=None))
+
+        results = await asyncio.gather(*(one(ex) for ex in URLS), return_exceptions=True)
+
+        for res in results:
+            if isinstance(res, BaseException):
+                log.error(f"❌ Instruments fetch failed: {res}")
+                continue
+            ex, table = res
+            if table:
+                self.data[ex] = table
+
+        self.updated = time.time()
+        self.save_disk()
+        log.info(f"📐 Instruments loaded | " + " | ".join(f"{ex}={len(t)}" for ex, t in self.data.items()))
+
+    async def load(self, sessions):
+        if self.load_disk() and time.time() - self.updated < self.refresh_every:
+            log.info("📐 Instruments loaded from disk cache")
+        else:
+            await self.fetch(sessions)
+
+    async def start(self, sessions):
+        await self.load(sessions)
+        if self._task is None:
+            self._task = asyncio.create_task(self._refresh_loop(sessions))
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _refresh_loop(self, sessions):
+        while True:
+            await asyncio.sleep(self.refresh_every)
+            try:
+                await self.fetch(sessions)
+            except Exception as e:
+                log.error(f"❌ Instruments refresh error: {e}")
+
+    # ------------------------------------------------------------
+    # LOOKUPS
+    # ------------------------------------------------------------
+
+    def get(self, exchange, symbol):
+        return self.data.get(exchange, {}).get(symbol)
+
+    def listed(self, exchange, symbol):
+        """
+        لو لم نحمّل بيانات البورصة بعد لا نمنع أي أمر
+        """
+        table = self.data.get(exchange)
+        if not table:
+            return True
+        return symbol in table
+
+    def round_qty(self, exchange, symbol, qty):
+        """
+        تقريب الكمية لأسفل لأقرب مضاعف لـ step البورصة — يعيد string جاهز للإرسال
+        """
+        info = self.get(exchange, symbol)
+        return floor_to_step(qty, info["step"] if info else "0.000001")
+
+    def reject_reason(self, exchange, symbol, usd=None, qty=None):
+        """
+        فحص محلي قبل الإرسال — يعيد سبب الرفض أو None
+        """
+        if not self.listed(exchange, symbol):
+            return f"{symbol} not listed on {exchange}"
+
+        info = self.get(exchange, symbol)
+        if info is None:
+            return None
+
+        if usd is not None and usd < info["min_notional"]:
+            return f"{usd:.2f} USD below min notional {info['min_notional']}"
+
+        if qty is not None and float(qty) < info["min_qty"]:
+            return f"qty {qty} below min qty {info['min_qty']}"
+
+        return None
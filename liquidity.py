@@ -0,0 +1,121 @@
+# ================================================================
+#  HORUS LIQUIDITY — Vectorized, side-aware depth curves (NumPy)
+# ================================================================
+#  BUY  → نأكل asks (السعر يصعد)      SELL → نأكل bids (السعر ينزل)
+#
+#  LiquidityCurve(levels, side) — تمريرة NumPy واحدة على الكتاب:
+#       impact[i]     = |price[i] / best - 1|
+#       cum_notional  = USD المتاح حتى المستوى i
+#       cum_qty       = الكمية حتى المستوى i
+#
+#  depth(impact)  → USD متاح داخل نسبة تأثير (1% / 3% / أي مصفوفة نسب)
+#  fill(usd)      → VWAP / slippage / المنفذ فعلاً لأي حجم طلب (أو مصفوفة أحجام)
+#
+#  يُستخدم في SmartEntryEngine (wcf / wave_count) ومتاح لأي مكوّن آخر
+# ================================================================
+
+import numpy as np
+
+BUY_SIDE = "asks"
+SELL_SIDE = "bids"
+
+
+def book_side(action):
+    """
+    BUY → asks / SELL (أو CLOSE) → bids
+    """
+    return BUY_SIDE if action.upper() == "BUY" else SELL_SIDE
+
+
+class LiquidityCurve:
+
+    def __init__(self, levels, side=BUY_SIDE):
+        """
+        levels = [(price, qty), ...] بترتيب الكتاب (أفضل سعر أولاً) — strings أو floats
+        """
+        self.side = side
+        # OKX: [px, sz, "0", orders] — نأخذ أول عمودين فقط
+        arr = np.asarray(levels, dtype=np.float64)[:, :2] if len(levels) else np.empty((0, 2))
+        arr = arr[arr[:, 1] > 0]
+
+        self.price = arr[:, 0]
+        self.qty = arr[:, 1]
+        self.notional = self.price * self.qty
+        self.cum_notional = np.cumsum(self.notional)
+        self.cum_qty = np.cumsum(self.qty)
+        self.best = float(self.price[0]) if len(self.price) else None
+        self.impact = np.abs(self.price / self.best - 1) if self.best else np.empty(0)
+
+    def __bool__(self):
+        return self.best is not None
+
+    @property
+    def total(self):
+        return float(self.cum_notional[-1]) if len(self.cum_notional) else 0.0
+
+    # ------------------------------------------------------------
+
+    def depth(self, impact):
+        """
+        USD متاح حتى نسبة تأثير (0.01 = 1%) — scalar أو مصفوفة
+        """
+        impact = np.asarray(impact, dtype=np.float64)
+        if not self:
+            return np.zeros_like(impact) if impact.ndim else 0.0
+        # آخر مستوى impact ≤ band (+ tolerance لأخطاء float عند الحدود)
+        idx = np.searchsorted(self.impact, impact + 1e-12, side="right")
+        out = np.where(idx > 0, self.cum_notional[np.maximum(idx - 1, 0)], 0.0)
+        return out if impact.ndim else float(out)
+
+    def curve(self, impacts=(0.001, 0.0025, 0.005, 0.01, 0.02, 0.03, 0.05)):
+        """
+        [(impact, usd), ...] — منحنى العمق مقابل التأثير
+        """
+        return list(zip(impacts, np.atleast_1d(self.depth(impacts)).tolist()))
+
+    def fill(self, usd):
+        """
+        طلب بقيمة usd (scalar أو مصفوفة) يأكل الكتاب من أفضل سعر:
+            {"vwap", "slippage", "filled", "worst"}
+        slippage = |vwap / best - 1| — filled < usd لو الكتاب لا يكفي
+        """
+        usd = np.asarray(usd, dtype=np.float64)
+        scalar = usd.ndim == 0
+        usd = np.atleast_1d(usd)
+
+        if not self:
+            z = np.zeros_like(usd)
+            nan = np.full_like(usd, np.nan)
+            res = {"vwap": nan, "slippage": nan, "filled": z, "worst": nan}
+            return {k: float(v[0]) for k, v in res.items()} if scalar else res
+
+        n = len(self.price)
+        filled = np.minimum(usd, self.total)
+
+        # المستوى الذي ينتهي عنده الطلب
+        idx = np.minimum(np.searchsorted(self.cum_notional, filled, side="left"), n - 1)
+        before_usd = np.where(idx > 0, self.cum_notional[np.maximum(idx - 1, 0)], 0.0)
+        before_qty = np.where(idx > 0, self.cum_qty[np.maximum(idx - 1, 0)], 0.0)
+
+        qty = before_qty + (filled - before_usd) / self.price[idx]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            vwap = np.where(qty > 0, filled / qty, self.best)
+
+        res = {
+            "vwap": vwap,
+            "slippage": np.abs(vwap / self.best - 1),
+            "filled": filled,
+            "worst": self.price[idx],
+        }
+        return {k: float(v[0]) for k, v in res.items()} if scalar else res
+
+
+def compute_liquidity(levels, side=BUY_SIDE):
+    """
+    التوافق مع الواجهة القديمة: (best, liquidity_1%, liquidity_3%)
+    """
+    c = LiquidityCurve(levels or [], side)
+    if not c:
+        return None, 0, 0
+    l1, l3 = c.depth([0.01, 0.03]).tolist()
+    return c.best, l1, l3
@@ -0,0 +1,234 @@
+# ================================================================
+#  HORUS LOG WRITER — Batched async persistence (PostgreSQL)
+# ================================================================
+#  مسار التنفيذ لا ينتظر قاعدة البيانات أبداً:
+#       • record() = put_nowait في طابور محدود (ميكروثواني)
+#       • writer في الخلفية يجمع السجلات ويكتبها دفعة واحدة
+#         كل batch_size سجل أو كل flush_interval ثانية
+#       • execution_logs / wave_logs / system_logs → COPY (asyncpg)
+#       • signals / wave_signals → INSERT متعدد الصفوف ON CONFLICT DO NOTHING
+#         (لها مفاتيح فريدة — إعادة تسليم الرسالة لا تفشل الدفعة)
+#       • طابور ممتلئ → السجل يُسقط ويُعد (لا نبطئ التنفيذ)
+#       • stop() = علامة نهاية في الطابور + انتظار الـ writer حتى يكتب كل ما
+#         قبلها (لا cancel أثناء _flush — الدفعة الجارية لا تضيع)
+#
+#  الجداول: core/models.py
+# ================================================================
+
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime
+
+log = logging.getLogger("LogWriter")
+
+LOG_QUEUE_SIZE = int(os.getenv("HORUS_LOG_QUEUE", "100000"))
+LOG_BATCH_SIZE = int(os.getenv("HORUS_LOG_BATCH", "1000"))
+LOG_FLUSH_INTERVAL = float(os.getenv("HORUS_LOG_FLUSH", "0.5"))
+
+# ترتيب الكتابة داخل الدفعة (signals قبل wave_signals بسبب الـ FK)
+TABLE_ORDER = ("signals", "wave_signals", "execution_logs", "wave_logs", "system_logs")
+UPSERT_TABLES = {"signals", "wave_signals"}
+
+_STOP = object()   # علامة نهاية الطابور
+
+
+class LogWriter:
+
+    def __init__(self, max_queue=LOG_QUEUE_SIZE, batch_size=LOG_BATCH_SIZE, flush_interval=LOG_FLUSH_INTERVAL):
+        self.queue = asyncio.Queue(maxsize=max_queue)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self.written = 0
+        self.engine = None
+        self.tables = {}
+        self._insert = None
+        self._task = None
+
+    @property
+    def running(self):
+        return self._task is not None
+
+    # ------------------------------------------------------------
+    # HOT PATH
+    # ------------------------------------------------------------
+
+    def record(self, table, **row):
+        if not self.running:
+            return
+        try:
+            self.queue.put_nowait((table, row))
+        except asyncio.QueueFull:
+            self.dropped += 1
+            if self.dropped % 1000 == 1:
+                log.warning(f"⚠️ Log queue full — {self.dropped} records dropped")
+
+    def execution(self, client_id, symbol, exchange, amount, status, price=None, reason=None):
+        self.record(
+            "execution_logs",
+            client_id=str(client_id), symbol=symbol, exchange=exchange,
+            amount=float(amount or 0), price=price, status=status, reason=reason,
+            time=datetime.utcnow()
+        )
+
+    def wave(self, exchange, symbol, wave, status, details=""):
+        self.record(
+            "wave_logs",
+            exchange=exchange, symbol=symbol, wave=int(wave), status=status, details=details,
+            time=datetime.utcnow()
+        )
+
+    def signal(self, signal_id, symbol, action, risk_level="NORMAL", source=None, status="DISPATCHED"):
+        self.record(
+            "signals",
+            signal_id=signal_id, symbol=symbol, action=action,
+            risk_level=risk_level, source=source, status=status
+        )
+
+    def wave_signal(self, parent_signal_id, wave_id, symbol, action, exchange, wave_index, per_client, status="READY"):
+        self.record(
+            "wave_signals",
+            parent_signal_id=parent_signal_id, wave_id=wave_id, symbol=symbol, action=action,
+            exchange=exchange, wave_index=int(wave_index), per_client=per_client, status=status
+        )
+
+    def system(self, component, level, message):
+        self.record(
+            "system_logs",
+            component=component, level=level, message=message, time=datetime.utcnow()
+        )
+
+    def handler(self, component, level=logging.WARNING):
+        """
+        logging.Handler → system_logs (WARNING وما فوق افتراضياً)
+        """
+        return DBLogHandler(self, component, level)
+
+    # ------------------------------------------------------------
+    # LIFECYCLE
+    # ------------------------------------------------------------
+
+    async def start(self):
+        # استيراد متأخر: DB مطلوبة فقط للخدمات التي تكتب فعلاً (وليس bench / mock)
+        from sqlalchemy.dialects.postgresql import insert
+        from core.database import engine
+        from core.models import Signal, WaveSignal, ExecutionLog, WaveLog, SystemLog
+
+        self.engine = engine
+        self._insert = insert
+        self.tables = {m.__tablename__: m.__table__ for m in (Signal, WaveSignal, ExecutionLog, WaveLog, SystemLog)}
+
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+            log.info(f"🗄️ Log writer started | batch={self.batch_size} flush={self.flush_interval}s")
+
+    async def stop(self):
+        """
+        إيقاف + كتابة ما تبقى في الطابور
+        """
+        if self._task is None:
+            return
+        task, self._task = self._task, None     # record() يتوقف من هنا
+
+        if not task.done():
+            await self.queue.put(_STOP)
+            try:
+                await task
+            except Exception as e:
+                log.error(f"❌ Log writer failed while draining: {e}")
+
+        # writer مات قبل الإيقاف → ما تبقى يُكتب هنا
+        rest = []
+        while not self.queue.empty():
+            item = self.queue.get_nowait()
+            if item is not _STOP:
+                rest.append(item)
+        if rest:
+            await self._flush(rest)
+        log.info(f"🗄️ Log writer stopped | written={self.written} dropped={self.dropped}")
+
+    # ------------------------------------------------------------
+    # WRITER
+    # ------------------------------------------------------------
+
+    async def _run(self):
+        while True:
+            item = await self.queue.get()
+            if item is _STOP:
+                return
+            batch = [item]
+            stop = False
+            deadline = time.monotonic() + self.flush_interval
+
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self.queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is _STOP:
+                    stop = True
+                    break
+                batch.append(item)
+
+            await self._flush(batch)
+            if stop:
+                return
+
+    async def _flush(self, batch):
+        by_table = {}
+        for table, row in batch:
+            by_table.setdefault(table, []).append(row)
+
+        for table in TABLE_ORDER:
+            rows = by_table.get(table)
+            if not rows:
+                continue
+            for attempt in range(2):
+                try:
+                    await self._write(table, rows)
+                    self.written += len(rows)
+                    break
+                except Exception as e:
+                    if attempt:
+                        self.dropped += len(rows)
+                        log.error(f"❌ {table}: {len(rows)} records lost — {e}")
+                    else:
+                        await asyncio.sleep(1)
+
+    async def _write(self, table, rows):
+        t = self.tables[table]
+
+        async with self.engine.begin() as conn:
+            if table in UPSERT_TABLES:
+                await conn.execute(self._insert(t).values(rows).on_conflict_do_nothing())
+                return
+
+            # COPY مباشرة عبر asyncpg — أسرع طريقة لإدخال آلاف الصفوف
+            columns = list(rows[0])
+            raw = await conn.get_raw_connection()
+            await raw.driver_connection.copy_records_to_table(
+                table,
+                records=[tuple(r[c] for c in columns) for r in rows],
+                columns=columns
+            )
+
+
+class DBLogHandler(logging.Handler):
+
+    def __init__(self, writer, component, level=logging.WARNING):
+        super().__init__(level)
+        self.writer = writer
+        self.component = component
+
+    def emit(self, record):
+        if record.name == log.name:
+            return   # أخطاء الكتابة نفسها لا تدخل الطابور
+        try:
+            self.writer.system(self.component, record.levelname, self.format(record))
+        except Exception:
+            self.handleError(record)
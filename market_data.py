@@ -0,0 +1,274 @@
+# ================================================================
+# HORUS MARKET DATA — REAL-TIME TICKERS (WebSocket)
+# ================================================================
+#  خدمة مستقلة تشترك في WebSocket العام للبورصات الثلاث:
+#       • OKX      → tickers
+#       • Binance  → <symbol>@ticker
+#       • Bybit    → tickers + orderbook.1
+#
+#  وتنشر last / bid / ask في Redis hash واحد:
+#       HORUS_TICKERS   field = "<exchange>:<native symbol>"
+#
+#  Gate يقرأ السعر من هنا بدل طلب REST قبل كل أمر،
+#  ويرجع لـ REST فقط لو السعر أقدم من max_age.
+#
+#  العملات المراقبة:
+#       • HORUS_WATCH_SYMBOLS (env)  مثال: "BTC/USDT,ETH/USDT"
+#       • HORUS_ACTIVE_SYMBOLS (Redis SET) — يضيف لها Brain كل عملة تصله
+# ================================================================
+
+import asyncio
+import json
+import logging
+import os
+import time
+import redis.asyncio as redis
+import websockets
+
+from core.endpoints import endpoint
+
+log = logging.getLogger("MarketData")
+
+TICKERS_KEY = "HORUS_TICKERS"
+ACTIVE_SYMBOLS_KEY = "HORUS_ACTIVE_SYMBOLS"
+
+OKX_PUBLIC_WS = endpoint("okx", "ws_public")
+BINANCE_WS = endpoint("binance", "ws_public")
+BYBIT_SPOT_WS = endpoint("bybit", "ws_public")
+
+
+# ================================================================
+# SYMBOL MAPPING  (BTC/USDT → صيغة كل بورصة)
+# ================================================================
+
+def native_symbol(exchange, symbol):
+    if exchange == "okx":
+        return symbol.replace("/", "-").upper()
+    return symbol.replace("/", "").upper()
+
+
+# ================================================================
+# TICKER STORE
+# ================================================================
+
+class TickerStore:
+    """
+    مخزن الأسعار المشترك:
+        • نسخة داخل الذاكرة (قراءة بالميكروثانية)
+        • Redis hash مشترك بين كل الخدمات
+    كل سجل: {"last": .., "bid": .., "ask": .., "ts": epoch seconds}
+    """
+
+    def __init__(self, max_age=2.0):
+        self.max_age = max_age
+        self.r = None
+        self._local = {}
+
+    async def connect(self, redis_url="redis://localhost:6379"):
+        if self.r is None:
+            self.r = await redis.from_url(redis_url, decode_responses=True)
+
+    async def close(self):
+        if self.r is not None:
+            await self.r.close()
+            self.r = None
+
+    # ------------------------------------------------------------
+
+    def _fresh(self, tick, max_age):
+        return tick is not None and time.time() - tick["ts"] <= max_age
+
+    def put_local(self, exchange, symbol, last=None, bid=None, ask=None, ts=None):
+        field = f"{exchange}:{symbol}"
+        tick = self._local.get(field) or {"last": None, "bid": None, "ask": None}
+        tick = dict(tick)
+        if last is not None:
+            tick["last"] = float(last)
+        if bid is not None:
+            tick["bid"] = float(bid)
+        if ask is not None:
+            tick["ask"] = float(ask)
+        tick["ts"] = ts or time.time()
+        self._local[field] = tick
+        return field, tick
+
+    async def put(self, exchange, symbol, last=None, bid=None, ask=None, ts=None):
+        field, tick = self.put_local(exchange, symbol, last, bid, ask, ts)
+        if self.r is not None:
+            await self.r.hset(TICKERS_KEY, field, json.dumps(tick))
+
+    async def get(self, exchange, symbol, max_age=None):
+        """
+        يعيد آخر tick لو عمره ≤ max_age، وإلا None (على المستدعي الرجوع لـ REST)
+        """
+        max_age = self.max_age if max_age is None else max_age
+        field = f"{exchange}:{symbol}"
+
+        tick = self._local.get(field)
+        if self._fresh(tick, max_age):
+            return tick
+
+        if self.r is None:
+            return None
+
+        raw = await self.r.hget(TICKERS_KEY, field)
+        if not raw:
+            return None
+
+        tick = json.loads(raw)
+        self._local[field] = tick
+        return tick if self._fresh(tick, max_age) else None
+
+
+# ================================================================
+# MARKET DATA SERVICE
+# ================================================================
+
+class MarketDataService:
+
+    def __init__(self, symbols=None):
+        self.redis_url = "redis://localhost:6379"
+        self.r = None
+        self.store = TickerStore()
+        self.symbols = set(symbols or [])
+        self.refresh_every = 10
+
+    async def connect(self):
+        self.r = await redis.from_url(self.redis_url, decode_responses=True)
+        await self.store.connect(self.redis_url)
+        log.info("📡 Market Data connected to Redis")
+
+    async def active_symbols(self):
+        active = await self.r.smembers(ACTIVE_SYMBOLS_KEY)
+        return self.symbols | {s.upper() for s in active}
+
+    # ------------------------------------------------------------
+    # OKX
+    # ------------------------------------------------------------
+
+    async def stream_okx(self, symbols):
+        async with websockets.connect(OKX_PUBLIC_WS, ping_interval=20) as ws:
+            await ws.send(json.dumps({
+                "op": "subscribe",
+                "args": [
+                    {"channel": "tickers", "instId": native_symbol("okx", s)}
+                    for s in symbols
+                ]
+            }))
+            log.info(f"📡 OKX tickers subscribed | {len(symbols)} symbols")
+
+            async for msg in ws:
+                data = json.loads(msg)
+                for t in data.get("data", []):
+                    await self.store.put(
+                        "okx", t["instId"],
+                        last=t["last"], bid=t["bidPx"], ask=t["askPx"],
+                        ts=int(t["ts"]) / 1000
+                    )
+
+    # ------------------------------------------------------------
+    # BINANCE
+    # ------------------------------------------------------------
+
+    async def stream_binance(self, symbols):
+        streams = "/".join(f"{native_symbol('binance', s).lower()}@ticker" for s in symbols)
+
+        async with websockets.connect(f"{BINANCE_WS}?streams={streams}", ping_interval=20) as ws:
+            log.info(f"📡 Binance tickers subscribed | {len(symbols)} symbols")
+
+            async for msg in ws:
+                t = json.loads(msg).get("data")
+                if not t:
+                    continue
+                await self.store.put(
+                    "binance", t["s"],
+                    last=t["c"], bid=t["b"], ask=t["a"],
+                    ts=t["E"] / 1000
+                )
+
+    # ------------------------------------------------------------
+    # BYBIT
+    # ------------------------------------------------------------
+
+    async def stream_bybit(self, symbols):
+        async with websockets.connect(BYBIT_SPOT_WS, ping_interval=20) as ws:
+            args = []
+            for s in symbols:
+                sym = native_symbol("bybit", s)
+                args += [f"tickers.{sym}", f"orderbook.1.{sym}"]
+
+            # Bybit spot: حد أقصى 10 args لكل رسالة subscribe
+            for i in range(0, len(args), 10):
+                await ws.send(json.dumps({"op": "subscribe", "args": args[i:i + 10]}))
+            log.info(f"📡 Bybit tickers subscribed | {len(symbols)} symbols")
+
+            async for msg in ws:
+                data = json.loads(msg)
+                topic = data.get("topic", "")
+                t = data.get("data")
+                if not t:
+                    continue
+
+                ts = data.get("ts", time.time() * 1000) / 1000
+
+                if topic.startswith("tickers."):
+                    await self.store.put("bybit", t["symbol"], last=t["lastPrice"], ts=ts)
+
+                elif topic.startswith("orderbook.1."):
+                    bid = t["b"][0][0] if t.get("b") else None
+                    ask = t["a"][0][0] if t.get("a") else None
+                    await self.store.put("bybit", t["s"], bid=bid, ask=ask, ts=ts)
+
+    # ------------------------------------------------------------
+    # SUPERVISOR
+    # ------------------------------------------------------------
+
+    async def _keep_alive(self, name, stream, symbols):
+        """
+        إعادة الاتصال تلقائياً لو انقطع الـ WebSocket
+        """
+        while True:
+            try:
+                await stream(symbols)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log.error(f"❌ {name} ticker stream error: {e}")
+            log.info(f"🔄 {name}: reconnecting in 3 seconds...")
+            await asyncio.sleep(3)
+
+    async def run(self):
+        await self.connect()
+
+        tasks = []
+        watching = set()
+
+        log.info("📡 Market Data ONLINE — Publishing tickers to Redis...")
+
+        while True:
+            symbols = await self.active_symbols()
+
+            # عند تغيّر قائمة العملات نعيد الاشتراك
+            if symbols and symbols != watching:
+                for t in tasks:
+                    t.cancel()
+
+                watching = symbols
+                ordered = sorted(watching)
+                tasks = [
+                    asyncio.create_task(self._keep_alive("okx", self.stream_okx, ordered)),
+                    asyncio.create_task(self._keep_alive("binance", self.stream_binance, ordered)),
+                    asyncio.create_task(self._keep_alive("bybit", self.stream_bybit, ordered)),
+                ]
+                log.info(f"👀 Watching: {ordered}")
+
+            await asyncio.sleep(self.refresh_every)
+
+
+# ================================================================
+# ENTRY POINT
+# ================================================================
+
+if __name__ == "__main__":
+    watch = [s.strip() for s in os.getenv("HORUS_WATCH_SYMBOLS", "").split(",") if s.strip()]
+    asyncio.run(MarketDataService(watch).run())
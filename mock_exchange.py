@@ -0,0 +1,753 @@
+# ================================================================
+#  HORUS MOCK EXCHANGE — Local OKX / Binance / Bybit stand-in
+# ================================================================
+#  سيرفر محلي واحد يحاكي كل endpoints التي يستخدمها النظام
+#  (gate.py / smart_entry_engine.py / eye.py / market_data.py):
+#
+#       REST  → time / instruments / tickers / depth / orders / batch / balances
+#       WS    → public tickers  +  private order entry  +  OKX orders channel
+#
+#  كل بورصة تحت prefix خاص بها على نفس المنفذ:
+#       http://127.0.0.1:8900/okx/api/v5/...      ws://127.0.0.1:8900/okx/ws/private
+#
+#  تشغيل الخدمات ضد الـ mock:
+#       HORUS_MOCK_EXCHANGE=127.0.0.1:8900   (core/endpoints.py)
+#
+#  قابل للضبط (benchmarks قابلة للتكرار):
+#       --latency-ms / --jitter-ms   زمن الرد لكل طلب
+#       --error-rate                 رفض مؤقت (كود retry الخاص بكل بورصة)
+#       --timeout-rate               الأمر يُسجّل ثم لا يصل رد (يختبر client order id)
+#       --rate-limit                 طلبات/ثانية لكل بورصة ← 429
+#       --seed                       نفس تسلسل الأخطاء في كل تشغيل
+#
+#  client id مكرر = duplicate فقط بين الأوامر المفتوحة (Binance / OKX)
+#  market orders تُنفّذ فوراً → نفس الـ id يُقبل كأمر جديد ويُحسب في
+#  "reused" (= تنفيذ مزدوج) — Bybit فقط يرفض الـ id دائماً (PERMANENT_CID)
+#
+#  LOT_SIZE يُفحص لكل أمر (مضاعف step + min qty) → رفض بكود كل بورصة
+#  (Binance: step مبطّن، XRP / DOGE بخطوة "1.00000000")
+#
+#  إحصاءات:  GET /mock/stats      |  صفقة كابتن:  POST /mock/fill
+# ================================================================
+
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import random
+import time
+from decimal import Decimal, InvalidOperation
+
+from aiohttp import web, WSMsgType
+
+log = logging.getLogger("MockExchange")
+
+DEFAULT_SYMBOLS = ["BTC/USDT", "ETH/USDT", "SOL/USDT", "XRP/USDT", "DOGE/USDT"]
+
+BASE_PRICES = {"BTC": 65000.0, "ETH": 3200.0, "SOL": 150.0, "XRP": 0.55, "DOGE": 0.12}
+
+# الرفض المؤقت (آمن للإعادة) و"تجاوز الحد" و"مكرر" بصيغة كل بورصة
+RETRY_ERROR = {"okx": "50001", "binance": -1008, "bybit": 10016}
+THROTTLE_ERROR = {"okx": "50011", "binance": -1003, "bybit": 10006}
+DUPLICATE_ERROR = {"okx": "51016", "binance": -2010, "bybit": 110072}
+PERMANENT_CID = {"bybit"}
+
+# LOT_SIZE — نفس القيم التي تعيدها endpoints الـ instruments (Binance مبطّن كالحقيقي)
+LOT_ERROR = {"okx": ("51121", "Order quantity must be a multiple of the lot size"),
+             "binance": (-1013, "Filter failure: LOT_SIZE"),
+             "bybit": (170137, "Order quantity has too many decimals")}
+INTEGER_LOT = {"XRP", "DOGE"}   # Binance: stepSize "1.00000000"
+
+
+def lot_size(exchange, symbol):
+    """
+    (step, min_qty) كـ strings بصيغة البورصة
+    """
+    if exchange == "okx":
+        return "0.00000001", "0.00001"
+    if exchange == "binance":
+        if symbol.split("/")[0] in INTEGER_LOT:
+            return "1.00000000", "1.00000000"
+        return "0.00001000", "0.00001000"
+    return "0.000001", "0.000001"
+
+
+def native(exchange, symbol):
+    if exchange == "okx":
+        return symbol.replace("/", "-")
+    return symbol.replace("/", "")
+
+
+# ================================================================
+#  MARKET STATE
+# ================================================================
+
+class Market:
+    """
+    أسعار random walk + دفتر أوامر مولّد حول السعر (نفس الدفتر للبورصات الثلاث)
+    """
+
+    def __init__(self, symbols, depth=40, rng=None):
+        self.rng = rng or random.Random()
+        self.depth = depth
+        self.prices = {s: BASE_PRICES.get(s.split("/")[0], 10.0) for s in symbols}
+
+    def symbols(self):
+        return list(self.prices)
+
+    def unified(self, exchange, symbol):
+        for s in self.prices:
+            if native(exchange, s) == symbol:
+                return s
+        return None
+
+    def tick(self):
+        for s, p in self.prices.items():
+            self.prices[s] = p * (1 + self.rng.gauss(0, 0.0005))
+
+    def price(self, symbol):
+        return self.prices[symbol]
+
+    def book(self, symbol):
+        p = self.prices[symbol]
+        step = p * 0.0005
+        asks = [[f"{p + step * (i + 1):.8g}", f"{(i + 1) * 2000 / p:.6f}"] for i in range(self.depth)]
+        bids = [[f"{p - step * (i + 1):.8g}", f"{(i + 1) * 2000 / p:.6f}"] for i in range(self.depth)]
+        return bids, asks
+
+
+# ================================================================
+#  MOCK EXCHANGE
+# ================================================================
+
+class MockExchange:
+
+    def __init__(self, symbols=DEFAULT_SYMBOLS, latency_ms=20, jitter_ms=5,
+                 error_rate=0.0, timeout_rate=0.0, rate_limit=0, seed=None, tick_interval=0.5):
+        self.rng = random.Random(seed)
+        self.market = Market(symbols, rng=self.rng)
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.timeout_rate = timeout_rate
+        self.rate_limit = rate_limit
+        self.tick_interval = tick_interval
+
+        self.orders = {ex: {} for ex in ("okx", "binance", "bybit")}   # client id → order
+        self.windows = {}          # exchange → (second, count)
+        self.stats = {"requests": 0, "orders": 0, "duplicates": 0, "reused": 0, "errors": 0,
+                      "timeouts": 0, "throttled": 0, "lot_rejects": 0}
+        self.private = {"okx": set()}   # WS مشتركين في orders channel
+        self.public = {ex: {} for ex in ("okx", "binance", "bybit")}   # ws → symbols
+        self._ids = itertools.count(1)
+
+    # ------------------------------------------------------------
+    # FAULTS
+    # ------------------------------------------------------------
+
+    async def delay(self):
+        ms = max(0.0, self.rng.gauss(self.latency_ms, self.jitter_ms))
+        await asyncio.sleep(ms / 1000)
+
+    def throttled(self, exchange):
+        if not self.rate_limit:
+            return False
+        now = int(time.time())
+        second, count = self.windows.get(exchange, (now, 0))
+        if second != now:
+            second, count = now, 0
+        count += 1
+        self.windows[exchange] = (second, count)
+        return count > self.rate_limit
+
+    def fault(self):
+        """
+        None | "error" | "timeout"
+        """
+        x = self.rng.random()
+        if x < self.error_rate:
+            return "error"
+        if x < self.error_rate + self.timeout_rate:
+            return "timeout"
+        return None
+
+    # ------------------------------------------------------------
+    # ORDER BOOKING
+    # ------------------------------------------------------------
+
+    def lot_error(self, exchange, symbol, qty):
+        """
+        None | (code, msg) — الكمية ليست مضاعفاً لـ step أو أقل من الحد الأدنى
+        """
+        unified = self.market.unified(exchange, symbol)
+        if unified is None:
+            return None
+        step, min_qty = (Decimal(v) for v in lot_size(exchange, unified))
+        try:
+            q = Decimal(str(qty))
+        except InvalidOperation:
+            q = Decimal(-1)
+        if q < min_qty or q % step != 0:
+            self.stats["lot_rejects"] += 1
+            return LOT_ERROR[exchange]
+        return None
+
+    def book_order(self, exchange, symbol, side, qty, cid=None):
+        """
+        يعيد (order, duplicate)
+        duplicate = الـ id لأمر مفتوح (أو أي أمر سابق على PERMANENT_CID)
+        """
+        book = self.orders[exchange]
+        prev = book.get(cid) if cid else None
+        if prev is not None:
+            if exchange in PERMANENT_CID or prev["status"] == "open":
+                self.stats["duplicates"] += 1
+                return prev, True
+            self.stats["reused"] += 1
+
+        unified = self.market.unified(exchange, symbol)
+        price = self.market.price(unified) if unified else 0.0
+        order = {
+            "ordId": str(next(self._ids)),
+            "clientId": cid or "",
+            "symbol": symbol,
+            "side": side.lower(),
+            "qty": str(qty),
+            "price": price,
+            "ts": int(time.time() * 1000),
+            "status": "filled",    # market order — لا يبقى مفتوحاً
+        }
+        book[cid or order["ordId"]] = order
+        self.stats["orders"] += 1
+        return order, False
+
+    async def push_fill(self, order, parts=1, gap_ms=20):
+        """
+        OKX orders channel — نفس شكل الـ Fill event الذي يقرأه eye.py
+        (فقط صفقات /mock/fill — أوامر الأسطول لا تُرسل للعين وإلا تتكرر الإشارة)
+        parts > 1 → الأمر يتنفذ على أجزاء (partially_filled ... filled)
+        """
+        qty = float(order["qty"])
+        acc = notional = 0.0
+
+        for i in range(parts):
+            last = i == parts - 1
+            sz = qty - acc if last else qty / parts
+            px = order["price"] * (1 + self.rng.gauss(0, 0.0002))
+            acc += sz
+            notional += sz * px
+
+            msg = json.dumps({
+                "arg": {"channel": "orders"},
+                "data": [{
+                    "instId": order["symbol"],
+                    "ordId": order["ordId"],
+                    "clOrdId": order["clientId"],
+                    "side": order["side"],
+                    "fillSz": f"{sz:.8g}",
+                    "fillPx": f"{px:.8g}",
+                    "accFillSz": f"{acc:.8g}",
+                    "avgPx": f"{notional / acc:.8g}",
+                    "state": "filled" if last else "partially_filled",
+                    "uTime": str(order["ts"]),
+                }]
+            })
+            for ws in list(self.private["okx"]):
+                try:
+                    await ws.send_str(msg)
+                except Exception:
+                    self.private["okx"].discard(ws)
+
+            if not last:
+                await asyncio.sleep(gap_ms / 1000)
+
+    # ------------------------------------------------------------
+    # REQUEST WRAPPER
+    # ------------------------------------------------------------
+
+    def guarded(self, exchange, handler, order=False):
+        """
+        latency + rate limit + (للأوامر) error / timeout injection
+        """
+        async def wrapped(request):
+            self.stats["requests"] += 1
+            await self.delay()
+
+            if self.throttled(exchange):
+                self.stats["throttled"] += 1
+                return web.json_response(
+                    error_body(exchange, THROTTLE_ERROR[exchange], "Too many requests"),
+                    status=429, headers={"Retry-After": "1"}
+                )
+
+            fault = self.fault() if order else None
+            if fault == "error":
+                self.stats["errors"] += 1
+                return web.json_response(error_body(exchange, RETRY_ERROR[exchange], "Service temporarily unavailable"))
+
+            res = await handler(request)
+
+            if fault == "timeout":
+                # الأمر سُجّل لكن الرد لا يصل (العميل يرى timeout)
+                self.stats["timeouts"] += 1
+                await asyncio.sleep(3600)
+            return res
+
+        return wrapped
+
+    # ------------------------------------------------------------
+    # OKX
+    # ------------------------------------------------------------
+
+    def okx_order(self, body):
+        lot = self.lot_error("okx", body["instId"], body["sz"])
+        if lot:
+            return {"sCode": lot[0], "sMsg": lot[1], "ordId": "", "clOrdId": body.get("clOrdId", "")}
+        order, dup = self.book_order("okx", body["instId"], body["side"], body["sz"], body.get("clOrdId"))
+        if dup:
+            return {"sCode": DUPLICATE_ERROR["okx"], "sMsg": "Duplicated clOrdId",
+                    "ordId": "", "clOrdId": order["clientId"]}
+        return {"sCode": "0", "sMsg": "", "ordId": order["ordId"], "clOrdId": order["clientId"]}
+
+    def okx_reply(self, items):
+        ok = [d for d in items if d["sCode"] == "0"]
+        code = "0" if len(ok) == len(items) else ("1" if not ok else "2")
+        return {"code": code, "msg": "", "data": items}
+
+    async def okx_time(self, request):
+        return web.json_response({"code": "0", "data": [{"ts": str(int(time.time() * 1000))}]})
+
+    async def okx_instruments(self, request):
+        return web.json_response({"code": "0", "data": [
+            {"instId": native("okx", s), "state": "live", "lotSz": lot_size("okx", s)[0],
+             "minSz": lot_size("okx", s)[1], "tickSz": "0.0001"}
+            for s in self.market.symbols()
+        ]})
+
+    async def okx_books(self, request):
+        s = self.market.unified("okx", request.query["instId"])
+        if s is None:
+            return web.json_response({"code": "51001", "msg": "Instrument ID does not exist", "data": []})
+        bids, asks = self.market.book(s)
+        return web.json_response({"code": "0", "data": [{"asks": asks, "bids": bids, "ts": str(int(time.time() * 1000))}]})
+
+    async def okx_place(self, request):
+        return web.json_response(self.okx_reply([self.okx_order(await request.json())]))
+
+    async def okx_batch(self, request):
+        return web.json_response(self.okx_reply([self.okx_order(b) for b in await request.json()]))
+
+    async def okx_get_order(self, request):
+        order = self.orders["okx"].get(request.query.get("clOrdId"))
+        if order is None:
+            return web.json_response({"code": "51603", "msg": "Order does not exist", "data": []})
+        return web.json_response({"code": "0", "data": [{
+            "instId": order["symbol"], "ordId": order["ordId"], "clOrdId": order["clientId"],
+            "state": "filled", "fillSz": order["qty"], "avgPx": f"{order['price']:.8g}"
+        }]})
+
+    async def okx_balance(self, request):
+        ccy = request.query.get("ccy", "BTC")
+        return web.json_response({"code": "0", "data": [{"details": [{"ccy": ccy, "cashBal": "0.01"}]}]})
+
+    # ------------------------------------------------------------
+    # BINANCE
+    # ------------------------------------------------------------
+
+    async def params(self, request):
+        """
+        Gate يرسل JSON — البورصة الحقيقية تقبل query / form
+        """
+        params = dict(request.query)
+        if request.can_read_body:
+            try:
+                params.update(await request.json())
+            except Exception:
+                params.update(await request.post())
+        return params
+
+    def binance_order_result(self, order):
+        return {
+            "symbol": order["symbol"], "orderId": int(order["ordId"]),
+            "clientOrderId": order["clientId"], "status": "FILLED",
+            "executedQty": order["qty"], "transactTime": order["ts"],
+            "fills": [{"price": f"{order['price']:.8g}", "qty": order["qty"]}]
+        }
+
+    def binance_order(self, p):
+        lot = self.lot_error("binance", p["symbol"], p["quantity"])
+        if lot:
+            return {"code": lot[0], "msg": lot[1]}
+        order, dup = self.book_order("binance", p["symbol"], p["side"], p["quantity"], p.get("newClientOrderId"))
+        if dup:
+            return {"code": DUPLICATE_ERROR["binance"], "msg": "Duplicate order sent."}
+        return self.binance_order_result(order)
+
+    async def binance_time(self, request):
+        return web.json_response({"serverTime": int(time.time() * 1000)})
+
+    async def binance_exchange_info(self, request):
+        return web.json_response({"symbols": [
+            {"symbol": native("binance", s), "status": "TRADING", "filters": [
+                {"filterType": "LOT_SIZE", "stepSize": lot_size("binance", s)[0], "minQty": lot_size("binance", s)[1]},
+                {"filterType": "PRICE_FILTER", "tickSize": "0.01000000"},
+                {"filterType": "NOTIONAL", "minNotional": "5.00000000"},
+            ]}
+            for s in self.market.symbols()
+        ]})
+
+    async def binance_depth(self, request):
+        s = self.market.unified("binance", request.query["symbol"])
+        if s is None:
+            return web.json_response({"code": -1121, "msg": "Invalid symbol."}, status=400)
+        bids, asks = self.market.book(s)
+        return web.json_response({"lastUpdateId": int(time.time() * 1000), "bids": bids, "asks": asks})
+
+    async def binance_price(self, request):
+        sym = request.query["symbol"]
+        s = self.market.unified("binance", sym)
+        if s is None:
+            return web.json_response({"code": -1121, "msg": "Invalid symbol."}, status=400)
+        return web.json_response({"symbol": sym, "price": f"{self.market.price(s):.8g}"})
+
+    async def binance_place(self, request):
+        return web.json_response(self.binance_order(await self.params(request)))
+
+    async def binance_get_order(self, request):
+        order = self.orders["binance"].get(request.query.get("origClientOrderId"))
+        if order is None:
+            return web.json_response({"code": -2013, "msg": "Order does not exist."}, status=400)
+        return web.json_response(self.binance_order_result(order))
+
+    async def binance_account(self, request):
+        return web.json_response({"balances": [
+            {"asset": s.split("/")[0], "free": "0.01", "locked": "0"} for s in self.market.symbols()
+        ]})
+
+    # ------------------------------------------------------------
+    # BYBIT
+    # ------------------------------------------------------------
+
+    def bybit_order(self, body):
+        lot = self.lot_error("bybit", body["symbol"], body["qty"])
+        if lot:
+            return lot[0], lot[1], {}
+        order, dup = self.book_order("bybit", body["symbol"], body["side"], body["qty"], body.get("orderLinkId"))
+        if dup:
+            return DUPLICATE_ERROR["bybit"], "OrderLinkedID is duplicate", {}
+        return 0, "OK", {"orderId": order["ordId"], "orderLinkId": order["clientId"]}
+
+    async def bybit_time(self, request):
+        return web.json_response({"retCode": 0, "time": int(time.time() * 1000)})
+
+    async def bybit_instruments(self, request):
+        return web.json_response({"retCode": 0, "result": {"list": [
+            {"symbol": native("bybit", s), "status": "Trading",
+             "lotSizeFilter": {"basePrecision": lot_size("bybit", s)[0], "minOrderQty": lot_size("bybit", s)[1],
+                               "minOrderAmt": "1"},
+             "priceFilter": {"tickSize": "0.01"}}
+            for s in self.market.symbols()
+        ]}})
+
+    async def bybit_orderbook(self, request):
+        sym = request.query["symbol"]
+        s = self.market.unified("bybit", sym)
+        if s is None:
+            return web.json_response({"retCode": 10001, "retMsg": "Not supported symbols", "result": {}})
+        bids, asks = self.market.book(s)
+        return web.json_response({"retCode": 0, "result": {"s": sym, "a": asks, "b": bids, "ts": int(time.time() * 1000)}})
+
+    async def bybit_tickers(self, request):
+        sym = request.query["symbol"]
+        s = self.market.unified("bybit", sym)
+        if s is None:
+            return web.json_response({"retCode": 10001, "retMsg": "Not supported symbols", "result": {}})
+        return web.json_response({"retCode": 0, "result": {"list": [
+            {"symbol": sym, "lastPrice": f"{self.market.price(s):.8g}"}
+        ]}})
+
+    async def bybit_place(self, request):
+        code, msg, result = self.bybit_order(await request.json())
+        return web.json_response({"retCode": code, "retMsg": msg, "result": result})
+
+    async def bybit_batch(self, request):
+        items, infos = [], []
+        for body in (await request.json())["request"]:
+            code, msg, result = self.bybit_order(body)
+            items.append(result)
+            infos.append({"code": code, "msg": msg})
+        return web.json_response({"retCode": 0, "retMsg": "OK",
+                                  "result": {"list": items}, "retExtInfo": {"list": infos}})
+
+    async def bybit_get_order(self, request):
+        order = self.orders["bybit"].get(request.query.get("orderLinkId"))
+        found = [] if order is None else [{
+            "orderId": order["ordId"], "orderLinkId": order["clientId"], "symbol": order["symbol"],
+            "orderStatus": "Filled", "cumExecQty": order["qty"], "avgPrice": f"{order['price']:.8g}"
+        }]
+        return web.json_response({"retCode": 0, "retMsg": "OK", "result": {"list": found}})
+
+    async def bybit_balance(self, request):
+        return web.json_response({"retCode": 0, "result": {"spot": [
+            {"coin": s.split("/")[0], "free": "0.01"} for s in self.market.symbols()
+        ]}})
+
+    # ------------------------------------------------------------
+    # WEBSOCKET — PRIVATE (order entry + OKX orders channel)
+    # ------------------------------------------------------------
+
+    async def ws_private(self, request, exchange):
+        ws = web.WebSocketResponse(heartbeat=15)
+        await ws.prepare(request)
+
+        try:
+            async for msg in ws:
+                if msg.type != WSMsgType.TEXT:
+                    continue
+                req = json.loads(msg.data)
+                asyncio.get_running_loop().create_task(self.ws_handle(ws, exchange, req))
+        finally:
+            self.private.get(exchange, set()).discard(ws)
+
+        return ws
+
+    async def ws_handle(self, ws, exchange, req):
+        op = req.get("op") or req.get("method")
+
+        # ---- auth (بدون تحقق من التوقيع) ----
+        if op == "login":
+            return await ws.send_json({"event": "login", "code": "0", "msg": ""})
+        if op == "auth":
+            return await ws.send_json({"op": "auth", "success": True, "retCode": 0, "retMsg": ""})
+        if op == "subscribe":
+            self.private.setdefault(exchange, set()).add(ws)
+            return await ws.send_json({"event": "subscribe", "arg": (req.get("args") or [{}])[0]})
+
+        self.stats["requests"] += 1
+        await self.delay()
+
+        fault = self.fault()
+        if fault == "timeout":
+            self.stats["timeouts"] += 1
+        elif fault == "error":
+            self.stats["errors"] += 1
+
+        if exchange == "okx":
+            if fault == "error":
+                reply = {"id": req["id"], "op": op, "code": RETRY_ERROR["okx"], "msg": "Service temporarily unavailable", "data": []}
+            else:
+                reply = dict(self.okx_reply([self.okx_order(b) for b in req["args"]]), id=req["id"], op=op)
+
+        elif exchange == "binance":
+            if fault == "error":
+                reply = {"id": req["id"], "status": 503, "error": {"code": RETRY_ERROR["binance"], "msg": "Server is currently overloaded"}}
+            else:
+                res = self.binance_order(req["params"])
+                reply = {"id": req["id"], "status": 400 if "code" in res else 200}
+                reply["error" if "code" in res else "result"] = res
+
+        else:
+            if fault == "error":
+                reply = {"reqId": req["reqId"], "op": op, "retCode": RETRY_ERROR["bybit"], "retMsg": "Server timeout", "data": {}}
+            elif op == "order.create-batch":
+                items, infos = [], []
+                for body in req["args"][0]["request"]:
+                    code, msg, result = self.bybit_order(body)
+                    items.append(result)
+                    infos.append({"code": code, "msg": msg})
+                reply = {"reqId": req["reqId"], "op": op, "retCode": 0, "retMsg": "OK",
+                         "data": {"list": items}, "retExtInfo": {"list": infos}}
+            else:
+                code, msg, result = self.bybit_order(req["args"][0])
+                reply = {"reqId": req["reqId"], "op": op, "retCode": code, "retMsg": msg, "data": result}
+
+        if fault != "timeout" and not ws.closed:
+            await ws.send_json(reply)
+
+    # ------------------------------------------------------------
+    # WEBSOCKET — PUBLIC (tickers + best bid/ask)
+    # ------------------------------------------------------------
+
+    async def ws_public(self, request, exchange):
+        ws = web.WebSocketResponse(heartbeat=15)
+        await ws.prepare(request)
+        symbols = self.public[exchange][ws] = set()
+
+        if exchange == "binance":
+            # /stream?streams=btcusdt@ticker/ethusdt@ticker
+            for stream in request.query.get("streams", "").split("/"):
+                if stream:
+                    symbols.add(stream.split("@")[0].upper())
+
+        try:
+            async for msg in ws:
+                if msg.type != WSMsgType.TEXT:
+                    continue
+                req = json.loads(msg.data)
+                if req.get("op") != "subscribe":
+                    continue
+                for arg in req.get("args", []):
+                    if isinstance(arg, dict):
+                        symbols.add(arg["instId"])
+                    else:
+                        symbols.add(arg.split(".")[-1])
+        finally:
+            self.public[exchange].pop(ws, None)
+
+        return ws
+
+    def ticker_messages(self, exchange, symbol):
+        s = self.market.unified(exchange, symbol)
+        if s is None:
+            return []
+        p = self.market.price(s)
+        bid, ask = f"{p * 0.9999:.8g}", f"{p * 1.0001:.8g}"
+        now = int(time.time() * 1000)
+
+        if exchange == "okx":
+            return [{"arg": {"channel": "tickers", "instId": symbol},
+                     "data": [{"instId": symbol, "last": f"{p:.8g}", "bidPx": bid, "askPx": ask, "ts": str(now)}]}]
+        if exchange == "binance":
+            return [{"stream": f"{symbol.lower()}@ticker",
+                     "data": {"s": symbol, "c": f"{p:.8g}", "b": bid, "a": ask, "E": now}}]
+        return [
+            {"topic": f"tickers.{symbol}", "ts": now, "data": {"symbol": symbol, "lastPrice": f"{p:.8g}"}},
+            {"topic": f"orderbook.1.{symbol}", "ts": now, "data": {"s": symbol, "b": [[bid, "1"]], "a": [[ask, "1"]]}},
+        ]
+
+    async def ticker_loop(self):
+        while True:
+            await asyncio.sleep(self.tick_interval)
+            self.market.tick()
+            for exchange, conns in self.public.items():
+                for ws, symbols in list(conns.items()):
+                    try:
+                        for symbol in list(symbols):
+                            for m in self.ticker_messages(exchange, symbol):
+                                await ws.send_json(m)
+                    except Exception:
+                        conns.pop(ws, None)
+
+    # ------------------------------------------------------------
+    # CONTROL
+    # ------------------------------------------------------------
+
+    async def mock_stats(self, request):
+        return web.json_response(dict(self.stats, booked={ex: len(o) for ex, o in self.orders.items()}))
+
+    async def mock_fill(self, request):
+        """
+        صفقة كابتن مصطنعة → OKX orders channel → eye.py → Brain
+        body = {"symbol": "BTC-USDT", "side": "buy", "qty": "0.01", "parts": 5, "gap_ms": 20}
+        """
+        body = await request.json()
+        order, _ = self.book_order("okx", body["symbol"], body.get("side", "buy"), body.get("qty", "0.01"))
+        await self.push_fill(order, int(body.get("parts", 1)), float(body.get("gap_ms", 20)))
+        return web.json_response(order)
+
+    async def mock_reset(self, request):
+        for book in self.orders.values():
+            book.clear()
+        for k in self.stats:
+            self.stats[k] = 0
+        return web.json_response({"ok": True})
+
+    # ------------------------------------------------------------
+    # APP
+    # ------------------------------------------------------------
+
+    def app(self):
+        g = self.guarded
+        app = web.Application()
+        app.add_routes([
+            # OKX
+            web.get("/okx/api/v5/public/time", self.okx_time),
+            web.get("/okx/api/v5/public/instruments", self.okx_instruments),
+            web.get("/okx/api/v5/market/books", g("okx", self.okx_books)),
+            web.post("/okx/api/v5/trade/order", g("okx", self.okx_place, order=True)),
+            web.post("/okx/api/v5/trade/batch-orders", g("okx", self.okx_batch, order=True)),
+            web.get("/okx/api/v5/trade/order", g("okx", self.okx_get_order)),
+            web.get("/okx/api/v5/account/balance", g("okx", self.okx_balance)),
+            web.get("/okx/ws/private", lambda r: self.ws_private(r, "okx")),
+            web.get("/okx/ws/public", lambda r: self.ws_public(r, "okx")),
+
+            # BINANCE
+            web.get("/binance/api/v3/time", self.binance_time),
+            web.get("/binance/api/v3/exchangeInfo", self.binance_exchange_info),
+            web.get("/binance/api/v3/depth", g("binance", self.binance_depth)),
+            web.get("/binance/api/v3/ticker/price", g("binance", self.binance_price)),
+            web.post("/binance/api/v3/order", g("binance", self.binance_place, order=True)),
+            web.get("/binance/api/v3/order", g("binance", self.binance_get_order)),
+            web.get("/binance/api/v3/account", g("binance", self.binance_account)),
+            web.get("/binance/ws/private", lambda r: self.ws_private(r, "binance")),
+            web.get("/binance/ws/public", lambda r: self.ws_public(r, "binance")),
+
+            # BYBIT
+            web.get("/bybit/v5/market/time", self.bybit_time),
+            web.get("/bybit/v5/market/instruments-info", self.bybit_instruments),
+            web.get("/bybit/v5/market/orderbook", g("bybit", self.bybit_orderbook)),
+            web.get("/bybit/v5/market/tickers", g("bybit", self.bybit_tickers)),
+            web.post("/bybit/v5/order/create", g("bybit", self.bybit_place, order=True)),
+            web.post("/bybit/v5/order/create-batch", g("bybit", self.bybit_batch, order=True)),
+            web.get("/bybit/v5/order/realtime", g("bybit", self.bybit_get_order)),
+            web.get("/bybit/v5/asset/transfer/query-asset-info", g("bybit", self.bybit_balance)),
+            web.get("/bybit/ws/private", lambda r: self.ws_private(r, "bybit")),
+            web.get("/bybit/ws/public", lambda r: self.ws_public(r, "bybit")),
+
+            # CONTROL
+            web.get("/mock/stats", self.mock_stats),
+            web.post("/mock/fill", self.mock_fill),
+            web.post("/mock/reset", self.mock_reset),
+        ])
+
+        async def ticker_task(app):
+            task = asyncio.create_task(self.ticker_loop())
+            yield
+            task.cancel()
+
+        app.cleanup_ctx.append(ticker_task)
+        return app
+
+
+def error_body(exchange, code, msg):
+    if exchange == "okx":
+        return {"code": code, "msg": msg, "data": []}
+    if exchange == "binance":
+        return {"code": code, "msg": msg}
+    return {"retCode": code, "retMsg": msg, "result": {}}
+
+
+# ================================================================
+#  ENTRY POINT
+# ================================================================
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description="HORUS local mock exchange (OKX / Binance / Bybit)")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8900)
+    p.add_argument("--symbols", default=",".join(DEFAULT_SYMBOLS))
+    p.add_argument("--latency-ms", type=float, default=20)
+    p.add_argument("--jitter-ms", type=float, default=5)
+    p.add_argument("--error-rate", type=float, default=0.0)
+    p.add_argument("--timeout-rate", type=float, default=0.0)
+    p.add_argument("--rate-limit", type=int, default=0, help="requests/second per exchange (0 = off)")
+    p.add_argument("--seed", type=int, default=None)
+    return p.parse_args(argv)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    args = parse_args()
+
+    mock = MockExchange(
+        symbols=[s.strip() for s in args.symbols.split(",") if s.strip()],
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        timeout_rate=args.timeout_rate,
+        rate_limit=args.rate_limit,
+        seed=args.seed,
+    )
+    log.info(f"🧪 Mock exchange on {args.host}:{args.port} — set HORUS_MOCK_EXCHANGE={args.host}:{args.port}")
+    web.run_app(mock.app(), host=args.host, port=args.port)
@@ -0,0 +1,162 @@
+# ================================================================
+#  HORUS ORDER POLICY — Client order IDs / Retries / Hedging
+# ================================================================
+#  • كل أمر يحمل client order id ثابت:
+#       hash(signal_id + wave + client)  → نفس الأمر = نفس الـ id دائماً
+#    لكن "مكرر" يعني أشياء مختلفة حسب البورصة:
+#       Bybit orderLinkId          → فريد دائماً (PERMANENT_CID)
+#       Binance newClientOrderId   → فريد بين الأوامر المفتوحة فقط
+#       OKX clOrdId                → نفس الشيء (نعامله بحذر)
+#    market order نُفّذ = لم يعد مفتوحاً → نفس الـ id يُقبل ويُنفّذ مرة ثانية
+#
+#  • تصنيف نتيجة كل محاولة:
+#       done       → رد نهائي (نجاح أو رفض نهائي مثل رصيد غير كافٍ)
+#       retry      → البورصة رفضت الأمر ولم يُنفّذ (آمن إعادة الإرسال)
+#       unknown    → لا نعرف هل نُفّذ (timeout / انقطاع):
+#                    ننتظر recv window ثم نبحث بالـ client id (lookup)
+#                    found → نعيد حالته / missing → إعادة / غير ذلك → لا إعادة
+#       duplicate  → الأمر موجود مسبقاً → نجلب حالته بالـ client id
+#       fatal      → خطأ محلي (exception) — لا إعادة
+#
+#  • Hedging: لو لم يصل رد خلال hedge_delay نرسل نفس الأمر (نفس الـ id)
+#    عبر اتصال ثانٍ، وأول رد ناجح يفوز — فقط على PERMANENT_CID
+#    (غير ذلك النسخة الثانية قد تُنفّذ بعد اكتمال الأولى)
+# ================================================================
+
+import asyncio
+import hashlib
+import os
+
+import aiohttp
+
+
+def client_order_id(signal_id, user_id, wave=0):
+    """
+    id ثابت (32 حرف a-z0-9) — مقبول في OKX clOrdId / Binance newClientOrderId / Bybit orderLinkId
+    """
+    digest = hashlib.sha256(f"{signal_id}|{wave}|{user_id}".encode()).hexdigest()
+    return "h" + digest[:31]
+
+
+# رفض مؤكد — الأمر لم يُنفّذ
+RETRY_CODES = {
+    "okx": {"50001", "50013", "50026", "50102"},
+    "binance": {-1008, -1016, -1021},
+    "bybit": {10002, 10016},
+}
+
+# حالة التنفيذ غير معروفة
+UNKNOWN_CODES = {
+    "okx": {"50004"},
+    "binance": {-1001, -1006, -1007},
+    "bybit": {10000},
+}
+
+DUPLICATE_CODES = {
+    "okx": {"51016"},
+    "binance": {-2010},      # مع "Duplicate" في الرسالة
+    "bybit": {110072},
+}
+
+# البحث بالـ client id: الأمر غير موجود (لم يصل للبورصة)
+NOT_FOUND_CODES = {
+    "okx": {"51603"},
+    "binance": {-2013},
+    "bybit": {110001},
+}
+
+# البورصات التي ترفض client id مستخدماً سابقاً دائماً (وليس فقط بين المفتوحة)
+PERMANENT_CID = {"bybit"}
+
+# أكواد الوقت — نعيد مزامنة الساعة قبل المحاولة التالية
+CLOCK_CODES = {
+    "okx": {"50102"},
+    "binance": {-1021},
+    "bybit": {10002},
+}
+
+
+def response_code(exchange, res):
+    """
+    استخراج كود الخطأ من رد البورصة (أو من أول أمر في رد OKX)
+    """
+    if not isinstance(res, dict):
+        return None, ""
+
+    if exchange == "okx":
+        data = res.get("data") or [{}]
+        code = res.get("code")
+        if code == "1" and data and data[0].get("sCode"):
+            return data[0]["sCode"], data[0].get("sMsg", "")
+        return code, res.get("msg", "")
+
+    if exchange == "binance":
+        return res.get("code"), res.get("msg", "")
+
+    return res.get("retCode"), res.get("retMsg", "")
+
+
+class RetryPolicy:
+
+    def __init__(self, max_attempts=3, base_delay=0.05, hedge_delay=None):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        # None = hedging مغلق
+        self.hedge_delay = hedge_delay
+
+    @classmethod
+    def from_env(cls):
+        hedge = os.getenv("HORUS_HEDGE_DELAY")
+        return cls(
+            max_attempts=int(os.getenv("HORUS_ORDER_ATTEMPTS", "3")),
+            hedge_delay=float(hedge) if hedge else None,
+        )
+
+    # ------------------------------------------------------------
+
+    def classify(self, exchange, res):
+        if isinstance(res, BaseException):
+            if isinstance(res, aiohttp.ClientConnectorError):
+                return "retry"       # لم يتصل أصلاً
+            if isinstance(res, (asyncio.TimeoutError, aiohttp.ClientError, ConnectionError)):
+                return "unknown"
+            return "fatal"
+
+        code, msg = response_code(exchange, res)
+
+        if code in DUPLICATE_CODES[exchange] and (exchange != "binance" or "uplicate" in msg):
+            return "duplicate"
+        if code in RETRY_CODES[exchange]:
+            return "retry"
+        if code in UNKNOWN_CODES[exchange]:
+            return "unknown"
+        return "done"
+
+    def lookup(self, exchange, res):
+        """
+        رد fetch_order → "found" | "missing" | "unknown"
+        """
+        if isinstance(res, BaseException) or not isinstance(res, dict):
+            return "unknown"
+
+        code, _ = response_code(exchange, res)
+        if code in NOT_FOUND_CODES[exchange]:
+            return "missing"
+
+        if exchange == "okx":
+            return "found" if code == "0" and res.get("data") else "unknown"
+        if exchange == "bybit":
+            if code != 0:
+                return "unknown"
+            return "found" if (res.get("result") or {}).get("list") else "missing"
+        return "found" if code is None and res.get("clientOrderId") else "unknown"
+
+    def permanent_cid(self, exchange):
+        return exchange in PERMANENT_CID
+
+    def clock_error(self, exchange, res):
+        code, _ = response_code(exchange, res)
+        return code in CLOCK_CODES[exchange]
+
+    async def backoff(self, attempt):
+        await asyncio.sleep(self.base_delay * (2 ** attempt))
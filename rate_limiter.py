@@ -0,0 +1,283 @@
+# ================================================================
+#  HORUS RATE LIMITER — Weight-aware + Adaptive Concurrency
+# ================================================================
+#  • Token bucket لكل بورصة (حد الـ IP) ولكل API key (حد الأوامر)
+#  • كل endpoint له وزن (ip weight, key weight) حسب توثيق البورصة
+#  • يقرأ headers الاستهلاك من الردود ويزامن الـ buckets معها
+#  • AIMD على عدد الطلبات المتزامنة لكل بورصة:
+#       - نجاح بزمن طبيعي  → زيادة تدريجية (+1 / limit)
+#       - 429 أو زمن عالي  → تخفيض للنصف
+#  • الأوامر تنتظر في الطابور بدل أن تفشل
+# ================================================================
+
+import asyncio
+import logging
+import time
+from email.utils import parsedate_to_datetime
+
+log = logging.getLogger("RateLimiter")
+
+
+# (capacity, period seconds)
+LIMITS = {
+    "binance": {"ip": (6000, 60), "key": (50, 10)},
+    "okx":     {"ip": (20, 2),    "key": (60, 2)},
+    "bybit":   {"ip": (600, 5),   "key": (20, 1)},
+}
+
+# (ip weight, key weight) لكل endpoint — أي endpoint غير موجود = DEFAULT_WEIGHT
+WEIGHTS = {
+    "binance": {
+        "/api/v3/order": (1, 1),
+        "/api/v3/ticker/price": (2, 0),
+        "/api/v3/account": (20, 0),
+        "/api/v3/depth": (5, 0),
+        "/api/v3/exchangeInfo": (20, 0),
+    },
+    "okx": {
+        # حدود OKX الخاصة محسوبة لكل user وليس IP
+        "/api/v5/trade/order": (0, 1),
+        "/api/v5/trade/batch-orders": (0, 5),
+        "/api/v5/account/balance": (0, 6),
+    },
+    "bybit": {
+        "/v5/order/create": (1, 1),
+        "/v5/order/create-batch": (1, 2),
+        "/v5/asset/transfer/query-asset-info": (1, 0),
+    },
+}
+
+DEFAULT_WEIGHT = (1, 0)
+
+# أكواد "تجاوز الحد" داخل body الرد (بعض البورصات ترد 200)
+THROTTLE_CODES = {
+    "binance": {-1003, -1015},
+    "okx": {"50011", "50061"},
+    "bybit": {10006, 10018},
+}
+
+# انتظار افتراضي بعد رفض الحد (Retry-After غير موجود / غير مفهوم)
+DEFAULT_RETRY_AFTER = 1.0
+
+
+def retry_after(headers, default=DEFAULT_RETRY_AFTER):
+    """
+    Retry-After = ثواني أو HTTP-date — أي قيمة غير مفهومة → default (لا exception)
+    """
+    value = (headers or {}).get("Retry-After")
+    if value is None:
+        return default
+    try:
+        seconds = float(value)
+    except (TypeError, ValueError):
+        try:
+            seconds = parsedate_to_datetime(value).timestamp() - time.time()
+        except (TypeError, ValueError, IndexError, OverflowError):
+            return default
+    return seconds if seconds > 0 else default
+
+
+# ================================================================
+#  TOKEN BUCKET
+# ================================================================
+
+class TokenBucket:
+
+    def __init__(self, capacity, period):
+        self.capacity = capacity
+        self.rate = capacity / period
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0
+        self._lock = asyncio.Lock()   # FIFO — الأقدم يأخذ التوكن أولاً
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, weight=1):
+        if weight <= 0:
+            return
+
+        weight = min(weight, self.capacity)
+
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+
+                wait = self.paused_until - now
+                if wait <= 0:
+                    if self.tokens >= weight:
+                        self.tokens -= weight
+                        return
+                    wait = (weight - self.tokens) / self.rate
+
+                await asyncio.sleep(wait)
+
+    def refund(self, weight=1):
+        """
+        توكنات حُجزت لطلب لم يُرسل
+        """
+        self._refill(time.monotonic())
+        self.tokens = min(self.capacity, self.tokens + weight)
+
+    def sync(self, used):
+        """
+        مزامنة مع الاستهلاك الفعلي الذي أرسلته البورصة في الـ headers
+        """
+        self._refill(time.monotonic())
+        self.tokens = min(self.tokens, max(self.capacity - used, 0))
+
+    def pause(self, seconds):
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+        self.tokens = 0
+
+
+# ================================================================
+#  ADAPTIVE CONCURRENCY (AIMD)
+# ================================================================
+
+class AdaptiveConcurrency:
+
+    def __init__(self, initial=32, min_limit=4, max_limit=512, target_latency=0.5):
+        self.limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.target_latency = target_latency
+        self.in_flight = 0
+        self._last_cut = 0
+        self._cond = asyncio.Condition()
+
+    async def acquire(self):
+        async with self._cond:
+            await self._cond.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+
+    async def release(self, latency, throttled):
+        async with self._cond:
+            self.in_flight -= 1
+
+            now = time.monotonic()
+            if throttled or latency > self.target_latency:
+                # تخفيض واحد فقط لكل نافذة زمنية (وإلا ينهار الحد مع burst بطيء)
+                if now - self._last_cut > self.target_latency:
+                    self.limit = max(self.min_limit, self.limit / 2)
+                    self._last_cut = now
+            else:
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+
+            self._cond.notify_all()
+
+
+# ================================================================
+#  RATE LIMITER (registry)
+# ================================================================
+
+class RateLimiter:
+
+    def __init__(self, limits=LIMITS, weights=WEIGHTS, max_requeue=3):
+        self.limits = limits
+        self.weights = weights
+        self.max_requeue = max_requeue
+        self._ip = {}
+        self._keys = {}
+        self._concurrency = {}
+
+    # ------------------------------------------------------------
+
+    def _ip_bucket(self, exchange):
+        if exchange not in self._ip:
+            self._ip[exchange] = TokenBucket(*self.limits[exchange]["ip"])
+        return self._ip[exchange]
+
+    def _key_bucket(self, exchange, key):
+        k = (exchange, key)
+        if k not in self._keys:
+            self._keys[k] = TokenBucket(*self.limits[exchange]["key"])
+        return self._keys[k]
+
+    def concurrency(self, exchange):
+        if exchange not in self._concurrency:
+            self._concurrency[exchange] = AdaptiveConcurrency()
+        return self._concurrency[exchange]
+
+    def weight(self, exchange, path):
+        return self.weights.get(exchange, {}).get(path, DEFAULT_WEIGHT)
+
+    # ------------------------------------------------------------
+
+    async def acquire(self, exchange, key, path):
+        """
+        ينتظر (لا يفشل) حتى يسمح حد الـ IP وحد المفتاح وحد التزامن
+        """
+        ip_w, key_w = self.weight(exchange, path)
+
+        await self._ip_bucket(exchange).acquire(ip_w)
+        if key is not None:
+            await self._key_bucket(exchange, key).acquire(key_w)
+        await self.concurrency(exchange).acquire()
+
+    async def acquire_order(self, exchange, key, count=1):
+        """
+        أوامر WebSocket: لا يوجد حد IP لطلبات HTTP لكن حد الأوامر للمفتاح قائم
+        count = عدد الأوامر في الطلب (batch = أمر لكل عنصر)
+        """
+        await self._key_bucket(exchange, key).acquire(count)
+
+    def refund_order(self, exchange, key, count=1):
+        """
+        أمر WebSocket لم يُرسل (WSUnavailable) → إعادة حصته قبل الرجوع لـ REST
+        """
+        self._key_bucket(exchange, key).refund(count)
+
+    async def release(self, exchange, key, status, headers, data, latency):
+        """
+        يُستدعى بعد كل رد. يعيد True لو الطلب رُفض بسبب الحد (يجب إعادة إرساله)
+        """
+        throttled = self._throttled(exchange, status, data)
+
+        if headers:
+            self._read_headers(exchange, key, headers)
+
+        if throttled:
+            wait = retry_after(headers)
+            self._ip_bucket(exchange).pause(wait)
+            if key is not None:
+                self._key_bucket(exchange, key).pause(wait)
+            log.warning(f"⏳ {exchange} rate limited — pausing {wait:.1f}s")
+
+        await self.concurrency(exchange).release(latency, throttled)
+        return throttled
+
+    def _throttled(self, exchange, status, data):
+        if status in (418, 429):
+            return True
+        if not isinstance(data, dict):
+            return False
+        code = data.get("code", data.get("retCode"))
+        return code in THROTTLE_CODES.get(exchange, ())
+
+    def _read_headers(self, exchange, key, headers):
+        if exchange == "binance":
+            used = headers.get("X-MBX-USED-WEIGHT-1M")
+            if used is not None:
+                self._ip_bucket(exchange).sync(int(used))
+
+            orders = headers.get("X-MBX-ORDER-COUNT-10S")
+            if orders is not None and key is not None:
+                self._key_bucket(exchange, key).sync(int(orders))
+
+        elif exchange == "bybit":
+            remaining = headers.get("X-Bapi-Limit-Status")
+            limit = headers.get("X-Bapi-Limit")
+            if remaining is not None and limit and key is not None:
+                bucket = self._key_bucket(exchange, key)
+                used_ratio = 1 - int(remaining) / int(limit)
+                bucket.sync(used_ratio * bucket.capacity)
+
+    def stats(self):
+        return {
+            ex: {"limit": round(c.limit, 1), "in_flight": c.in_flight}
+            for ex, c in self._concurrency.items()
+        }
@@ -0,0 +1,264 @@
+# ================================================================
+#  HORUS CLIENT ROSTER — Warm in-memory client state for Brain
+# ================================================================
+#  قبل: كل إشارة = Treasury.get_all_clients() + SettingsManager.get_allocation()
+#       لكل عميل (قراءات متزامنة داخل الـ event loop)
+#  الآن: Brain يحمل نسخة في الذاكرة:
+#       • تحميل كامل مرة عند التشغيل (في thread — لا يوقف الـ loop)
+#       • تحديث تدريجي من HORUS_CLIENT_UPDATES:
+#             {"client_id": "u1", "event": "balance", "fields": {"balance_usdt": 500}}
+#         حدث بدون fields → إعادة تحميل كاملة في الخلفية (مجمّعة)
+#       • إعادة مزامنة دورية (HORUS_ROSTER_RESYNC) — pub/sub لا يضمن التسليم
+#       • أحداث تصل أثناء التحميل تُسجّل وتُعاد بعد replace (الـ snapshot
+#         قد يكون أقدم منها) — الاشتراك يبدأ قبل التحميل الأول
+#
+#  demand() = عمليات NumPy على أعمدة (balance / allocation / exchange / active)
+#  بدل حلقة Python لكل عميل → 100k عميل في ميلي ثواني
+#       python bench_roster.py --clients 1000 10000 100000
+# ================================================================
+
+import asyncio
+import json
+import logging
+import os
+
+import numpy as np
+
+from core.treasury import Treasury
+from settings.settings_manager import SettingsManager
+
+log = logging.getLogger("Roster")
+
+ROSTER_RESYNC = float(os.getenv("HORUS_ROSTER_RESYNC", "300"))
+
+UPDATES_CHANNEL = "HORUS_CLIENT_UPDATES"
+
+EXCHANGES = ("okx", "binance", "bybit")
+EXCHANGE_CODE = {ex: i for i, ex in enumerate(EXCHANGES)}
+
+
+def _load_all():
+    """
+    قراءة متزامنة من Treasury / SettingsManager — تُشغّل عبر asyncio.to_thread فقط
+    """
+    out = {}
+    for client_id, info in Treasury.get_all_clients().items():
+        out[str(client_id)] = {
+            "exchange": (info.get("exchange") or "").lower(),
+            "balance_usdt": float(info.get("balance_usdt", 0) or 0),
+            "allocation": float(SettingsManager.get_allocation(client_id) or 0),
+            "active": info.get("active", True),
+        }
+    return out
+
+
+class ClientRoster:
+    """
+    أعمدة NumPy (صف لكل عميل):
+        balance  float64   | allocation float64 (%)
+        exchange int8      (EXCHANGES index، -1 = غير محددة)
+        active   bool
+    الحذف = نقل آخر صف مكان المحذوف (O(1)) — ترتيب الصفوف غير مهم
+    """
+
+    def __init__(self, resync=ROSTER_RESYNC, capacity=1024):
+        self.resync = resync
+        self.index = {}          # client_id → row
+        self.size = 0
+        self._alloc(capacity)
+        self.r = None
+        self._tasks = []
+        self._reload = None
+        self._buffers = []       # أحداث لكل تحميل جارٍ (تُعاد بعد replace)
+
+    # ------------------------------------------------------------
+    # STATE
+    # ------------------------------------------------------------
+
+    def _alloc(self, capacity):
+        self.ids = np.empty(capacity, dtype=object)
+        self.balance = np.zeros(capacity, dtype=np.float64)
+        self.allocation = np.zeros(capacity, dtype=np.float64)
+        self.exchange = np.full(capacity, -1, dtype=np.int8)
+        self.active = np.zeros(capacity, dtype=bool)
+
+    def _grow(self):
+        n = self.size
+        old = (self.ids, self.balance, self.allocation, self.exchange, self.active)
+        self._alloc(max(1024, len(self.ids) * 2))
+        for new, prev in zip((self.ids, self.balance, self.allocation, self.exchange, self.active), old):
+            new[:n] = prev[:n]
+
+    def __len__(self):
+        return self.size
+
+    def replace(self, clients):
+        n = len(clients)
+        self._alloc(max(1024, n * 2))
+        self.index = {}
+        for row, (client_id, c) in enumerate(clients.items()):
+            self.index[client_id] = row
+            self.ids[row] = client_id
+            self.exchange[row] = EXCHANGE_CODE.get(c["exchange"], -1)
+        self.size = n
+        self.balance[:n] = [c["balance_usdt"] for c in clients.values()]
+        self.allocation[:n] = [c["allocation"] for c in clients.values()]
+        self.active[:n] = [bool(c["active"]) for c in clients.values()]
+
+    def upsert(self, client_id, **fields):
+        row = self.index.get(client_id)
+        if row is None:
+            if self.size == len(self.ids):
+                self._grow()
+            row = self.size
+            self.size += 1
+            self.index[client_id] = row
+            self.ids[row] = client_id
+            self.balance[row] = 0.0
+            self.allocation[row] = 0.0
+            self.exchange[row] = -1
+            self.active[row] = False
+
+        for k, v in fields.items():
+            if k == "exchange":
+                self.exchange[row] = EXCHANGE_CODE.get((v or "").lower(), -1)
+            elif k == "balance_usdt":
+                self.balance[row] = float(v or 0)
+            elif k == "allocation":
+                self.allocation[row] = float(v or 0)
+            elif k == "active":
+                self.active[row] = bool(v)
+
+    def remove(self, client_id):
+        row = self.index.pop(client_id, None)
+        if row is None:
+            return
+        last = self.size - 1
+        if row != last:
+            moved = self.ids[last]
+            for col in (self.ids, self.balance, self.allocation, self.exchange, self.active):
+                col[row] = col[last]
+            self.index[moved] = row
+        self.ids[last] = None
+        self.size = last
+
+    def demand(self, min_notional=None):
+        """
+        (per_exchange, total_demand)
+            usd = balance × allocation / 100 — العملاء النشطون فقط
+            min_notional = {exchange: usd} → أقل من الحد لا يدخل (البورصة سترفضه)
+        """
+        n = self.size
+        ex = self.exchange[:n]
+        usd = self.balance[:n] * (self.allocation[:n] / 100)
+
+        floor = np.zeros(len(EXCHANGES) + 1)        # [-1] = بورصة غير معروفة
+        for name, value in (min_notional or {}).items():
+            if name in EXCHANGE_CODE:
+                floor[EXCHANGE_CODE[name]] = value
+
+        mask = self.active[:n] & (ex >= 0) & (usd > 0) & (usd >= floor[ex])
+
+        rows = np.flatnonzero(mask)
+        codes = ex[rows]
+        amounts = usd[rows]
+        totals = np.bincount(codes, weights=amounts, minlength=len(EXCHANGES))
+
+        per_exchange = {}
+        for code, name in enumerate(EXCHANGES):
+            sel = codes == code
+            if totals[code] > 0:
+                per_exchange[name] = dict(zip(self.ids[rows[sel]].tolist(), amounts[sel].tolist()))
+
+        return per_exchange, float(totals.sum())
+
+    # ------------------------------------------------------------
+    # EVENTS
+    # ------------------------------------------------------------
+
+    def apply(self, event):
+        for buffer in self._buffers:
+            buffer.append(event)
+        if self._apply(event):
+            self.schedule_reload()
+
+    def _apply(self, event):
+        """
+        يعيد True لو الحدث يحتاج تحميلاً كاملاً
+        """
+        client_id = str(event["client_id"])
+        kind = event.get("event")
+        fields = event.get("fields")
+
+        if kind == "deleted":
+            self.remove(client_id)
+        elif fields:
+            # عميل جديد — الرصيد / allocation من التخزين
+            reload = client_id not in self.index
+            self.upsert(client_id, **fields)
+            log.info(f"👥 Roster updated | {client_id} | {kind}")
+            return reload
+        elif kind == "disabled":
+            self.upsert(client_id, active=False)
+        else:
+            # لا نعرف ما تغيّر (مفاتيح / بورصة) → تحميل كامل في الخلفية
+            return True
+        log.info(f"👥 Roster updated | {client_id} | {kind}")
+        return False
+
+    def schedule_reload(self):
+        if self._reload is None or self._reload.done():
+            self._reload = asyncio.create_task(self.load())
+
+    async def load(self):
+        buffer = []
+        self._buffers.append(buffer)
+        try:
+            clients = await asyncio.to_thread(_load_all)
+        finally:
+            self._buffers.remove(buffer)
+
+        self.replace(clients)
+        stale = False
+        for event in buffer:
+            stale = self._apply(event) or stale
+        log.info(f"👥 Roster loaded | {len(clients)} clients | {len(buffer)} event(s) replayed")
+
+        if stale:
+            # حدث يحتاج تحميلاً كاملاً وصل بعد بدء القراءة → الـ snapshot قد يسبقه
+            asyncio.get_running_loop().call_soon(self.schedule_reload)
+
+    # ------------------------------------------------------------
+    # LIFECYCLE
+    # ------------------------------------------------------------
+
+    async def start(self, r):
+        self.r = r
+        # الاشتراك قبل التحميل — أحداث أثناء القراءة تُسجّل وتُعاد
+        sub = self.r.pubsub()
+        await sub.subscribe(UPDATES_CHANNEL)
+        self._tasks = [asyncio.create_task(self._listen(sub))]
+        await self.load()
+        self._tasks.append(asyncio.create_task(self._resync_loop()))
+
+    async def stop(self):
+        for t in self._tasks:
+            t.cancel()
+        self._tasks = []
+
+    async def _listen(self, sub):
+        async for msg in sub.listen():
+            if msg["type"] != "message":
+                continue
+            try:
+                self.apply(json.loads(msg["data"]))
+            except Exception as e:
+                log.error(f"❌ Roster update error: {e}")
+
+    async def _resync_loop(self):
+        while True:
+            await asyncio.sleep(self.resync)
+            try:
+                await self.load()
+            except Exception as e:
+                log.error(f"❌ Roster resync failed: {e}")
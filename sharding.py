@@ -0,0 +1,174 @@
+# ================================================================
+#  HORUS SHARDING — Fleet executor partitions (Redis membership)
+# ================================================================
+#  عدة نسخ من FleetExecutor (cores / أجهزة مختلفة) تستقبل نفس الـ packets،
+#  وكل نسخة تنفّذ فقط حصتها من العملاء:
+#
+#       • كل shard يكتب heartbeat في Redis hash:  HORUS_FLEET_SHARDS
+#       • shard بدون heartbeat لمدة ttl = ميت → يُحذف وتُعاد القسمة تلقائياً
+#       • المالك = rendezvous hash(shard, client) بين الـ shards الحية
+#         (موت shard ينقل عملاءه فقط — باقي العملاء لا يتحركون)
+#       • shard جديد لا يأخذ عملاء قبل join_grace (افتراضي = ttl) من انضمامه:
+#         كل الـ shards ترى "since" الخاص به في refresh (interval < grace)
+#         ثم يتحول المالك عند نفس اللحظة عند الجميع → لا تنفيذ مزدوج
+#         من shard قديم لم يرَ العضو الجديد بعد
+#       • shard ممكن يخدم بورصات محددة (قريب من سيرفرات البورصة):
+#             HORUS_SHARD_EXCHANGES="binance"
+#
+#  HORUS_SHARD_ID  (افتراضي: hostname:pid)
+#       HORUS_BUS=streams يتطلب id ثابت: الـ consumer group = fleet:<shard>
+#       id جديد بعد كل restart = group جديد من "$" → الـ packets بينهما تضيع
+#
+#  groups الـ shards المختفية أكثر من HORUS_SHARD_GROUP_TTL → on_retired
+#  (FleetExecutor يحذف consumer group الخاص بها — لا تتراكم في Redis)
+# ================================================================
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import socket
+import time
+
+log = logging.getLogger("Sharding")
+
+SHARDS_KEY = "HORUS_FLEET_SHARDS"
+GROUPS_KEY = "HORUS_FLEET_SHARD_GROUPS"    # shard → آخر heartbeat (أطول عمراً من SHARDS_KEY)
+
+SHARD_ID = os.getenv("HORUS_SHARD_ID") or f"{socket.gethostname()}:{os.getpid()}"
+SHARD_ID_FIXED = bool(os.getenv("HORUS_SHARD_ID"))
+GROUP_TTL = float(os.getenv("HORUS_SHARD_GROUP_TTL", "3600"))   # ثواني
+SHARD_EXCHANGES = [
+    ex.strip().lower() for ex in os.getenv("HORUS_SHARD_EXCHANGES", "").split(",") if ex.strip()
+]
+
+
+def _score(shard_id, client_id):
+    return hashlib.sha1(f"{shard_id}|{client_id}".encode()).digest()
+
+
+class ShardMembership:
+
+    def __init__(self, shard_id=SHARD_ID, exchanges=SHARD_EXCHANGES, interval=2.0, ttl=6.0,
+                 join_grace=None, group_ttl=GROUP_TTL, on_retired=None):
+        self.shard_id = shard_id
+        self.exchanges = list(exchanges)      # فارغ = كل البورصات
+        self.interval = interval
+        self.ttl = ttl
+        self.join_grace = ttl if join_grace is None else join_grace
+        self.since = time.time()
+        self.group_ttl = group_ttl
+        self.on_retired = on_retired          # async (shard ids) — اختفت أكثر من group_ttl
+        self.r = None
+        # قبل أول heartbeat: الـ shard الوحيد المعروف هو نحن
+        self.members = {shard_id: (self.exchanges, self.since)}   # sid → (exchanges, since)
+        self._task = None
+
+    # ------------------------------------------------------------
+    # MEMBERSHIP
+    # ------------------------------------------------------------
+
+    async def heartbeat(self):
+        now = time.time()
+        await self.r.hset(SHARDS_KEY, self.shard_id, json.dumps({
+            "ts": now,
+            "since": self.since,
+            "exchanges": self.exchanges
+        }))
+        await self.r.hset(GROUPS_KEY, self.shard_id, now)
+
+    async def refresh(self):
+        raw = await self.r.hgetall(SHARDS_KEY)
+        now = time.time()
+        live, dead = {}, []
+
+        for sid, value in raw.items():
+            info = json.loads(value)
+            if now - info["ts"] > self.ttl:
+                dead.append(sid)
+            else:
+                live[sid] = (info.get("exchanges") or [], info.get("since", 0.0))
+
+        if dead:
+            await self.r.hdel(SHARDS_KEY, *dead)
+            log.warning(f"💀 Shards expired: {dead}")
+
+        live.setdefault(self.shard_id, (self.exchanges, self.since))
+        await self._retire(now)
+
+        if set(live) != set(self.members):
+            log.info(f"🔀 Rebalance | {len(live)} shards: {sorted(live)}")
+        self.members = live
+
+    async def _retire(self, now):
+        """
+        shard لم يعد خلال group_ttl (ليس مجرد restart) → حذف الـ group الخاص به
+        """
+        if self.on_retired is None:
+            return
+        seen = await self.r.hgetall(GROUPS_KEY)
+        retired = [sid for sid, ts in seen.items()
+                   if sid != self.shard_id and now - float(ts) > self.group_ttl]
+        if not retired:
+            return
+        await self.r.hdel(GROUPS_KEY, *retired)
+        log.warning(f"🧹 Shards retired: {retired}")
+        await self.on_retired(retired)
+
+    async def start(self, r):
+        self.r = r
+        self.since = time.time()
+        await self.heartbeat()
+        await self.refresh()
+        log.info(
+            f"🧩 Shard {self.shard_id} ONLINE | exchanges={self.exchanges or 'all'} "
+            f"| takes clients in {self.join_grace:.0f}s"
+        )
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self.r is not None:
+            # خروج نظيف → الباقون يأخذون الحصة فوراً بدل انتظار ttl
+            await self.r.hdel(SHARDS_KEY, self.shard_id)
+
+    async def _loop(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.heartbeat()
+                await self.refresh()
+            except Exception as e:
+                log.error(f"❌ Shard heartbeat failed: {e}")
+
+    # ------------------------------------------------------------
+    # OWNERSHIP
+    # ------------------------------------------------------------
+
+    def active(self, now=None):
+        """
+        الـ shards التي انتهت فترة انضمامها — نفس القرار عند الجميع في نفس اللحظة
+        (لا أحد فعّال بعد = أول تشغيل للأسطول → كل المعروفين)
+        """
+        now = time.time() if now is None else now
+        members = {sid: exs for sid, (exs, since) in self.members.items()
+                   if now - since >= self.join_grace}
+        return members or {sid: exs for sid, (exs, _) in self.members.items()}
+
+    def owner(self, client_id, exchange):
+        """
+        rendezvous hashing بين الـ shards الفعّالة التي تخدم البورصة
+        (لو لا يوجد shard مخصص لها → كل الـ shards الفعّالة)
+        """
+        members = self.active()
+        candidates = [sid for sid, exs in members.items() if not exs or exchange in exs]
+        if not candidates:
+            candidates = list(members)
+        return max(candidates, key=lambda sid: _score(sid, client_id))
+
+    def mine(self, client_id, exchange):
+        return self.owner(str(client_id), exchange) == self.shard_id
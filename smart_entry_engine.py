@@ -7,6 +7,7 @@
 #       • WCF
 #       • waves
 #       • توزيع الحمل على العملاء
+#       • pacing الموجات (تعافي الكتاب / drift) — core/wave_scheduler.py
 #
 #  التنفيذ الفعلي يقوم به:
 #       • Fleet Executor
@@ -14,11 +15,21 @@
 
 import aiohttp
 import asyncio
-import json
 import logging
 from datetime import datetime
 import redis.asyncio as redis
 
+from core.endpoints import endpoint
+from core.dispatcher import KeyedDispatcher   # معالجة متوازية للإشارات
+from core.bus import Bus   # pub/sub أو Redis Streams
+from core.log_writer import LogWriter   # signals / wave_signals / system_logs
+from core.tracing import Tracer   # latency spans (trace من Brain)
+from core.depth import DepthStreams   # order books حيّة (WebSocket snapshot + diff)
+from core.liquidity import LiquidityCurve, book_side   # منحنى العمق (NumPy) لكل جانب
+from core.wave_planner import plan_waves, WAVE_PLANNER   # عدد / أحجام / تباعد الموجات
+from core.wave_scheduler import WaveScheduler   # إرسال الموجات بالتتابع حسب تعافي الكتاب
+from core.book_cache import BookCache   # single-flight + TTL قصير لـ snapshots REST
+
 log = logging.getLogger("SmartEntry")
 
 
@@ -26,94 +37,56 @@ log = logging.getLogger("SmartEntry")
 # ORDERBOOK FETCHERS
 # ================================================================
 
-async def fetch_okx(symbol):
-    url = f"https://www.okx.com/api/v5/market/books?instId={symbol}&sz=40"
-    async with aiohttp.ClientSession() as s:
-        async with s.get(url) as r:
-            js = await r.json()
-            try:
-                return js["data"][0]
-            except:
-                return None
+# جلسة DepthStreams المشتركة (keep-alive) — لا ClientSession جديدة لكل snapshot
+REST_TIMEOUT = aiohttp.ClientTimeout(total=5)
 
-
-async def fetch_binance(symbol):
-    url = f"https://api.binance.com/api/v3/depth?symbol={symbol}&limit=40"
-    async with aiohttp.ClientSession() as s:
-        async with s.get(url) as r:
-            try:
-                js = await r.json()
-                return {"asks": js["asks"]}
-            except:
-                return None
+# رد غير متوقع / شبكة → None (BookCache لا يخزّنه والطلب التالي يعيد المحاولة)
+FETCH_ERRORS = (aiohttp.ClientError, asyncio.TimeoutError, KeyError, IndexError, TypeError, ValueError)
 
 
-async def fetch_bybit(symbol):
-    url = f"https://api.bybit.com/v5/market/orderbook?category=spot&symbol={symbol}"
-    async with aiohttp.ClientSession() as s:
-        async with s.get(url) as r:
-            try:
-                js = await r.json()
-                return {"asks": js["result"]["a"]}
-            except:
-                return None
-
-
-# ================================================================
-# LIQUIDITY MODEL
-# ================================================================
-
-def compute_liquidity(asks):
-    """
-    يعيد:
-        price0, liquidity_1%, liquidity_3%
-    """
-    if not asks:
-        return None, 0, 0
-
-    best = float(asks[0][0])
-    up1 = best * 1.01
-    up3 = best * 1.03
-
-    l1 = 0
-    l3 = 0
-
-    for p, a in asks:
-        p = float(p)
-        a = float(a)
-        val = p * a
-        if p <= up1:
-            l1 += val
-        if p <= up3:
-            l3 += val
+async def fetch_okx(session, symbol, depth=40):
+    url = f"{endpoint('okx')}/api/v5/market/books?instId={symbol}&sz={depth}"
+    try:
+        async with session.get(url, timeout=REST_TIMEOUT) as r:
+            js = await r.json()
+            return js["data"][0]
+    except FETCH_ERRORS as e:
+        log.warning(f"⚠️ okx book {symbol} failed: {e!r}")
+        return None
 
-    return best, l1, l3
 
+async def fetch_binance(session, symbol, depth=40):
+    url = f"{endpoint('binance')}/api/v3/depth?symbol={symbol}&limit={depth}"
+    try:
+        async with session.get(url, timeout=REST_TIMEOUT) as r:
+            js = await r.json()
+            return {"asks": js["asks"], "bids": js["bids"]}
+    except FETCH_ERRORS as e:
+        log.warning(f"⚠️ binance book {symbol} failed: {e!r}")
+        return None
 
-def wcf(total_demand, liq1):
-    if liq1 <= 0:
-        return float("inf")
-    return total_demand / liq1
 
+async def fetch_bybit(session, symbol, depth=40):
+    url = f"{endpoint('bybit')}/v5/market/orderbook?category=spot&symbol={symbol}&limit={depth}"
+    try:
+        async with session.get(url, timeout=REST_TIMEOUT) as r:
+            js = await r.json()
+            return {"asks": js["result"]["a"], "bids": js["result"]["b"]}
+    except FETCH_ERRORS as e:
+        log.warning(f"⚠️ bybit book {symbol} failed: {e!r}")
+        return None
 
-def wave_count(WCF):
-    if WCF <= 0.6:
-        return 1
-    elif WCF <= 1.1:
-        return 2
-    elif WCF <= 1.6:
-        return 3
-    elif WCF <= 2.2:
-        return 4
-    return 4
 
+# الرجوع لـ REST فقط لو الكتاب الحي غير جاهز (عملة جديدة / resync)
+REST_BOOKS = {
+    "okx": lambda session, symbol, depth: fetch_okx(session, symbol.replace("/", "-"), depth),
+    "binance": lambda session, symbol, depth: fetch_binance(session, symbol.replace("/", ""), depth),
+    "bybit": lambda session, symbol, depth: fetch_bybit(session, symbol.replace("/", ""), depth),
+}
+REST_DEPTH = 40
 
-def wave_distribution(n):
-    if n == 1: return [1.0]
-    if n == 2: return [0.6, 0.4]
-    if n == 3: return [0.4, 0.35, 0.25]
-    if n == 4: return [0.35, 0.30, 0.20, 0.15]
-    return [1.0]
+# أقصى عدد مستويات نقرأها من الكتاب الحي
+BOOK_LEVELS = 1000
 
 
 # ================================================================
@@ -125,11 +98,41 @@ class SmartEntryEngine:
     def __init__(self):
         self.redis_url = "redis://localhost:6379"
         self.r = None
+        self.bus = None
+        self.logs = LogWriter()
+        self.tracer = Tracer("smart_entry")
+        self.depth = DepthStreams()
+        self.book_cache = BookCache()
+        self.planner = WAVE_PLANNER
+        self.waves = WaveScheduler(self.publish_wave, self.measure, self.tracer, self.logs)
 
     async def connect(self):
         self.r = await redis.from_url(self.redis_url, decode_responses=True)
+        self.bus = Bus(self.r)
         log.info("🧠 Smart Entry Engine connected to Redis")
 
+    async def publish_wave(self, wave):
+        await self.bus.publish("NEXUS_FLEET_COMMAND", wave)
+
+    async def measure(self, ex, symbol, side):
+        """
+        منحنى الكتاب الآن (للـ pacing) — الكتاب الحي أولاً، REST لو غير جاهز
+        """
+        lv = self.depth.levels(ex, symbol, side, BOOK_LEVELS)
+        if not lv:
+            ob = await self.rest_book(ex, symbol)
+            lv = ob.get(side) if ob else None
+        curve = LiquidityCurve(lv or [], side)
+        return curve if curve else None
+
+    async def rest_book(self, ex, symbol, depth=REST_DEPTH):
+        """
+        snapshot REST مشترك: إشارات متزامنة لنفس العملة → طلب واحد لكل بورصة
+        """
+        return await self.book_cache.get(
+            ex, symbol, depth, lambda: REST_BOOKS[ex](self.depth.session, symbol, depth)
+        )
+
     # ------------------------------------------------------------
 
     async def process_signal(self, packet):
@@ -150,32 +153,41 @@ class SmartEntryEngine:
         action = packet["action"]
         signal_id = packet["signal_id"]
 
+        span = self.tracer.begin(packet.get("trace"), "smart_entry", signal=signal_id)
+
+        # موجات معلّقة لإشارة سابقة على نفس العملة لا تُرسل بعد هذه الإشارة
+        self.waves.preempt(symbol_input, f"superseded by {signal_id}")
+
         log.info(f"\n⚡ SMART ENTRY PROCESSING:\n{packet}")
 
         # ========================================================
-        # STEP 1 — Fetch liquidity from all exchanges
+        # STEP 1 — Liquidity from all exchanges
+        #   الكتاب الحي (ذاكرة) أولاً — REST فقط للبورصات غير الجاهزة
+        #   BUY يقرأ asks / SELL يقرأ bids
         # ========================================================
 
-        tasks = [
-            fetch_okx(symbol_input.replace("/", "-")),
-            fetch_binance(symbol_input.replace("/", "")),
-            fetch_bybit(symbol_input.replace("/", ""))
-        ]
-        okx_ob, bin_ob, byb_ob = await asyncio.gather(*tasks)
+        side = book_side(action)
 
-        books = {}
+        levels = {ex: self.depth.levels(ex, symbol_input, side, BOOK_LEVELS) for ex in REST_BOOKS}
+        source = {ex: "stream" for ex, lv in levels.items() if lv}
 
-        if okx_ob:
-            p, l1, l3 = compute_liquidity(okx_ob["asks"])
-            books["okx"] = {"price": p, "liq1": l1, "liq3": l3}
+        missing = [ex for ex in REST_BOOKS if ex not in source]
+        if missing:
+            self.depth.watch(symbol_input)
+            fetched = await asyncio.gather(*(self.rest_book(ex, symbol_input) for ex in missing))
+            for ex, ob in zip(missing, fetched):
+                levels[ex] = ob.get(side) if ob else None
+                source[ex] = "rest"
 
-        if bin_ob:
-            p, l1, l3 = compute_liquidity(bin_ob["asks"])
-            books["binance"] = {"price": p, "liq1": l1, "liq3": l3}
+        books = {}
+        curves = {}
 
-        if byb_ob:
-            p, l1, l3 = compute_liquidity(byb_ob["asks"])
-            books["bybit"] = {"price": p, "liq1": l1, "liq3": l3}
+        for ex, lv in levels.items():
+            curve = LiquidityCurve(lv or [], side)
+            if curve:
+                l1, l3 = curve.depth([0.01, 0.03]).tolist()
+                curves[ex] = curve
+                books[ex] = {"price": curve.best, "liq1": l1, "liq3": l3, "side": side, "source": source[ex]}
 
         log.info(f"📊 ORDERBOOKS:\n{books}")
 
@@ -183,7 +195,10 @@ class SmartEntryEngine:
         # STEP 2 — For each exchange, build waves
         # ========================================================
 
-        all_waves = []
+        # الإشارة الأم تدخل الطابور قبل wave_signals (FK)
+        self.logs.signal(signal_id, symbol_input, action, "RISKY", packet.get("source"))
+
+        all_waves = {}
 
         for ex, ex_data in packet["demand"].items():
 
@@ -191,16 +206,14 @@ class SmartEntryEngine:
                 log.warning(f"⚠️ No book for {ex}")
                 continue
 
-            liq1 = books[ex]["liq1"]
             client_demands = ex_data["client_demands"]
             total_ex_demand = sum(client_demands.values())
 
-            WCF = wcf(total_ex_demand, liq1)
-            n_waves = wave_count(WCF)
-            weights = wave_distribution(n_waves)
-
-            # reduction factor لو الطلب أكبر من السيولة
-            reduction = min(1.0, liq1 / total_ex_demand) if liq1 > 0 else 0
+            # عدد / أوزان / تخفيض الموجات من المنحنى الحي (HORUS_WAVE_PLANNER)
+            plan = plan_waves(curves[ex], total_ex_demand, self.planner)
+            n_waves = plan["waves"]
+            weights = plan["weights"]
+            reduction = plan["reduction"]
 
             # apply reduction
             final_client_amounts = {
@@ -208,9 +221,14 @@ class SmartEntryEngine:
                 for cid, usd in client_demands.items()
             }
 
-            log.info(f"🌊 {ex}: waves={n_waves} | reduction={reduction:.3f} | WCF={WCF:.3f}")
+            log.info(
+                f"🌊 {ex}: waves={n_waves} ({plan['method']}) | reduction={reduction:.3f} "
+                f"| spacing={plan['spacing']:.1f}s | expected cost={plan['expected_cost']:.2f} USD "
+                f"| slippage/wave={[round(s * 100, 3) for s in plan['expected_slippage']]}%"
+            )
 
-            # build wave packets
+            # build wave packets (الإرسال + wave_signals في WaveScheduler)
+            ex_waves = []
             for idx in range(n_waves):
                 wave_id = idx + 1
                 wave_clients = {
@@ -226,20 +244,28 @@ class SmartEntryEngine:
                     "action": action,
                     "exchange": ex,
                     "wave": wave_id,
+                    "expected_slippage": plan["expected_slippage"][idx],
                     "per_client_amount_usd": wave_clients,
                     "timestamp": datetime.utcnow().timestamp()
                 }
 
-                all_waves.append(wave_packet)
+                ex_waves.append(wave_packet)
+
+            if ex_waves:
+                all_waves[ex] = (ex_waves, plan)
 
         # ========================================================
         # STEP 3 — Dispatch waves to Fleet Executor
+        #   wave 1 لكل بورصة الآن — الباقي بالتتابع بعد تعافي الكتاب
         # ========================================================
 
-        for wave in all_waves:
-            await self.r.publish("NEXUS_FLEET_COMMAND", json.dumps(wave))
+        for ex, (ex_waves, plan) in all_waves.items():
+            await self.waves.dispatch(ex_waves, curves[ex], plan, side, span)
+
+        n = sum(len(w) for w, _ in all_waves.values())
+        self.tracer.end(span, waves=n)
 
-        log.info(f"🚀 {len(all_waves)} SMART WAVES DISPATCHED.")
+        log.info(f"🚀 {len(all_waves)} FIRST WAVES DISPATCHED — {n} planned, rest paced.")
 
 
 # ================================================================
@@ -249,22 +275,37 @@ class SmartEntryEngine:
 async def run_engine():
     engine = SmartEntryEngine()
     await engine.connect()
+    await engine.depth.start(engine.r)
+    await engine.logs.start()
+    await engine.tracer.start()
+    logging.getLogger().addHandler(engine.logs.handler("SmartEntry"))
 
-    # Subscribe to RISKY signals from Brain
-    sub = engine.r.pubsub()
-    await sub.subscribe("HORUS_SMART_ENTRY")
+    async def handle(msg):
+        await engine.process_signal(msg.data)
+        await msg.ack()   # streams: ack فقط بعد إرسال الموجات
+
+    # إشارات العملات المختلفة بالتوازي — نفس العملة بالترتيب
+    dispatcher = KeyedDispatcher(handle, "SmartEntry")
+    metrics = asyncio.create_task(engine.bus.publish_metrics(["HORUS_SMART_ENTRY"]))
+    cache_metrics = asyncio.create_task(engine.book_cache.publish_metrics(engine.r))
 
     log.info("🧠 Smart Entry Engine ONLINE — Listening for risky signals...")
 
-    async for msg in sub.listen():
-        if msg["type"] != "message":
-            continue
-        
-        try:
-            packet = json.loads(msg["data"])
-            await engine.process_signal(packet)
-        except Exception as e:
-            log.error(f"❌ Smart Entry Error: {e}")
+    try:
+        # RISKY signals from Brain
+        async for msg in engine.bus.consume(["HORUS_SMART_ENTRY"], "smart_entry"):
+            try:
+                await dispatcher.submit(msg.data["symbol"], msg)
+            except Exception as e:
+                log.error(f"❌ Smart Entry Error: {e}")
+    finally:
+        metrics.cancel()
+        cache_metrics.cancel()
+        await dispatcher.close()
+        await engine.waves.close()
+        await engine.depth.stop()
+        await engine.tracer.stop()
+        await engine.logs.stop()
 
 
 if __name__ == "__main__":
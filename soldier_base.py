@@ -10,9 +10,13 @@ import asyncio
 import logging
 import traceback
 from gate.gate import Gate
+from gate.order_policy import response_code   # كود الرفض من رد البورصة
 
 log = logging.getLogger("SoldierBase")
 
+# رد بدون كود (Binance / nothing_to_close) أو بكود نجاح = أمر مقبول
+SUCCESS_CODES = (None, "0", 0)
+
 
 class SoldierBase:
     """
@@ -21,6 +25,7 @@ class SoldierBase:
         - execute_buy
         - execute_sell
         - execute_close
+        - order / report  (للتنفيذ الجماعي عبر Gate.submit_batch)
     ويضمن:
         - تنفيذ آمن
         - إدارة الأخطاء
@@ -108,3 +113,46 @@ class SoldierBase:
             log.error(f"❌ CLOSE FAILED | {self.user_id} | {symbol} | {e}")
             traceback.print_exc()
             return {"status": "error", "error": str(e)}
+
+    # ============================================================
+    # BATCH (Fleet fan-out)
+    # ============================================================
+
+    def listed(self, symbol):
+        """
+        هل العملة مدرجة على بورصة الجندي؟ (من InstrumentRegistry — بدون شبكة)
+        """
+        return self.gate.instruments.listed(self.exchange, self.normalize(symbol))
+
+    def order(self, action, symbol, usd=0, client_order_id=None):
+        """
+        تجهيز أمر لـ Gate.submit_batch بصيغة رمز البورصة
+        client_order_id ثابت لكل (إشارة، موجة، عميل) → إعادة الإرسال آمنة
+        """
+        return {
+            "user_id": self.user_id,
+            "exchange": self.exchange,
+            "symbol": self.normalize(symbol),
+            "action": action.upper(),
+            "usd": usd,
+            "client_order_id": client_order_id
+        }
+
+    def report(self, order, result):
+        """
+        تحويل رد Gate.submit_batch لنفس نتيجة execute_buy / execute_sell / execute_close
+        """
+        action = order["action"]
+
+        if isinstance(result, BaseException):
+            log.error(f"❌ {action} FAILED | {self.user_id} | {order['symbol']} | {result}")
+            return {"status": "error", "error": str(result)}
+
+        # رد وصل لكن البورصة رفضت الأمر (OKX sCode / Binance code / Bybit retCode)
+        code, msg = response_code(self.exchange, result)
+        if code not in SUCCESS_CODES:
+            log.error(f"❌ {action} REJECTED | {self.user_id} | {order['symbol']} | {code} {msg}")
+            return {"status": "error", "error": f"{code}: {msg}", "data": result}
+
+        log.info(f"✅ {action} EXECUTED | {result}")
+        return {"status": "success", "data": result}
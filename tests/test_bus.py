@@ -0,0 +1,81 @@
+import asyncio
+
+from core.bus import Bus
+
+
+def _key(msg_id):
+    return tuple(int(x) for x in msg_id.split("-"))
+
+
+class FakeStreams:
+    """
+    أقل ما يلزم من Redis Streams لـ Bus.consume (بدون ack — المعالج لم ينتهِ)
+    """
+
+    def __init__(self, pending, claimable=()):
+        self.pending = pending            # stream → [(id, fields)] معلّقة عندنا
+        self.claimable = list(claimable)  # xpending_range
+        self.claimed = []
+        self.reads = 0
+
+    async def xgroup_create(self, *a, **kw):
+        raise Exception("BUSYGROUP Consumer Group name already exists")
+
+    async def xreadgroup(self, group, consumer, streams, count=None, block=None):
+        self.reads += 1
+        out = []
+        for stream, cursor in streams.items():
+            if cursor == ">":
+                continue
+            entries = [e for e in self.pending.get(stream, []) if _key(e[0]) > _key(cursor)][:count]
+            out.append([stream, entries])
+        if not any(entries for _, entries in out):
+            await asyncio.sleep((block or 0) / 1000)
+        return out
+
+    async def xpending_range(self, stream, group, **kw):
+        return [p for p in self.claimable if p["stream"] == stream]
+
+    async def xclaim(self, stream, group, consumer, idle, ids):
+        self.claimed.extend(ids)
+        return []
+
+    async def xack(self, *a):
+        pass
+
+
+async def _collect(bus, channels, seconds=0.2):
+    seen = []
+
+    async def run():
+        async for msg in bus.consume(channels, "g", "c1"):
+            seen.append(msg.id)
+
+    task = asyncio.create_task(run())
+    await asyncio.sleep(seconds)
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+    return seen
+
+
+def test_pending_backlog_yielded_once_without_ack():
+    r = FakeStreams({"S": [("1-0", {"data": "{}"}), ("2-0", {"data": "{}"}), ("3-0", {"data": "{}"})]})
+    bus = Bus(r, mode="streams", block_ms=10, batch=2, reclaim_every=3600)
+
+    seen = asyncio.run(_collect(bus, ["S"]))
+
+    assert seen == ["1-0", "2-0", "3-0"]
+    assert bus.inflight == {("S", "1-0"), ("S", "2-0"), ("S", "3-0")}
+
+
+def test_reclaim_skips_messages_still_in_flight_locally():
+    r = FakeStreams({}, claimable=[
+        {"stream": "S", "message_id": "1-0", "times_delivered": 1},
+        {"stream": "S", "message_id": "2-0", "times_delivered": 1},
+    ])
+    bus = Bus(r, mode="streams")
+    bus.inflight.add(("S", "1-0"))
+
+    asyncio.run(bus._reclaim(["S"], "g", "c1"))
+
+    assert r.claimed == ["2-0"]
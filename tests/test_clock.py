@@ -0,0 +1,25 @@
+import asyncio
+
+from core.clock import ExchangeClock
+
+
+def _clock(samples):
+    clock = ExchangeClock(samples=2, alpha=0.3)
+    it = iter(samples)
+
+    async def sample(session, exchange):
+        return next(it)
+
+    clock._sample = sample
+    return clock
+
+
+def test_periodic_sync_smooths_but_forced_sync_jumps_to_best_sample():
+    clock = _clock([(1000.0, 5.0), (900.0, 30.0), (1000.0, 5.0), (900.0, 30.0)])
+    clock.offsets["okx"] = 0.0
+
+    asyncio.run(clock.sync("okx", session=object()))
+    assert clock.offsets["okx"] == 300.0          # EWMA: 0.3 × 1000
+
+    asyncio.run(clock.sync("okx", session=object(), force=True))
+    assert clock.offsets["okx"] == 1000.0         # أقل RTT — بدون تنعيم
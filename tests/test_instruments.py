@@ -0,0 +1,16 @@
+from core.instruments import InstrumentRegistry, floor_to_step
+
+
+def test_padded_binance_steps_floor_to_a_multiple():
+    assert floor_to_step(0.123456789, "0.00001000") == "0.12345"
+    assert floor_to_step(123.456789, "1.00000000") == "123"
+    assert floor_to_step(0.5, "1.00000000") == "0"
+    assert floor_to_step(1.2349, "0.0005") == "1.2345"
+    assert floor_to_step(125, "10") == "120"
+
+
+def test_round_qty_uses_registry_step():
+    reg = InstrumentRegistry()
+    reg.data = {"binance": {"DOGEUSDT": {"step": "1.00000000", "min_qty": 1.0, "tick": "0.00001", "min_notional": 5.0}}}
+
+    assert reg.round_qty("binance", "DOGEUSDT", 41.66666) == "41"
@@ -0,0 +1,34 @@
+import asyncio
+
+from core.log_writer import LogWriter
+
+
+class SlowWriter(LogWriter):
+    """
+    بدون قاعدة بيانات: _write بطيء ويسجّل الصفوف المكتوبة
+    """
+
+    def __init__(self, **kw):
+        super().__init__(**kw)
+        self.rows = []
+
+    async def _write(self, table, rows):
+        await asyncio.sleep(0.05)
+        self.rows.extend(rows)
+
+
+def test_stop_during_flush_drains_the_queue():
+    w = SlowWriter(batch_size=2, flush_interval=0.01)
+
+    async def run():
+        w._task = asyncio.create_task(w._run())
+        for i in range(5):
+            w.system("test", "INFO", f"m{i}")
+        await asyncio.sleep(0.02)          # أول دفعة داخل _flush الآن
+        await w.stop()
+        w.system("test", "INFO", "after stop")
+
+    asyncio.run(run())
+
+    assert [r["message"] for r in w.rows] == [f"m{i}" for i in range(5)]
+    assert w.written == 5 and w.dropped == 0
@@ -0,0 +1,122 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from core.order_policy import RetryPolicy
+
+# ExchangeClient يحتاج gate.py كاملاً (Treasury / aiohttp)
+gate = pytest.importorskip("core.gate")
+
+
+def test_classify_exceptions_and_codes():
+    p = RetryPolicy()
+
+    assert p.classify("okx", asyncio.TimeoutError()) == "unknown"
+    assert p.classify("okx", ValueError("bad body")) == "fatal"
+
+    assert p.classify("okx", {"code": "0", "data": [{"sCode": "0"}]}) == "done"
+    assert p.classify("okx", {"code": "1", "data": [{"sCode": "51016", "sMsg": "Duplicated clOrdId"}]}) == "duplicate"
+    assert p.classify("okx", {"code": "50013", "msg": "busy"}) == "retry"
+    assert p.classify("okx", {"code": "50004", "msg": "timeout"}) == "unknown"
+
+    assert p.classify("binance", {"code": -2010, "msg": "Duplicate order sent."}) == "duplicate"
+    assert p.classify("binance", {"code": -2010, "msg": "Account has insufficient balance."}) == "done"
+    assert p.classify("binance", {"code": -1021, "msg": "Timestamp outside recvWindow"}) == "retry"
+    assert p.classify("binance", {"code": -1007, "msg": "Timeout waiting for response"}) == "unknown"
+
+    assert p.classify("bybit", {"retCode": 110072, "retMsg": "OrderLinkedID is duplicate"}) == "duplicate"
+    assert p.classify("bybit", {"retCode": 10000, "retMsg": "timeout"}) == "unknown"
+
+
+def test_lookup_states():
+    p = RetryPolicy()
+
+    assert p.lookup("binance", {"clientOrderId": "h1", "status": "FILLED"}) == "found"
+    assert p.lookup("binance", {"code": -2013, "msg": "Order does not exist."}) == "missing"
+    assert p.lookup("binance", asyncio.TimeoutError()) == "unknown"
+    assert p.lookup("okx", {"code": "51603", "data": []}) == "missing"
+    assert p.lookup("bybit", {"retCode": 0, "result": {"list": []}}) == "missing"
+    assert p.lookup("bybit", {"retCode": 0, "result": {"list": [{"orderLinkId": "h1"}]}}) == "found"
+
+
+# ------------------------------------------------------------
+
+class FakeClient(gate.ExchangeClient):
+    """
+    ExchangeClient بدون شبكة: rest / fetch_order يعيدان ردوداً مبرمجة بالترتيب
+    """
+
+    def __init__(self, exchange, replies, lookups=(), hedge_delay=None):
+        self.EXCHANGE = exchange
+        self.key = "k"
+        self.replies = list(replies)
+        self.lookups = list(lookups)
+        self.sent = []
+        self.fetched = 0
+        super().__init__(SimpleNamespace(
+            retry=RetryPolicy(max_attempts=3, base_delay=0, hedge_delay=hedge_delay),
+            ws=SimpleNamespace(enabled=lambda ex: False),
+            hedge_sessions=SimpleNamespace(get=lambda ex: "hedge"),
+        ))
+
+    async def rest(self, session=None):
+        self.sent.append(session)
+        reply = self.replies.pop(0)
+        if isinstance(reply, float):
+            await asyncio.sleep(reply)
+            reply = {"retCode": 0, "result": {"orderLinkId": "h1"}}
+        if isinstance(reply, BaseException):
+            raise reply
+        return reply
+
+    async def fetch_order(self, symbol, cid):
+        self.fetched += 1
+        reply = self.lookups.pop(0)
+        if isinstance(reply, BaseException):
+            raise reply
+        return reply
+
+    def submit(self):
+        return asyncio.run(self._submit_order({}, self.rest, "BTCUSDT", "h1"))
+
+
+@pytest.fixture(autouse=True)
+def no_recv_window(monkeypatch):
+    monkeypatch.setattr(gate, "RECV_WINDOW", 0)
+
+
+def test_unknown_then_found_is_not_resent():
+    found = {"clientOrderId": "h1", "status": "FILLED"}
+    c = FakeClient("binance", [asyncio.TimeoutError()], [found])
+
+    assert c.submit() == found
+    assert len(c.sent) == 1 and c.fetched == 1
+
+
+def test_unknown_then_missing_is_resent():
+    placed = {"clientOrderId": "h1", "status": "FILLED", "orderId": 2}
+    c = FakeClient("binance", [asyncio.TimeoutError(), placed], [{"code": -2013, "msg": "Order does not exist."}])
+
+    assert c.submit() == placed
+    assert len(c.sent) == 2
+
+
+def test_unknown_with_failed_lookup_is_not_resent():
+    c = FakeClient("binance", [asyncio.TimeoutError()], [asyncio.TimeoutError()])
+
+    with pytest.raises(asyncio.TimeoutError):
+        c.submit()
+    assert len(c.sent) == 1
+
+
+def test_no_hedge_without_permanent_client_id():
+    c = FakeClient("binance", [0.05], hedge_delay=0.01)
+    c.submit()
+    assert c.sent == [None]
+
+
+def test_hedge_on_permanent_client_id():
+    c = FakeClient("bybit", [0.05, 0.05], hedge_delay=0.01)
+    c.submit()
+    assert c.sent == [None, "hedge"]
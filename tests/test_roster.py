@@ -0,0 +1,41 @@
+import asyncio
+import threading
+
+import pytest
+
+pytest.importorskip("numpy")
+roster = pytest.importorskip("core.roster")   # Treasury / SettingsManager
+
+
+def test_events_during_load_are_replayed_after_replace(monkeypatch):
+    reading = threading.Event()
+    release = threading.Event()
+
+    snapshot = {
+        "u1": {"exchange": "okx", "balance_usdt": 100.0, "allocation": 10.0, "active": True},
+        "u2": {"exchange": "okx", "balance_usdt": 100.0, "allocation": 10.0, "active": True},
+    }
+
+    def slow_load():
+        # قراءة بدأت قبل الأحداث: الرصيد القديم
+        reading.set()
+        release.wait(5)
+        return dict(snapshot)
+
+    monkeypatch.setattr(roster, "_load_all", slow_load)
+    r = roster.ClientRoster()
+    r.replace(snapshot)
+
+    async def run():
+        load = asyncio.create_task(r.load())
+        await asyncio.to_thread(reading.wait, 5)
+        r.apply({"client_id": "u1", "event": "balance", "fields": {"balance_usdt": 500}})
+        r.apply({"client_id": "u2", "event": "disabled"})
+        release.set()
+        await load
+
+    asyncio.run(run())
+
+    per_exchange, total = r.demand()
+    assert per_exchange == {"okx": {"u1": 50.0}}
+    assert total == 50.0
@@ -0,0 +1,70 @@
+import asyncio
+import json
+import time
+
+from core.sharding import GROUPS_KEY, SHARDS_KEY, ShardMembership, _score
+
+
+class FakeRedis:
+    """
+    hashes فقط (hset / hgetall / hdel)
+    """
+
+    def __init__(self):
+        self.h = {}
+
+    async def hset(self, key, field, value):
+        self.h.setdefault(key, {})[field] = str(value)
+
+    async def hgetall(self, key):
+        return dict(self.h.get(key, {}))
+
+    async def hdel(self, key, *fields):
+        for f in fields:
+            self.h.get(key, {}).pop(f, None)
+
+
+def test_groups_of_long_gone_shards_are_retired():
+    r = FakeRedis()
+    now = time.time()
+    r.h[SHARDS_KEY] = {"restarting": json.dumps({"ts": now - 30, "exchanges": []})}
+    r.h[GROUPS_KEY] = {"restarting": str(now - 30), "gone": str(now - 7200)}
+
+    retired = []
+
+    async def on_retired(ids):
+        retired.extend(ids)
+
+    shard = ShardMembership("me", [], ttl=6, group_ttl=3600, on_retired=on_retired)
+    shard.r = r
+
+    async def run():
+        await shard.heartbeat()
+        await shard.refresh()
+
+    asyncio.run(run())
+
+    # خرج من العضوية بعد ttl — لكن الـ group يبقى حتى group_ttl
+    assert set(shard.members) == {"me"}
+    assert retired == ["gone"]
+    assert set(r.h[GROUPS_KEY]) == {"me", "restarting"}
+
+
+def test_new_shard_takes_clients_only_after_join_grace():
+    old = ShardMembership("old", [], join_grace=6)
+    new = ShardMembership("new", [], join_grace=6)
+    now = time.time()
+    members = {"old": ([], now - 600), "new": ([], now)}
+    old.members = new.members = dict(members)
+
+    clients = [f"c{i}" for i in range(50)]
+    moving = [c for c in clients if max(("old", "new"), key=lambda s: _score(s, c)) == "new"]
+    assert moving
+
+    # قبل انتهاء الـ grace: الاثنان متفقان — القديم يملك الكل
+    assert all(old.mine(c, "okx") and not new.mine(c, "okx") for c in clients)
+
+    # بعده: كل عميل له مالك واحد فقط
+    old.members = new.members = {"old": ([], now - 600), "new": ([], now - 7)}
+    assert all(old.mine(c, "okx") != new.mine(c, "okx") for c in clients)
+    assert all(new.mine(c, "okx") for c in moving)
@@ -0,0 +1,64 @@
+import math
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from core.liquidity import LiquidityCurve
+from core.wave_planner import plan_waves, wave_costs, wave_slippage
+
+
+def rest_book(levels=40, price=100.0, qty=10.0, tick=0.0001):
+    """
+    كتاب REST قصير: 40 مستوى × 1000 USD تقريباً، كل مستوى أعلى بـ 1 bp
+    """
+    return LiquidityCurve([(price * (1 + i * tick), qty) for i in range(levels)], "asks")
+
+
+def test_wave_beyond_visible_book_is_over_budget():
+    curve = rest_book()
+    slip = wave_slippage(curve, [curve.total / 2, curve.total, curve.total * 3])
+
+    assert math.isfinite(slip[0]) and math.isfinite(slip[1])
+    assert slip[2] == np.inf
+
+
+def test_demand_larger_than_book_is_reduced_not_sent_in_one_wave():
+    curve = rest_book()
+    demand = curve.total * 20
+
+    plan = plan_waves(curve, demand, "optimized", max_slippage=0.005, max_waves=6)
+
+    assert plan["reduction"] < 1.0
+    per_wave = demand * plan["reduction"] * np.asarray(plan["weights"])
+    assert (per_wave <= curve.total * (1 + 1e-9)).all()
+    assert all(math.isfinite(s) and s <= 0.005 for s in plan["expected_slippage"])
+    assert math.isfinite(plan["expected_cost"])
+
+
+def test_demand_within_budget_keeps_full_size():
+    curve = rest_book()
+    plan = plan_waves(curve, curve.total / 10, "optimized", max_slippage=0.005, max_waves=6)
+
+    assert plan["reduction"] == 1.0
+    assert plan["waves"] >= 1
+
+
+def test_fully_recovered_book_matches_single_wave_slippage():
+    curve = rest_book()
+    sizes = [curve.total / 4] * 3
+    impact, slip = wave_costs(curve, sizes, 0.0)
+
+    assert np.allclose(slip, wave_slippage(curve, sizes))
+
+
+def test_slow_book_recovery_spaces_waves_further_apart():
+    curve = rest_book()
+    demand = curve.total
+
+    fast = plan_waves(curve, demand, "optimized", max_slippage=0.005, max_waves=6, halflife=0.25)
+    slow = plan_waves(curve, demand, "optimized", max_slippage=0.005, max_waves=6, halflife=4.0)
+
+    assert slow["spacing"] > fast["spacing"]
+    assert slow["expected_cost"] > fast["expected_cost"]
+    assert all(s <= 0.005 for s in slow["expected_slippage"])
@@ -0,0 +1,45 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("websockets")
+
+from core.rate_limiter import RateLimiter
+from core.ws_transport import WSOrderConnection, WSUnavailable
+
+
+class Never(WSOrderConnection):
+    """
+    اتصال لا يجهز أبداً (البورصة لا ترد)
+    """
+
+    def start(self):
+        pass
+
+
+def test_request_fails_fast_while_reconnecting():
+    conn = Never(SimpleNamespace(EXCHANGE="okx", key="k"))
+    conn.down = True
+
+    async def run():
+        t0 = time.monotonic()
+        with pytest.raises(WSUnavailable):
+            await conn.request({})
+        return time.monotonic() - t0
+
+    assert asyncio.run(run()) < 0.1
+
+
+def test_refund_returns_order_tokens():
+    limiter = RateLimiter()
+
+    async def run():
+        await limiter.acquire_order("binance", "k", 5)
+        before = limiter._key_bucket("binance", "k").tokens
+        limiter.refund_order("binance", "k", 5)
+        return before, limiter._key_bucket("binance", "k").tokens
+
+    before, after = asyncio.run(run())
+    assert after >= before + 5 - 1e-6
@@ -0,0 +1,237 @@
+# ================================================================
+#  HORUS TRACING — End-to-end latency (captain fill → exchange ack)
+# ================================================================
+#  كل packet يحمل trace context:
+#       packet["trace"] = {"id": ..., "t0": ..., "stage": ..., "sent": ...}
+#           id     ← يُنشأ في Eye عند استلام الـ fill (ثابت حتى البورصة)
+#           t0     ← وقت استلام الـ fill (epoch ms)
+#           stage  ← آخر مرحلة أرسلت الـ packet
+#           sent   ← وقت الإرسال (epoch ms)
+#
+#  المراحل:  eye → brain → smart_entry → fleet → gate (لكل بورصة)
+#
+#  كل مرحلة تكتب span محلياً (JSONL):  HORUS_TRACE_DIR/<service>-YYYYMMDD.jsonl
+#       dur  ← زمن المرحلة نفسها (time.perf_counter — monotonic)
+#       hop  ← من إرسال المرحلة السابقة حتى الاستلام (Redis / طابور)
+#       e2e  ← من t0 حتى نهاية المرحلة
+#  hop / e2e بين عمليات مختلفة تعتمد على epoch → نفس الجهاز أو NTP
+#
+#  الكتابة في الخلفية (buffer + flush كل ثانية) — مسار التنفيذ لا يلمس القرص
+# ================================================================
+
+import asyncio
+import glob
+import json
+import logging
+import os
+import time
+import uuid
+from datetime import datetime
+
+log = logging.getLogger("Tracing")
+
+TRACE_DIR = os.getenv("HORUS_TRACE_DIR", "traces")
+TRACE_FLUSH_INTERVAL = float(os.getenv("HORUS_TRACE_FLUSH", "1.0"))
+TRACE_BUFFER = 100000
+
+STAGES = ("eye", "brain", "smart_entry", "fleet", "gate")
+
+
+def now_ms():
+    return time.time() * 1000
+
+
+class Span:
+
+    __slots__ = ("trace_id", "stage", "t0", "ts", "hop", "attrs", "_start")
+
+    def __init__(self, ctx, stage, **attrs):
+        ts = now_ms()
+        ctx = ctx or {}
+        self.trace_id = ctx.get("id") or uuid.uuid4().hex[:16]
+        self.stage = stage
+        self.t0 = ctx.get("t0", ts)
+        self.ts = ts
+        self.hop = ts - ctx["sent"] if "sent" in ctx else None
+        self.attrs = attrs
+        self._start = time.perf_counter()
+
+    def context(self):
+        """
+        trace context للـ packet التالي (يُستدعى لحظة الإرسال)
+        """
+        return {"id": self.trace_id, "t0": self.t0, "stage": self.stage, "sent": now_ms()}
+
+    def record(self, **attrs):
+        dur = (time.perf_counter() - self._start) * 1000
+        rec = {
+            "trace": self.trace_id,
+            "stage": self.stage,
+            "ts": round(self.ts, 3),
+            "dur": round(dur, 3),
+            "e2e": round(self.ts + dur - self.t0, 3),
+        }
+        if self.hop is not None:
+            rec["hop"] = round(self.hop, 3)
+        rec.update(self.attrs)
+        rec.update(attrs)
+        return rec
+
+
+class Tracer:
+
+    def __init__(self, service, directory=TRACE_DIR, flush_interval=TRACE_FLUSH_INTERVAL):
+        self.service = service
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.buffer = []
+        self.dropped = 0
+        self._task = None
+
+    @property
+    def running(self):
+        return self._task is not None
+
+    # ------------------------------------------------------------
+    # HOT PATH
+    # ------------------------------------------------------------
+
+    def begin(self, ctx, stage, **attrs):
+        """
+        ctx = packet.get("trace") — None → trace جديد (بداية السلسلة)
+        """
+        return Span(ctx, stage, **attrs)
+
+    def end(self, span, **attrs):
+        if not self.running:
+            return
+        if len(self.buffer) >= TRACE_BUFFER:
+            self.dropped += 1
+            return
+        self.buffer.append(span.record(**attrs))
+
+    # ------------------------------------------------------------
+    # LIFECYCLE
+    # ------------------------------------------------------------
+
+    async def start(self):
+        os.makedirs(self.directory, exist_ok=True)
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+            log.info(f"⏱️ Tracing {self.service} → {self.directory}")
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        self._task = None
+        await self._flush()
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self._flush()
+            except Exception as e:
+                log.error(f"❌ Trace flush failed: {e}")
+
+    async def _flush(self):
+        if not self.buffer:
+            return
+        batch, self.buffer = self.buffer, []
+        path = os.path.join(self.directory, f"{self.service}-{datetime.utcnow():%Y%m%d}.jsonl")
+        await asyncio.to_thread(_append, path, batch)
+
+
+def _append(path, records):
+    with open(path, "a", encoding="utf-8") as f:
+        f.write("".join(json.dumps(r) + "\n" for r in records))
+
+
+# ================================================================
+#  REPORT (Captain Console)
+# ================================================================
+
+def load_spans(directory=TRACE_DIR, days=1):
+    """
+    spans آخر `days` ملفات لكل خدمة
+    """
+    files = {}
+    for path in sorted(glob.glob(os.path.join(directory, "*-*.jsonl"))):
+        service = os.path.basename(path).rsplit("-", 1)[0]
+        files.setdefault(service, []).append(path)
+
+    spans = []
+    for paths in files.values():
+        for path in paths[-days:]:
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        spans.append(json.loads(line))
+                    except ValueError:
+                        continue
+    return spans
+
+
+def percentile(values, q):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    k = min(len(values) - 1, max(0, round(q / 100 * (len(values) - 1))))
+    return values[k]
+
+
+def latency_report(spans, last=200):
+    """
+    آخر `last` traces →
+        {
+          "traces": n,
+          "stages":    {stage:    {"dur": {p50,p95,p99}, "hop": {...}, "n": n}},
+          "exchanges": {exchange: {"dur": {...}, "e2e": {...}, "n": n}},
+          "latest":    {"trace": id, "signal": ..., "stages": [(stage, hop, dur, e2e), ...]}
+        }
+    """
+    by_trace = {}
+    for s in spans:
+        by_trace.setdefault(s["trace"], []).append(s)
+
+    traces = sorted(by_trace.values(), key=lambda ss: min(s["ts"] for s in ss))[-last:]
+
+    def pct(values):
+        return {f"p{q}": round(percentile(values, q), 1) for q in (50, 95, 99)}
+
+    stages, exchanges = {}, {}
+    for ss in traces:
+        for s in ss:
+            st = stages.setdefault(s["stage"], {"dur": [], "hop": []})
+            st["dur"].append(s["dur"])
+            if "hop" in s:
+                st["hop"].append(s["hop"])
+            if s["stage"] == "gate":
+                ex = exchanges.setdefault(s.get("exchange", "?"), {"dur": [], "e2e": []})
+                ex["dur"].append(s["dur"])
+                ex["e2e"].append(s["e2e"])
+
+    latest = None
+    if traces:
+        ss = sorted(traces[-1], key=lambda s: s["ts"])
+        latest = {
+            "trace": ss[0]["trace"],
+            "signal": next((s["signal"] for s in ss if s.get("signal")), None),
+            "stages": [(s["stage"] + (f":{s['exchange']}" if s.get("exchange") else ""),
+                        s.get("hop"), s["dur"], s["e2e"]) for s in ss],
+        }
+
+    order = {name: i for i, name in enumerate(STAGES)}
+    return {
+        "traces": len(traces),
+        "stages": {
+            name: {"dur": pct(v["dur"]), "hop": pct(v["hop"]) if v["hop"] else None, "n": len(v["dur"])}
+            for name, v in sorted(stages.items(), key=lambda kv: order.get(kv[0], len(order)))
+        },
+        "exchanges": {
+            name: {"dur": pct(v["dur"]), "e2e": pct(v["e2e"]), "n": len(v["dur"])}
+            for name, v in sorted(exchanges.items())
+        },
+        "latest": latest,
+    }
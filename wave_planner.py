@@ -0,0 +1,227 @@
+# ================================================================
+#  HORUS WAVE PLANNER — Slippage-optimized waves (per exchange)
+# ================================================================
+#  المدخلات: منحنى السيولة الحي (core/liquidity.py) + إجمالي الطلب
+#            + ميزانية slippage قصوى لكل موجة
+#
+#  تعافي الكتاب (resilience): أثر كل موجة يتلاشى بـ half-life
+#       decay(spacing) = 0.5 ^ (spacing / HORUS_BOOK_HALFLIFE)
+#       الموجة k تبدأ بعد أن أُكل من الكتاب: Σ size_j × decay^(k-j)  (j < k)
+#       impact(k) = C(residual + size) − C(residual)     C(x) = x × slippage(x)
+#  → تباعد قصير = كتاب لم يتعافَ (impact أعلى) / طويل = drift أعلى
+#
+#  optimized  (افتراضي):
+#       • لكل (n = 1..max_waves) × (spacing ∈ HORUS_WAVE_SPACINGS) — دفعة NumPy واحدة:
+#             impact(n, spacing) = Σ impact(k)                ← المنحنى + التعافي
+#             timing(n, spacing) = D × drift × spacing × (n-1)/2 ← خطر الانتظار
+#       • المقبول: slippage كل موجة ≤ max_slippage
+#         (موجة أكبر من الكتاب الظاهر = slippage ∞ — الجزء غير المرئي لا يُقاس)
+#       • نختار (n, spacing) بأقل impact + timing
+#       • لا يوجد ما يحقق الميزانية → max_waves بأطول تباعد + تخفيض الطلب
+#         لأكبر حجم موجة ضمن الميزانية (بدل تخفيضه لسيولة 1%)
+#       • أحجام متساوية: التأثير محدب في الحجم → التوزيع المتساوي أقل تكلفة
+#       • WaveScheduler يستخدم spacing المختار كأقل delay (+ انتظار التعافي الحي)
+#
+#  bucketed   (HORUS_WAVE_PLANNER=bucketed):
+#       السلوك القديم — WCF → عدد ثابت + جدول أوزان + reduction = liq1 / D
+#
+#  الخطة: {"method", "waves", "weights", "reduction", "spacing",
+#          "expected_slippage": [لكل موجة], "expected_cost": USD}
+# ================================================================
+
+import os
+
+import numpy as np
+
+WAVE_PLANNER = os.getenv("HORUS_WAVE_PLANNER", "optimized").lower()
+MAX_SLIPPAGE = float(os.getenv("HORUS_MAX_SLIPPAGE", "0.005"))        # 0.5% لكل موجة
+MAX_WAVES = int(os.getenv("HORUS_MAX_WAVES", "6"))
+WAVE_SPACING = float(os.getenv("HORUS_WAVE_SPACING", "2.0"))          # ثواني بين الموجات (bucketed)
+WAVE_SPACINGS = [
+    float(s) for s in os.getenv("HORUS_WAVE_SPACINGS", "1,2,4,8").split(",") if s.strip()
+]                                                                      # المرشحون (optimized)
+DRIFT_PER_SEC = float(os.getenv("HORUS_DRIFT_PER_SEC", "0.00005"))     # 0.5 bps / ثانية
+BOOK_HALFLIFE = float(os.getenv("HORUS_BOOK_HALFLIFE", "2.0"))         # ثواني لتعافي نصف الأثر
+
+
+# ================================================================
+# BUCKETED (fallback — السلوك القديم)
+# ================================================================
+
+def wcf(total_demand, liq1):
+    if liq1 <= 0:
+        return float("inf")
+    return total_demand / liq1
+
+
+def wave_count(WCF):
+    if WCF <= 0.6:
+        return 1
+    elif WCF <= 1.1:
+        return 2
+    elif WCF <= 1.6:
+        return 3
+    elif WCF <= 2.2:
+        return 4
+    return 4
+
+
+def wave_distribution(n):
+    if n == 1: return [1.0]
+    if n == 2: return [0.6, 0.4]
+    if n == 3: return [0.4, 0.35, 0.25]
+    if n == 4: return [0.35, 0.30, 0.20, 0.15]
+    return [1.0]
+
+
+def wave_slippage(curve, sizes):
+    """
+    slippage لكل حجم — fill يتوقف عند نهاية الكتاب الظاهر، فحجم لا يكتمل = ∞
+    (REST = 40 مستوى فقط: الـ slippage المحسوب يغطي الجزء المرئي فقط)
+    """
+    sizes = np.asarray(sizes, dtype=np.float64)
+    fill = curve.fill(sizes)
+    short = fill["filled"] < sizes * (1 - 1e-9)
+    return np.where(short, np.inf, fill["slippage"])
+
+
+def decay(spacing, halflife=BOOK_HALFLIFE):
+    """
+    الجزء الباقي من أثر موجة بعد spacing ثانية (0 = تعافٍ فوري)
+    """
+    spacing = np.asarray(spacing, dtype=np.float64)
+    if halflife <= 0:
+        return np.zeros_like(spacing)
+    return 0.5 ** (spacing / halflife)
+
+
+def wave_costs(curve, sizes, remain):
+    """
+    sizes (..., n) أحجام الموجات بالترتيب / remain = decay بين موجتين
+    (قابل للـ broadcast مع sizes[..., 0]) → (impact USD, slippage) لكل موجة
+    """
+    sizes = np.asarray(sizes, dtype=np.float64)
+    remain = np.asarray(remain, dtype=np.float64)[..., None, None]
+    k = np.arange(sizes.shape[-1])
+    gap = k[:, None] - k[None, :]
+    weight = np.where(gap > 0, remain ** np.maximum(gap, 0), 0.0)
+    residual = (weight * sizes[..., None, :]).sum(-1)     # ما لم يتعافَ قبل كل موجة
+    sizes = np.broadcast_to(sizes, residual.shape)
+
+    points = np.concatenate([residual.ravel(), (residual + sizes).ravel()])
+    c = points * wave_slippage(curve, points)
+    before = c[:residual.size].reshape(residual.shape)
+    after = c[residual.size:].reshape(residual.shape)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        impact = np.where(np.isinf(after), np.inf, after - before)
+        impact = np.where(sizes > 0, impact, 0.0)
+        slip = np.where(sizes > 0, impact / sizes, 0.0)
+    return impact, slip
+
+
+def _expected(curve, demand, reduction, weights, spacing, drift, halflife):
+    """
+    (slippage لكل موجة, تكلفة USD = impact + timing) — نفس النموذج للطريقتين
+    """
+    sizes = demand * reduction * np.asarray(weights, dtype=np.float64)
+    impact, slip = wave_costs(curve, sizes, decay(spacing, halflife))
+    timing = sizes.sum() * drift * spacing * (len(sizes) - 1) / 2
+    return slip.tolist(), float(impact.sum() + timing)
+
+
+def bucketed_plan(curve, demand, spacing=WAVE_SPACING, drift=DRIFT_PER_SEC, halflife=BOOK_HALFLIFE):
+    liq1 = curve.depth(0.01)
+    n = wave_count(wcf(demand, liq1))
+    weights = wave_distribution(n)
+    reduction = min(1.0, liq1 / demand) if liq1 > 0 else 0
+    slip, cost = _expected(curve, demand, reduction, weights, spacing, drift, halflife)
+    return {
+        "method": "bucketed",
+        "waves": n,
+        "weights": weights,
+        "reduction": reduction,
+        "spacing": spacing,
+        "expected_slippage": slip,
+        "expected_cost": cost,
+    }
+
+
+# ================================================================
+# OPTIMIZED
+# ================================================================
+
+def max_size_within(curve, max_slippage):
+    """
+    أكبر طلب USD واحد بمتوسط slippage ≤ max_slippage (interp على المنحنى)
+    """
+    slip = curve.fill(curve.cum_notional)["slippage"]
+    if slip[-1] <= max_slippage:
+        return curve.total
+    return float(np.interp(max_slippage, slip, curve.cum_notional))
+
+
+def _largest_within(curve, demand, waves, spacings, max_slippage, halflife, steps=64):
+    """
+    حتى max_waves لا تكفي → أكبر reduction (ثم أقصر spacing) تبقى فيها كل موجة
+    ضمن الميزانية بعد احتساب الكتاب غير المتعافي — grid (spacing × reduction)
+    """
+    upper = min(1.0, waves * max_size_within(curve, max_slippage) / demand)
+    reductions = upper * np.arange(steps, 0, -1) / steps
+    sizes = demand * reductions[:, None] * np.ones(waves) / waves
+    _, slip = wave_costs(curve, sizes, decay(spacings, halflife)[:, None])
+
+    ok = (slip <= max_slippage).all(-1)                 # (spacing, reduction)
+    if not ok.any():
+        return float(spacings.max()), float(reductions[-1])
+    r = int(np.flatnonzero(ok.any(0))[0])               # أكبر reduction ممكنة
+    s = int(np.flatnonzero(ok[:, r])[0])                # أقصر تباعد يحققها
+    return float(spacings[s]), float(reductions[r])
+
+
+def optimized_plan(curve, demand, max_slippage=MAX_SLIPPAGE, max_waves=MAX_WAVES,
+                   spacings=WAVE_SPACINGS, drift=DRIFT_PER_SEC, halflife=BOOK_HALFLIFE):
+    n = np.arange(1, max_waves + 1)
+    spacings = np.asarray(spacings, dtype=np.float64)
+
+    # صف لكل n: n موجات متساوية ثم أصفار → grid (spacing × n × wave)
+    k = np.arange(max_waves)
+    sizes = np.where(k[None, :] < n[:, None], demand / n[:, None], 0.0)
+    impact, slip = wave_costs(curve, sizes, decay(spacings, halflife)[:, None])
+
+    timing = demand * drift * spacings[:, None] * (n - 1) / 2
+    cost = impact.sum(-1) + timing
+
+    ok = (slip <= max_slippage).all(-1)
+    if ok.any():
+        s, best = np.unravel_index(np.argmin(np.where(ok, cost, np.inf)), cost.shape)
+        waves, spacing, reduction = int(n[best]), float(spacings[s]), 1.0
+    else:
+        waves = max_waves
+        spacing, reduction = _largest_within(curve, demand, waves, spacings, max_slippage, halflife)
+
+    weights = [1.0 / waves] * waves
+    exp_slip, exp_cost = _expected(curve, demand, reduction, weights, spacing, drift, halflife)
+    return {
+        "method": "optimized",
+        "waves": waves,
+        "weights": weights,
+        "reduction": reduction,
+        "spacing": spacing if waves > 1 else 0.0,
+        "expected_slippage": exp_slip,
+        "expected_cost": exp_cost,
+    }
+
+
+def plan_waves(curve, demand, method=WAVE_PLANNER, **kw):
+    if demand <= 0 or not curve:
+        return {
+            "method": method, "waves": 0, "weights": [], "reduction": 0.0, "spacing": 0.0,
+            "expected_slippage": [], "expected_cost": 0.0,
+        }
+    if method == "bucketed":
+        return bucketed_plan(
+            curve, demand, kw.get("spacing", WAVE_SPACING),
+            kw.get("drift", DRIFT_PER_SEC), kw.get("halflife", BOOK_HALFLIFE)
+        )
+    return optimized_plan(curve, demand, **kw)
@@ -0,0 +1,270 @@
+# ================================================================
+#  HORUS WAVE SCHEDULER — Adaptive pacing (book recovery + drift guard)
+# ================================================================
+#  موجات البورصة الواحدة تخرج بالتتابع — لا دفعة واحدة:
+#
+#       wave 1    → فوراً (قبل ack الإشارة)
+#       wave N+1  → مهمة خلفية لكل (symbol × exchange) — بعد:
+#           • delay   = max(plan spacing, HORUS_WAVE_MIN_DELAY)
+#           • تعافي الكتاب الحي: liq 1% ≥ HORUS_WAVE_RECOVERY × liq 1% قبل wave 1
+#             (إعادة قياس كل HORUS_WAVE_POLL حتى HORUS_WAVE_MAX_WAIT)
+#
+#  إشارة جديدة لنفس العملة → preempt: الموجات المعلّقة تُلغى (ABORTED)
+#  قبل تخطيط الجديدة — نفس ترتيب KeyedDispatcher (BUY ثم SELL لا يتداخلان)
+#
+#  لم يتعافَ خلال max_wait  → الموجة تُصغَّر بنسبة التعافي
+#  drift ضدنا منذ wave 1 (بدون أثرنا المخطط — أفضل سعر متوقع بعد كل موجة
+#  من الكتاب لحظة إرسالها، ونجمع حركة السوق فوقه بين الموجات):
+#       > نصف HORUS_WAVE_DRIFT_LIMIT → تصغير خطي
+#       ≥ HORUS_WAVE_DRIFT_LIMIT     → إلغاء الموجات المتبقية
+#  حجم بعد التصغير < HORUS_WAVE_MIN_RATIO من المخطط → إلغاء الباقي
+#
+#  realized impact لكل موجة = حركة أفضل سعر ضدنا من قبل الإرسال حتى أول
+#  قياس بعده → log + wave_logs ("impact") + span "wave" (expected vs realized)
+# ================================================================
+
+import asyncio
+import logging
+import os
+import time
+
+log = logging.getLogger("WaveScheduler")
+
+MIN_DELAY = float(os.getenv("HORUS_WAVE_MIN_DELAY", "1.0"))        # ثواني
+RECOVERY = float(os.getenv("HORUS_WAVE_RECOVERY", "0.8"))          # من liq 1% الأصلي
+POLL = float(os.getenv("HORUS_WAVE_POLL", "0.25"))
+MAX_WAIT = float(os.getenv("HORUS_WAVE_MAX_WAIT", "10"))
+DRIFT_LIMIT = float(os.getenv("HORUS_WAVE_DRIFT_LIMIT", "0.005"))  # 0.5%
+MIN_RATIO = float(os.getenv("HORUS_WAVE_MIN_RATIO", "0.2"))
+
+
+def adverse_move(side, base, price):
+    """
+    حركة السعر ضدنا (موجبة = أسوأ): asks ↑ للشراء / bids ↓ للبيع
+    """
+    if not base or not price:
+        return 0.0
+    move = price / base - 1
+    return move if side == "asks" else -move
+
+
+def drift_factor(drift, limit=DRIFT_LIMIT):
+    """
+    1.0 حتى نصف الحد → خطي → 0.0 عند الحد
+    """
+    if limit <= 0 or drift <= limit / 2:
+        return 1.0
+    return max(0.0, 1 - (drift - limit / 2) / (limit / 2))
+
+
+class WaveScheduler:
+
+    def __init__(self, publish, measure, tracer, logs,
+                 min_delay=MIN_DELAY, recovery=RECOVERY, poll=POLL,
+                 max_wait=MAX_WAIT, drift_limit=DRIFT_LIMIT, min_ratio=MIN_RATIO):
+        self.publish = publish      # async publish(wave packet)
+        self.measure = measure      # async measure(exchange, symbol, side) → LiquidityCurve | None
+        self.tracer = tracer
+        self.logs = logs
+        self.min_delay = min_delay
+        self.recovery = recovery
+        self.poll = poll
+        self.max_wait = max_wait
+        self.drift_limit = drift_limit
+        self.min_ratio = min_ratio
+        self.tasks = set()
+        self.pending = {}           # (symbol, exchange) → task الموجات المتبقية
+        self.counters = {"sent": 0, "shrunk": 0, "aborted": 0, "preempted": 0}
+
+    # ------------------------------------------------------------
+
+    async def dispatch(self, waves, curve, plan, side, span):
+        """
+        waves = wave packets لبورصة واحدة بالترتيب / curve = الكتاب الذي خُططت عليه
+        """
+        if not waves:
+            return
+
+        await self._send(waves[0], 1.0, "SENT", span)
+        base = {"ref": self._after(curve, waves[0]), "liq1": curve.depth(0.01), "price": curve.best}
+
+        # الموجات التالية + قياس impact الأخيرة في الخلفية
+        key = (waves[0]["symbol"], waves[0]["exchange"])
+        self._cancel(key, f"replaced by {waves[0]['parent']}")
+
+        delay = max(plan["spacing"], self.min_delay)
+        task = asyncio.create_task(self._pace(waves, base, delay, side, span))
+        self.pending[key] = task
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+        task.add_done_callback(lambda t: self.pending.pop(key, None) if self.pending.get(key) is t else None)
+
+    def preempt(self, symbol, reason):
+        """
+        إشارة جديدة لنفس العملة: إلغاء موجات الإشارة السابقة (كل البورصات)
+        """
+        for key in [k for k in self.pending if k[0] == symbol]:
+            self._cancel(key, reason)
+
+    async def close(self):
+        """
+        إيقاف الخدمة: الموجات المتبقية لا تُرسل (السوق تغيّر عند إعادة التشغيل)
+        """
+        for task in list(self.tasks):
+            task.cancel("shutdown")
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+
+    def _cancel(self, key, reason):
+        task = self.pending.pop(key, None)
+        if task is not None and not task.done():
+            self.counters["preempted"] += 1
+            task.cancel(reason)
+
+    @staticmethod
+    def _after(curve, wave):
+        """
+        أفضل سعر متوقع بعد الموجة (أثرنا المخطط على هذا الكتاب)
+        """
+        return curve.fill(sum(wave["per_client_amount_usd"].values()))["worst"]
+
+    # ------------------------------------------------------------
+
+    async def _send(self, wave, factor, status, span):
+        if factor < 1.0:
+            wave["per_client_amount_usd"] = {
+                cid: usd * factor for cid, usd in wave["per_client_amount_usd"].items()
+            }
+            wave["scaled"] = round(factor, 4)
+
+        wave["trace"] = span.context()
+        wave["timestamp"] = time.time()
+        await self.publish(wave)
+        self.counters["sent"] += 1
+
+        self.logs.wave_signal(
+            wave["parent"], wave["signal_id"], wave["symbol"], wave["action"],
+            wave["exchange"], wave["wave"], wave["per_client_amount_usd"], status
+        )
+
+    async def _pace(self, waves, base, delay, side, span):
+        ex, symbol = waves[0]["exchange"], waves[0]["symbol"]
+        before = base["price"]
+        ref = base["ref"]
+        drift = 0.0
+        idx = 1
+
+        try:
+            while idx < len(waves):
+                wave = waves[idx]
+                curve, waited = await self._wait_recovery(ex, symbol, side, base["liq1"], delay)
+
+                price = curve.best if curve else None
+                self._report(waves[idx - 1], before, price, side)
+
+                if curve is None:
+                    self._abort(waves[idx:], "no live book")
+                    return
+
+                # حركة السوق فوق أثر الموجة السابقة (تعافٍ = سالب)
+                drift += adverse_move(side, ref, price)
+                liq1 = curve.depth(0.01)
+                recovered = liq1 / base["liq1"] if base["liq1"] > 0 else 1.0
+
+                factor = drift_factor(drift, self.drift_limit)
+                if recovered < self.recovery:
+                    factor = min(factor, recovered / self.recovery)
+
+                if factor < self.min_ratio:
+                    self._abort(
+                        waves[idx:],
+                        f"drift={drift * 100:.3f}% recovered={recovered * 100:.1f}%"
+                    )
+                    return
+
+                status = "SENT" if factor >= 1.0 else "SHRUNK"
+                if status == "SHRUNK":
+                    self.counters["shrunk"] += 1
+                    log.warning(
+                        f"🌊 {ex} {symbol} wave {wave['wave']} shrunk ×{factor:.2f} "
+                        f"| drift={drift * 100:.3f}% recovered={recovered * 100:.1f}%"
+                    )
+
+                log.info(
+                    f"🌊 {ex} {symbol} wave {wave['wave']}/{len(waves)} released after {waited:.1f}s "
+                    f"| liq1={liq1:,.0f} ({recovered * 100:.0f}%) drift={drift * 100:.3f}%"
+                )
+                before = price
+                # الإرسال لا يُقطع بالإلغاء (الموجة إما خرجت كاملة أو لم تخرج)
+                send = asyncio.ensure_future(self._send(wave, factor, status, span))
+                try:
+                    await asyncio.shield(send)
+                except asyncio.CancelledError:
+                    await asyncio.wait({send})
+                    if not send.exception():
+                        idx += 1
+                    raise
+                idx += 1
+                ref = self._after(curve, wave)
+
+            await asyncio.sleep(delay)
+            curve = await self.measure(ex, symbol, side)
+            self._report(waves[-1], before, curve.best if curve else None, side)
+
+        except asyncio.CancelledError as e:
+            if idx < len(waves):
+                self._abort(waves[idx:], e.args[0] if e.args else "cancelled")
+            raise
+        except Exception as e:
+            log.error(f"❌ Wave pacing failed for {ex} {symbol}: {e}")
+            if idx < len(waves):
+                self._abort(waves[idx:], f"error: {e}")
+
+    async def _wait_recovery(self, ex, symbol, side, liq1, delay):
+        """
+        delay ثابت ثم poll حتى liq 1% ≥ recovery × الأصلي أو max_wait
+        """
+        start = time.monotonic()
+        await asyncio.sleep(delay)
+
+        curve = None
+        while True:
+            curve = await self.measure(ex, symbol, side) or curve
+            waited = time.monotonic() - start
+            if curve and curve.depth(0.01) >= self.recovery * liq1:
+                return curve, waited
+            if waited >= delay + self.max_wait:
+                return curve, waited
+            await asyncio.sleep(self.poll)
+
+    # ------------------------------------------------------------
+
+    def _report(self, wave, before, after, side):
+        expected = wave.get("expected_slippage")
+        realized = adverse_move(side, before, after) if after else None
+
+        exp_txt = f"{expected * 100:.3f}%" if expected is not None else "n/a"
+        real_txt = f"{realized * 100:.3f}%" if realized is not None else "n/a"
+        log.info(
+            f"📐 {wave['exchange']} {wave['symbol']} wave {wave['wave']} impact "
+            f"| expected={exp_txt} realized={real_txt}"
+        )
+        self.logs.wave(
+            wave["exchange"], wave["symbol"], wave["wave"], "impact",
+            f"expected={exp_txt} realized={real_txt} scaled={wave.get('scaled', 1.0)}"
+        )
+
+        span = self.tracer.begin(wave.get("trace"), "wave", wave=wave["wave"], exchange=wave["exchange"])
+        self.tracer.end(span, expected=expected, realized=realized)
+
+    def _abort(self, waves, reason):
+        self.counters["aborted"] += len(waves)
+        for wave in waves:
+            self.logs.wave_signal(
+                wave["parent"], wave["signal_id"], wave["symbol"], wave["action"],
+                wave["exchange"], wave["wave"], wave["per_client_amount_usd"], "ABORTED"
+            )
+            self.logs.wave(wave["exchange"], wave["symbol"], wave["wave"], "aborted", reason)
+        log.warning(
+            f"🛑 {waves[0]['exchange']} {waves[0]['symbol']} — {len(waves)} remaining wave(s) "
+            f"aborted ({reason})"
+        )
@@ -0,0 +1,305 @@
+# ================================================================
+#  HORUS WS TRANSPORT — Order entry over exchange WebSockets
+# ================================================================
+#  اتصال WebSocket دائم ومُصادق لكل API key:
+#       • OKX      → wss://ws.okx.com:8443/ws/v5/private   (op: order / batch-orders)
+#       • Binance  → wss://ws-api.binance.com/ws-api/v3     (method: order.place)
+#       • Bybit    → wss://stream.bybit.com/v5/trade         (op: order.create)
+#
+#  • كل طلب يحمل id — الرد يرجع لصاحبه عبر Future (request-id correlation)
+#  • إعادة اتصال تلقائية عند الانقطاع (back-off حتى 30s)
+#  • لو الاتصال غير جاهز → WSUnavailable → Gate يرسل عبر REST
+#    (الطلب لم يُرسل أصلاً — الرجوع لـ REST آمن)
+#       - أول اتصال فقط ننتظره (حتى CONNECT_TIMEOUT)
+#       - انقطع / فشل الاتصال وإعادة الاتصال معلّقة → WSUnavailable فوراً
+#         (circuit breaker — لا ننتظر 3s لكل أمر طوال فترة الانقطاع)
+#
+#  التفعيل لكل بورصة:  HORUS_WS_ORDERS="okx,binance,bybit"
+# ================================================================
+
+import asyncio
+import base64
+import hashlib
+import hmac
+import itertools
+import json
+import logging
+import os
+import websockets
+
+from core.endpoints import endpoint
+from gate.clock import RECV_WINDOW
+
+log = logging.getLogger("WSTransport")
+
+WS_ORDER_EXCHANGES = {
+    ex.strip() for ex in os.getenv("HORUS_WS_ORDERS", "").split(",") if ex.strip()
+}
+
+CONNECT_TIMEOUT = 3
+REQUEST_TIMEOUT = 5
+
+
+class WSUnavailable(Exception):
+    """
+    الاتصال غير جاهز — الطلب لم يُرسل
+    """
+
+
+# ================================================================
+#  BASE CONNECTION
+# ================================================================
+
+class WSOrderConnection:
+    URL = None
+    ID_FIELD = "id"
+
+    _ids = itertools.count(1)
+
+    def __init__(self, client):
+        self.client = client
+        self.ws = None
+        self.ready = asyncio.Event()
+        self.pending = {}
+        self.down = False      # فشل اتصال / انقطاع — إعادة الاتصال معلّقة
+        self._task = None
+        self._closed = False
+
+    # ------------------------------------------------------------
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        self._closed = True
+        if self._task is not None:
+            self._task.cancel()
+        if self.ws is not None:
+            await self.ws.close()
+
+    async def _run(self):
+        """
+        اتصال → مصادقة → قراءة الردود، ثم إعادة الاتصال عند أي انقطاع
+        """
+        delay = 1
+        while not self._closed:
+            try:
+                async with websockets.connect(self.URL, ping_interval=15) as ws:
+                    self.ws = ws
+                    await self.login()
+                    self.ready.set()
+                    self.down = False
+                    delay = 1
+                    log.info(f"🔐 {self.client.EXCHANGE} WS order channel ready | key={self.client.key[:6]}…")
+
+                    async for msg in ws:
+                        self._dispatch(json.loads(msg))
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log.error(f"❌ {self.client.EXCHANGE} WS order channel error: {e}")
+
+            self.ready.clear()
+            self.down = True
+            self.ws = None
+            self._fail_pending(ConnectionError("WS disconnected before response"))
+
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 30)
+
+    def _dispatch(self, msg):
+        req_id = msg.get(self.ID_FIELD)
+        fut = self.pending.pop(str(req_id), None) if req_id is not None else None
+        if fut is not None and not fut.done():
+            fut.set_result(self.parse(msg))
+
+    def _fail_pending(self, exc):
+        for fut in self.pending.values():
+            if not fut.done():
+                fut.set_exception(exc)
+        self.pending.clear()
+
+    # ------------------------------------------------------------
+
+    async def request(self, body):
+        if not self.ready.is_set():
+            self.start()
+            if self.down:
+                raise WSUnavailable(f"{self.client.EXCHANGE} WS reconnecting")
+            try:
+                await asyncio.wait_for(self.ready.wait(), CONNECT_TIMEOUT)
+            except asyncio.TimeoutError:
+                raise WSUnavailable(f"{self.client.EXCHANGE} WS not connected")
+
+        req_id = f"h{next(self._ids)}"
+        fut = asyncio.get_running_loop().create_future()
+        self.pending[req_id] = fut
+
+        try:
+            await self.ws.send(json.dumps(self.build(req_id, body)))
+        except Exception as e:
+            self.pending.pop(req_id, None)
+            raise WSUnavailable(f"{self.client.EXCHANGE} WS send failed: {e}")
+
+        try:
+            return await asyncio.wait_for(fut, REQUEST_TIMEOUT)
+        finally:
+            self.pending.pop(req_id, None)
+
+    # ------------------------------------------------------------
+
+    async def login(self):
+        pass
+
+    def build(self, req_id, body):
+        raise NotImplementedError
+
+    def parse(self, msg):
+        return msg
+
+
+# ================================================================
+#  OKX
+# ================================================================
+
+class OKXOrderWS(WSOrderConnection):
+    URL = endpoint("okx", "ws_private")
+
+    async def login(self):
+        c = self.client
+        ts = str(int(c.gate.clock.now("okx")))
+        sign = base64.b64encode(
+            hmac.new(c.secret.encode(), f"{ts}GET/users/self/verify".encode(), hashlib.sha256).digest()
+        ).decode()
+
+        await self.ws.send(json.dumps({
+            "op": "login",
+            "args": [{"apiKey": c.key, "passphrase": c.passphrase, "timestamp": ts, "sign": sign}]
+        }))
+        res = json.loads(await self.ws.recv())
+        if res.get("code") != "0":
+            raise Exception(f"OKX WS login failed: {res}")
+
+    def build(self, req_id, body):
+        # body = أمر واحد أو قائمة أوامر (batch)
+        if isinstance(body, list):
+            return {"id": req_id, "op": "batch-orders", "args": body}
+        return {"id": req_id, "op": "order", "args": [body]}
+
+    def parse(self, msg):
+        # نفس شكل رد REST: code / msg / data
+        return {"code": msg.get("code"), "msg": msg.get("msg"), "data": msg.get("data", [])}
+
+
+# ================================================================
+#  BINANCE
+# ================================================================
+
+class BinanceOrderWS(WSOrderConnection):
+    URL = endpoint("binance", "ws_private")
+
+    def build(self, req_id, body):
+        c = self.client
+        params = dict(body)
+        params["apiKey"] = c.key
+        params["recvWindow"] = RECV_WINDOW
+        params["timestamp"] = c.gate.clock.now_ms("binance")   # وقت الإرسال (كل محاولة)
+
+        # Binance WS API: التوقيع على كل الـ params مرتبة أبجدياً
+        payload = "&".join(f"{k}={params[k]}" for k in sorted(params))
+        params["signature"] = c._sign(payload)
+
+        return {"id": req_id, "method": "order.place", "params": params}
+
+    def parse(self, msg):
+        if msg.get("status") == 200:
+            return msg.get("result", {})
+        return msg.get("error", msg)
+
+
+# ================================================================
+#  BYBIT
+# ================================================================
+
+class BybitOrderWS(WSOrderConnection):
+    URL = endpoint("bybit", "ws_private")
+    ID_FIELD = "reqId"
+
+    async def login(self):
+        c = self.client
+        expires = c.gate.clock.now_ms("bybit") + 10000
+        sign = c._sign(f"GET/realtime{expires}")
+
+        await self.ws.send(json.dumps({"op": "auth", "args": [c.key, expires, sign]}))
+        res = json.loads(await self.ws.recv())
+        if res.get("retCode") != 0:
+            raise Exception(f"Bybit WS auth failed: {res}")
+
+    def build(self, req_id, body):
+        # body = أمر واحد أو batch ({"category", "request": [...]})
+        return {
+            "reqId": req_id,
+            "header": {
+                "X-BAPI-TIMESTAMP": str(self.client.gate.clock.now_ms("bybit")),
+                "X-BAPI-RECV-WINDOW": str(RECV_WINDOW)
+            },
+            "op": "order.create-batch" if "request" in body else "order.create",
+            "args": [body]
+        }
+
+    def parse(self, msg):
+        # نفس شكل رد REST: retCode / retMsg / result (+ retExtInfo لكل أمر في الـ batch)
+        return {
+            "retCode": msg.get("retCode"),
+            "retMsg": msg.get("retMsg"),
+            "result": msg.get("data", {}),
+            "retExtInfo": msg.get("retExtInfo", {}),
+        }
+
+
+CONNECTIONS = {
+    "okx": OKXOrderWS,
+    "binance": BinanceOrderWS,
+    "bybit": BybitOrderWS,
+}
+
+
+# ================================================================
+#  TRANSPORT (registry per key)
+# ================================================================
+
+class WSTransport:
+
+    def __init__(self, exchanges=WS_ORDER_EXCHANGES):
+        self.exchanges = set(exchanges)
+        self._conns = {}
+
+    def enabled(self, exchange):
+        return exchange in self.exchanges
+
+    def connection(self, client):
+        k = (client.EXCHANGE, client.key)
+        conn = self._conns.get(k)
+        if conn is None:
+            conn = CONNECTIONS[client.EXCHANGE](client)
+            self._conns[k] = conn
+            conn.start()
+        return conn
+
+    def warm(self, clients):
+        """
+        فتح الاتصالات مسبقاً (قبل الإشارة) لعملاء البورصات المفعّلة
+        """
+        for client in clients:
+            if self.enabled(client.EXCHANGE):
+                self.connection(client)
+
+    async def place(self, client, body):
+        return await self.connection(client).request(body)
+
+    async def close(self):
+        for conn in self._conns.values():
+            await conn.close()
+        self._conns.clear()